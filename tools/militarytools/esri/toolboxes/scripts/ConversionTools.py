@@ -387,7 +387,16 @@ class TableTo2PointLine(object):
         param_10.datatype = u'Spatial Reference'
         param_10.value = srWGS84.exportToString()
 
-        return [param_1, param_2, param_3, param_4, param_5, param_6, param_7, param_8, param_9, param_10]
+        # Rows_Per_Chunk
+        param_11 = arcpy.Parameter()
+        param_11.name = u'Rows_Per_Chunk'
+        param_11.displayName = u'Rows Per Chunk'
+        param_11.parameterType = 'Optional'
+        param_11.direction = 'Input'
+        param_11.datatype = u'Long'
+        param_11.category = u'Large Tables'
+
+        return [param_1, param_2, param_3, param_4, param_5, param_6, param_7, param_8, param_9, param_10, param_11]
 
     def isLicensed(self):
         return True
@@ -415,6 +424,7 @@ class TableTo2PointLine(object):
         inputLineType = parameters[8].valueAsText # Line Type (from Value List)
         optionalSpatialReference = parameters[9].value # Spatial Reference
         optionalSpatialReferenceAsText = parameters[9].valueAsText
+        optionalChunkSize = parameters[10].value # Rows Per Chunk
 
         if optionalSpatialReferenceAsText == "#" or optionalSpatialReferenceAsText == "":
             optionalSpatialReference = srWGS84 #GCS_WGS_1984
@@ -430,7 +440,8 @@ class TableTo2PointLine(object):
                                               inputEndYField,
                                               outputLineFeatures,
                                               inputLineType,
-                                              optionalSpatialReference)
+                                              optionalSpatialReference,
+                                              optionalChunkSize)
 
         # Set output
         return outputLineFeaturesOut
@@ -619,7 +630,16 @@ class TableToLineOfBearing(object):
         param_11.datatype = u'Spatial Reference'
         param_11.value = srWGS84.exportToString()
 
-        return [param_1, param_2, param_3, param_4, param_5, param_6, param_7, param_8, param_9, param_10, param_11]
+        # Rows_Per_Chunk
+        param_12 = arcpy.Parameter()
+        param_12.name = u'Rows_Per_Chunk'
+        param_12.displayName = u'Rows Per Chunk'
+        param_12.parameterType = 'Optional'
+        param_12.direction = 'Input'
+        param_12.datatype = u'Long'
+        param_12.category = u'Large Tables'
+
+        return [param_1, param_2, param_3, param_4, param_5, param_6, param_7, param_8, param_9, param_10, param_11, param_12]
 
     def isLicensed(self):
         return True
@@ -648,6 +668,7 @@ class TableToLineOfBearing(object):
         inputLineType = parameters[9].valueAsText # Line Type - from ValueList
         optionalSpatialReference = parameters[10].value # Spatial Reference
         optionalSpatialReferenceAsText = parameters[10].valueAsText
+        optionalChunkSize = parameters[11].value # Rows Per Chunk
 
         if optionalSpatialReferenceAsText == "#" or optionalSpatialReferenceAsText == "":
             optionalSpatialReference = srWGS84 #GCS_WGS_1984
@@ -664,7 +685,8 @@ class TableToLineOfBearing(object):
                                                  inputDistanceField,
                                                  outputLineFeatures,
                                                  inputLineType,
-                                                 optionalSpatialReference)
+                                                 optionalSpatialReference,
+                                                 optionalChunkSize)
 
         return outputLineFeaturesOut
 
@@ -789,7 +811,16 @@ class TableToPoint(object):
         param_6.datatype = u'Spatial Reference'
         param_6.value = srWGS84.exportToString()
 
-        return [param_1, param_2, param_3, param_4, param_5, param_6]
+        # Rows_Per_Chunk
+        param_7 = arcpy.Parameter()
+        param_7.name = u'Rows_Per_Chunk'
+        param_7.displayName = u'Rows Per Chunk'
+        param_7.parameterType = 'Optional'
+        param_7.direction = 'Input'
+        param_7.datatype = u'Long'
+        param_7.category = u'Large Tables'
+
+        return [param_1, param_2, param_3, param_4, param_5, param_6, param_7]
 
     def isLicensed(self):
         return True
@@ -813,6 +844,7 @@ class TableToPoint(object):
         outputPointFeatures = parameters[4].valueAsText
         optionalSpatialReference = parameters[5].value
         optionalSpatialReferenceAsText = parameters[5].valueAsText
+        optionalChunkSize = parameters[6].value # Rows Per Chunk
 
         if optionalSpatialReferenceAsText == "#" or optionalSpatialReferenceAsText == "":
             optionalSpatialReference = srWGS84 #GCS_WGS_1984
@@ -824,7 +856,8 @@ class TableToPoint(object):
                                     inputXField,
                                     inputYField,
                                     outputPointFeatures,
-                                    optionalSpatialReference)
+                                    optionalSpatialReference,
+                                    optionalChunkSize)
 
         return outputPointFeaturesOut
 
@@ -1391,7 +1424,16 @@ class TableToEllipse(object):
         param_11.datatype = u'Spatial Reference'
         param_11.value = srWGS84.exportToString()
 
-        return [param_1, param_2, param_3, param_4, param_5, param_6, param_7, param_8, param_9, param_10, param_11]
+        # Rows_Per_Chunk
+        param_12 = arcpy.Parameter()
+        param_12.name = u'Rows_Per_Chunk'
+        param_12.displayName = u'Rows Per Chunk'
+        param_12.parameterType = 'Optional'
+        param_12.direction = 'Input'
+        param_12.datatype = u'Long'
+        param_12.category = u'Large Tables'
+
+        return [param_1, param_2, param_3, param_4, param_5, param_6, param_7, param_8, param_9, param_10, param_11, param_12]
 
     def isLicensed(self):
         return True
@@ -1420,6 +1462,7 @@ class TableToEllipse(object):
         inputAzimuthUnits = parameters[9].valueAsText # Azimuth Units - from valuelist
         optionalSpatialReference = parameters[10].value # Spatial Reference
         optionalSpatialReferenceAsText = parameters[10].valueAsText
+        optionalChunkSize = parameters[11].value # Rows Per Chunk
 
         if optionalSpatialReferenceAsText == "#" or optionalSpatialReferenceAsText == "":
             optionalSpatialReference = srWGS84 #GCS_WGS_1984
@@ -1436,7 +1479,8 @@ class TableToEllipse(object):
                                            outputEllipseFeatures,
                                            inputAzimuthField,
                                            inputAzimuthUnits,
-                                           optionalSpatialReference)
+                                           optionalSpatialReference,
+                                           optionalChunkSize)
 
         return outputEllipseFeaturesOut
 
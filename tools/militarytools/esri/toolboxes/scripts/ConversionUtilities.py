@@ -42,8 +42,23 @@ import os
 import sys
 import arcpy
 from arcpy import env
+import json
+import hashlib
+import tempfile
 import traceback
 import types
+import numpy
+
+try:
+    from . import Utilities
+    from . import CoordinateNotation
+    from . import Geodesic
+    from . import SpatialReferenceUtilities
+except ImportError:
+    import Utilities
+    import CoordinateNotation
+    import Geodesic
+    import SpatialReferenceUtilities
 
 debug = True
 srWGS84 = arcpy.SpatialReference(4326) # GCS_WGS_1984
@@ -59,9 +74,15 @@ formatsCoordinateNotation = ["DD_1", "DD_2",
                              "GARS", "GEOREF",
                              "UTM", "MGRS",
                              "USNG"]
+angleFormats = ["DD_1", "DD_2", "DDM_1", "DDM_2", "DMS_1", "DMS_2"] # angles in the geographic coordinate system of the spatial reference
 formatsLineTypes = ["GEODESIC", "GREAT_CIRCLE", "RHUMB_LINE", "NORMAL_SECTION"]
 joinExcludeFields = ['OBJECTID', 'OID', 'ObjectID',
                      'SHAPE', 'Shape', 'Shape_Length', 'Shape_Area', 'JoinID']
+sourceOIDFieldName = "SourceOID" # LONG key from the output of geometry tools back to input rows
+checkpointExtension = ".checkpoint"
+fieldTypes = {"String":"TEXT", "Integer":"LONG", "SmallInteger":"SHORT",
+              "Double":"DOUBLE", "Single":"FLOAT", "Date":"DATE",
+              "GUID":"GUID"} # arcpy.Field.type:AddField field type
 
 def polylineToPolygon(inputPolylines, inputIDFieldName, outputPolygons):
     '''
@@ -122,17 +143,16 @@ def polylineToPolygon(inputPolylines, inputIDFieldName, outputPolygons):
             if inputIDFieldName:
                 inID = str(row[1])
 
-            # Polyline will only have one part
             featShape = row[0]
 
             if (featShape is None) :
                 arcpy.AddWarning('Output Row: ' + str(rowCount) + ' missing feature geometry (check input data). Skipping.')
                 continue
 
-            polyline = featShape.getPart(0)
-
+            # each part of the polyline becomes a ring of the polygon
             polyArray.removeAll()
-            polyArray.append(polyline)
+            for partIndex in range(featShape.partCount):
+                polyArray.append(featShape.getPart(partIndex))
 
             outPoly = arcpy.Polygon(polyArray, sr)
 
@@ -265,13 +285,13 @@ def _tableFieldNames(inputTable, excludeList):
     try:
         fieldNames = []
         #if debug: arcpy.AddMessage("Excluding fields: {0}".format(excludeList))
-        for f in arcpy.ListFields(inputTable):
+        for fieldName in Utilities.GetFieldNames(inputTable):
             if not excludeList:
-                if not f.name in excludeList:
-                    #arcpy.AddMessage("Adding {0}.".format(f.name))
-                    fieldNames.append(f.name)
+                if not fieldName in excludeList:
+                    #arcpy.AddMessage("Adding {0}.".format(fieldName))
+                    fieldNames.append(fieldName)
             else:
-                fieldNames.append(f.name)
+                fieldNames.append(fieldName)
         return fieldNames
     
     except arcpy.ExecuteError:
@@ -313,6 +333,414 @@ def _checkSpatialRef(inputSpatialReference):
         inputSpatialReference = inputSpatialReference.exportToString()
     return inputSpatialReference
 
+def _attributeFields(inputTable):
+    '''
+    Returns the arcpy fields of inputTable that are carried through to the output
+    '''
+    return [field for field in arcpy.ListFields(inputTable)
+            if field.editable and field.type in fieldTypes and field.name not in joinExcludeFields]
+
+def _inDatabase(catalogPath):
+    ''' True for tables in a file, personal or enterprise geodatabase '''
+    parts = str(catalogPath).replace("\\", "/").split("/")
+    return any(os.path.splitext(part)[1].lower() in [".gdb", ".mdb", ".sde"] for part in parts)
+
+def _readChunks(inputTable, valueFieldNames, attributeFields, chunkSize=None, afterOID=None):
+    '''
+    Reads inputTable in blocks of chunkSize rows, keeping the attributes
+    of each row in memory keyed by its ObjectID, so no copy of the table
+    or join field is needed
+
+    inputTable - input table
+    valueFieldNames - fields to read as columns, None entries are skipped
+    attributeFields - fields from _attributeFields to carry through
+    chunkSize - rows per block, None reads the whole table as one block
+    afterOID - skip rows up to and including this ObjectID
+
+    With chunkSize, rows are read in ObjectID order: geodatabases select
+    and sort them in the query, other sources (shapefiles, dBASE and text
+    files, memory) store them in ObjectID order and are checked as read.
+
+    yields [sourceOIDs, columns, attributes] per block; columns has one
+    list of values per valueFieldNames entry (None for None entries),
+    attributes is {source OID:list of attributeFields values}
+    '''
+    readFieldNames = [fieldName for fieldName in valueFieldNames if fieldName]
+    readCount = len(readFieldNames)
+
+    def block(rows):
+        readColumns = iter([[row[index + 1] for row in rows] for index in range(readCount)])
+        return [[row[0] for row in rows],
+                [next(readColumns) if fieldName else None for fieldName in valueFieldNames],
+                dict((row[0], list(row[readCount + 1:])) for row in rows)]
+
+    whereClause, sqlClause = None, (None, None)
+    if chunkSize:
+        desc = arcpy.Describe(inputTable)
+        if _inDatabase(desc.catalogPath):
+            oidField = arcpy.AddFieldDelimiters(desc.catalogPath, desc.OIDFieldName)
+            if afterOID is not None:
+                whereClause = "{0} > {1}".format(oidField, int(afterOID))
+            sqlClause = (None, "ORDER BY {0}".format(oidField))
+
+    rows = []
+    previousOID = None
+    with arcpy.da.SearchCursor(inputTable, ['OID@'] + readFieldNames + [field.name for field in attributeFields],
+                               whereClause, sql_clause=sqlClause) as cursor:
+        for row in cursor:
+            if chunkSize:
+                if previousOID is not None and row[0] <= previousOID:
+                    raise ValueError("{0} does not return rows in ObjectID order and cannot be read in chunks."
+                                     .format(inputTable))
+                previousOID = row[0]
+            if afterOID is not None and row[0] <= afterOID:
+                continue
+            rows.append(row)
+            if chunkSize and len(rows) >= chunkSize:
+                yield block(rows)
+                rows = []
+    if rows or not chunkSize:
+        yield block(rows)
+
+def _readTable(inputTable, valueFieldNames, attributeFields):
+    '''
+    Reads all of inputTable at once, see _readChunks
+
+    returns [sourceOIDs, columns, attributes]
+    '''
+    return next(_readChunks(inputTable, valueFieldNames, attributeFields))
+
+def _projectPoints(xs, ys, fromSpatialReference, toSpatialReference):
+    '''
+    Projects arrays of coordinates with one Multipoint projection; NaN
+    coordinates stay NaN
+
+    returns [xs, ys] float64 arrays
+    '''
+    projectedXs = numpy.full(len(xs), numpy.nan)
+    projectedYs = numpy.full(len(ys), numpy.nan)
+    valid = ~(numpy.isnan(xs) | numpy.isnan(ys))
+    if not valid.any():
+        return [projectedXs, projectedYs]
+    points = [arcpy.Point(x, y) for x, y in zip(xs[valid].tolist(), ys[valid].tolist())]
+    multipoint = arcpy.Multipoint(arcpy.Array(points), fromSpatialReference).projectAs(toSpatialReference)
+    projected = [multipoint.getPart(index) for index in range(multipoint.pointCount)]
+    if len(projected) != len(points):
+        # the multipoint dropped duplicate points, project them one at a time
+        projected = [arcpy.PointGeometry(point, fromSpatialReference).projectAs(toSpatialReference).firstPoint
+                     for point in points]
+    projectedXs[valid] = [point.X for point in projected]
+    projectedYs[valid] = [point.Y for point in projected]
+    return [projectedXs, projectedYs]
+
+def _parseCoordinates(xValues, yValues, coordinateFormat, inputSpatialReference):
+    '''
+    In-process replacement for ConvertCoordinateNotation
+
+    xValues, yValues - columns from _readTable, yValues is None for single field formats
+    coordinateFormat - one of CoordinateNotation.notationFormats
+    inputSpatialReference - spatial reference of the coordinates and of
+    the returned points. DD_2 values in a projected spatial reference
+    are used as they are; other angle formats are in its geographic
+    coordinate system, and the grid notations (UTM, MGRS, USNG, GARS,
+    GEOREF) in WGS84, and are projected to it.
+
+    returns [xs, ys, valid] float64, float64 and bool arrays
+    '''
+    spatialReference = SpatialReferenceUtilities.GetSpatialReference(inputSpatialReference)
+    if coordinateFormat == "DD_2" and spatialReference.type == "Projected":
+        xs = numpy.array([numpy.nan if value is None else float(value) for value in xValues])
+        ys = numpy.array([numpy.nan if value is None else float(value) for value in yValues])
+        return [xs, ys, ~(numpy.isnan(xs) | numpy.isnan(ys))]
+
+    CoordinateNotation.ResetCacheStatistics()
+    xs, ys, errors = CoordinateNotation.ParseNotation(xValues, yValues, coordinateFormat, spatialReference)
+    statistics = CoordinateNotation.GetCacheStatistics()
+    if statistics["hits"] or statistics["misses"]:
+        arcpy.AddMessage("Coordinate cache: {0} hits, {1} misses".format(statistics["hits"], statistics["misses"]))
+    if errors.any():
+        arcpy.AddWarning("{0} of {1} rows could not be read as {2} and are skipped."
+                         .format(int(errors.sum()), len(errors), coordinateFormat))
+    if coordinateFormat in angleFormats:
+        if spatialReference.type == "Projected":
+            xs, ys = _projectPoints(xs, ys, spatialReference.GCS, spatialReference)
+    elif spatialReference.factoryCode != srWGS84.factoryCode:
+        xs, ys = _projectPoints(xs, ys, srWGS84, spatialReference)
+    return [xs, ys, ~errors]
+
+def _outputFieldNames(attributeFields, leadingFields=[]):
+    '''
+    Output field names, leading fields first, and the indexes of the
+    attribute fields written after them; attribute fields with the name
+    of a leading field are dropped
+
+    returns [fieldNames, attributeIndexes]
+    '''
+    fieldNames = [fieldName for fieldName, fieldType in leadingFields]
+    attributeIndexes = [index for index, field in enumerate(attributeFields) if field.name not in fieldNames]
+    return [fieldNames + [attributeFields[index].name for index in attributeIndexes], attributeIndexes]
+
+def _createOutputFeatures(outputFeatures, geometryType, attributeFields, spatialReference, leadingFields=[]):
+    '''
+    Creates the output feature class with the input attribute fields
+
+    leadingFields - list of [name, AddField type] added before the attribute
+                    fields, attribute fields with the same name are dropped
+
+    returns [fieldNames, attributeIndexes] as _outputFieldNames
+    '''
+    outputFeatures = str(outputFeatures)
+    arcpy.CreateFeatureclass_management(os.path.dirname(outputFeatures), os.path.basename(outputFeatures),
+                                        geometryType, None, "DISABLED", "DISABLED", spatialReference)
+    fieldNames, attributeIndexes = _outputFieldNames(attributeFields, leadingFields)
+    for fieldName, fieldType in leadingFields:
+        arcpy.AddField_management(outputFeatures, fieldName, fieldType)
+    for index in attributeIndexes:
+        field = attributeFields[index]
+        arcpy.AddField_management(outputFeatures, field.name, fieldTypes[field.type],
+                                  field.precision, field.scale, field.length, field.aliasName)
+    return [fieldNames, attributeIndexes]
+
+def _checkpointPath(outputFeatures):
+    ''' Checkpoint file of a chunked conversion, in the scratch folder and named for the output '''
+    outputFeatures = str(outputFeatures)
+    folder = env.scratchFolder or tempfile.gettempdir()
+    key = hashlib.md5(os.path.abspath(outputFeatures).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(folder, "{0}_{1}{2}".format(os.path.basename(outputFeatures), key, checkpointExtension))
+
+def _readCheckpoint(checkpointFile, run):
+    ''' The state recorded in checkpointFile if it is for the same run, otherwise None '''
+    if not os.path.exists(checkpointFile):
+        return None
+    try:
+        with open(checkpointFile) as checkpoint:
+            state = json.load(checkpoint)
+    except (IOError, ValueError):
+        return None
+    if state.get("run") != run:
+        return None
+    return state
+
+def _writeCheckpoint(checkpointFile, state):
+    ''' Replaces checkpointFile with state, through a temporary file so a crash leaves the last one '''
+    temporaryFile = checkpointFile + ".tmp"
+    with open(temporaryFile, "w") as checkpoint:
+        json.dump(state, checkpoint)
+    if hasattr(os, "replace"):
+        os.replace(temporaryFile, checkpointFile)
+    else:
+        if os.path.exists(checkpointFile):
+            os.remove(checkpointFile)
+        os.rename(temporaryFile, checkpointFile)
+
+def _checkpointMatchesOutput(outputFeatures, state):
+    '''
+    True if outputFeatures still holds the rows recorded in a checkpoint:
+    none of them removed, and none of them replaced by another run
+    '''
+    if not arcpy.Exists(outputFeatures):
+        return False
+    outputOIDs = numpy.array([row[0] for row in arcpy.da.SearchCursor(outputFeatures, ['OID@'])], dtype=numpy.int64)
+    maxOID = int(outputOIDs.max()) if outputOIDs.size else 0
+    committedRows = int((outputOIDs <= state["outputOID"]).sum())
+    return maxOID >= state["outputOID"] and committedRows == state["outputRows"]
+
+def _convertInChunks(inputTable, valueFieldNames, attributeFields, outputFeatures, geometryType,
+                     spatialReference, leadingFields, buildRows, chunkSize=None, checkpointFile=None,
+                     settings=None):
+    '''
+    Reads inputTable and writes outputFeatures one block of rows at a time
+
+    buildRows - function(sourceOIDs, columns, attributes, attributeIndexes)
+                giving the output rows of a block: shape, leading field
+                values, then attribute values
+    chunkSize - rows per block; None converts the whole table as one block
+    checkpointFile - file recording the last block written, defaults to
+                     _checkpointPath(outputFeatures)
+    settings - dictionary of the other tool parameters the rows depend on
+               (coordinate formats, units, line type)
+
+    With chunkSize, the last source ObjectID and output ObjectID of each
+    block are recorded once its rows are inserted. A later run with the
+    same table, fields, output, spatial reference, settings and chunkSize
+    removes any rows written after that block and appends from the next
+    one, as long as the output still holds the recorded rows. The
+    checkpoint is removed when the whole table is converted.
+
+    returns outputFeatures
+    '''
+    outputFeatures = str(outputFeatures)
+    state = None
+    if chunkSize:
+        checkpointFile = checkpointFile or _checkpointPath(outputFeatures)
+        run = {"input":str(inputTable), "fields":list(valueFieldNames),
+               "output":outputFeatures, "chunkSize":int(chunkSize),
+               "spatialReference":SpatialReferenceUtilities.GetSpatialReference(spatialReference).exportToString(),
+               "settings":dict(settings or {})}
+        state = _readCheckpoint(checkpointFile, run)
+        if state and not _checkpointMatchesOutput(outputFeatures, state):
+            arcpy.AddWarning("{0} was changed since its last checkpoint, converting the whole table."
+                             .format(outputFeatures))
+            state = None
+
+    if state:
+        arcpy.AddMessage("Resuming after source ObjectID {0}, {1} rows already converted..."
+                         .format(state["sourceOID"], state["rows"]))
+        fieldNames, attributeIndexes = _outputFieldNames(attributeFields, leadingFields)
+        # rows inserted after the last checkpoint belong to the block being redone
+        with arcpy.da.UpdateCursor(outputFeatures, ['OID@']) as rows:
+            for row in rows:
+                if row[0] > state["outputOID"]:
+                    rows.deleteRow()
+    else:
+        fieldNames, attributeIndexes = _createOutputFeatures(outputFeatures, geometryType, attributeFields,
+                                                             spatialReference, leadingFields)
+        if chunkSize:
+            state = {"run":run, "sourceOID":None, "outputOID":0, "outputRows":0, "rows":0}
+
+    shapeToken = 'SHAPE@XY' if geometryType == "POINT" else 'SHAPE@'
+    for sourceOIDs, columns, attributes in _readChunks(inputTable, valueFieldNames, attributeFields,
+                                                       chunkSize, state["sourceOID"] if state else None):
+        outputOID = state["outputOID"] if state else 0
+        outputRows = 0
+        with arcpy.da.InsertCursor(outputFeatures, [shapeToken] + fieldNames) as outRows:
+            for row in buildRows(sourceOIDs, columns, attributes, attributeIndexes):
+                outputOID = max(outputOID, outRows.insertRow(row))
+                outputRows += 1
+        if chunkSize and sourceOIDs:
+            state["sourceOID"] = sourceOIDs[-1]
+            state["outputOID"] = outputOID
+            state["outputRows"] += outputRows
+            state["rows"] += len(sourceOIDs)
+            _writeCheckpoint(checkpointFile, state)
+            arcpy.AddMessage("Converted {0} rows...".format(state["rows"]))
+
+    if chunkSize and os.path.exists(checkpointFile):
+        os.remove(checkpointFile)
+    return outputFeatures
+
+def _numberColumn(values):
+    ''' float64 array of a column from _readTable, NaN for empty or non-numeric values '''
+    numbers = numpy.empty(len(values))
+    for index, value in enumerate(values):
+        try:
+            numbers[index] = float(value)
+        except (TypeError, ValueError):
+            numbers[index] = numpy.nan
+    return numbers
+
+def _geographicPoints(xs, ys, spatialReference):
+    '''
+    Longitudes and latitudes for Geodesic of points in spatialReference;
+    projected points are projected to WGS84
+
+    returns [lons, lats] float64 arrays
+    '''
+    if spatialReference.type != "Projected":
+        return [xs, ys]
+    return _projectPoints(xs, ys, spatialReference, srWGS84)
+
+def _geometryFromVertices(vertices, spatialReference, geometryType="POLYLINE"):
+    '''
+    Polyline or polygon in spatialReference from a Geodesic (vertices, 2)
+    array of longitude and latitude; projected output goes through WGS84
+
+    returns arcpy.Polyline or arcpy.Polygon
+    '''
+    geometry = arcpy.Polygon if geometryType == "POLYGON" else arcpy.Polyline
+    points = arcpy.Array([arcpy.Point(lon, lat) for lon, lat in vertices.tolist()])
+    if spatialReference.type != "Projected":
+        return geometry(points, spatialReference)
+    return geometry(points, srWGS84).projectAs(spatialReference)
+
+def _sortCodes(values):
+    ''' Integer codes that sort like values, with None first '''
+    distinct = sorted(set(values), key=lambda value: (value is not None, value))
+    codes = dict((value, code) for code, value in enumerate(distinct))
+    return numpy.array([codes[value] for value in values], dtype=numpy.int64)
+
+def _splitRings(points):
+    ''' Splits polygon vertices into rings, a ring ends where it returns to its first vertex '''
+    rings = []
+    ring = []
+    for point in points:
+        ring.append(point)
+        if len(ring) > 3 and point == ring[0]:
+            rings.append(ring)
+            ring = []
+    if ring:
+        rings.append(ring)
+    return rings
+
+def _assembleVertices(xs, ys, lineValues, sortValues, geometryType):
+    '''
+    Groups vertices into features with one stable sort, by line value
+    and then by sort value; without a sort value vertices keep their
+    table order
+
+    lineValues, sortValues - one value per vertex, or None
+    geometryType - POLYLINE, or POLYGON to split each feature into rings.
+    A polyline is always a single part, from its first vertex to its
+    last, as Points To Line writes it.
+
+    returns list of [line value, parts], parts a list of lists of (x, y);
+    parts with too few vertices are dropped
+    '''
+    if len(xs) == 0:
+        return []
+    lineCodes = numpy.zeros(len(xs), dtype=numpy.int64) if lineValues is None else _sortCodes(lineValues)
+    # lexsort is stable and sorts by its last key first
+    order = numpy.lexsort([lineCodes] if sortValues is None else [_sortCodes(sortValues), lineCodes])
+    lineCodes = lineCodes[order]
+    starts = numpy.flatnonzero(numpy.concatenate([[True], lineCodes[1:] != lineCodes[:-1]]))
+    ends = numpy.append(starts[1:], len(xs))
+    sortedXs = xs[order].tolist()
+    sortedYs = ys[order].tolist()
+    minimumVertices = 3 if geometryType == "POLYGON" else 2
+    features = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        points = list(zip(sortedXs[start:end], sortedYs[start:end]))
+        parts = _splitRings(points) if geometryType == "POLYGON" else [points]
+        parts = [part for part in parts if len(set(part)) >= minimumVertices]
+        features.append([None if lineValues is None else lineValues[order[start]], parts])
+    return features
+
+def _verticesToFeatures(inputTable, inputCoordinateFormat, inputXField, inputYField, outputFeatures,
+                        inputLineField, inputSortField, inputSpatialReference, geometryType):
+    '''
+    Reads a table of vertices, assembles them with _assembleVertices and
+    writes one polyline or polygon per line field value in one
+    InsertCursor pass. Polygons have a part per ring, polylines are
+    single part.
+
+    returns outputFeatures
+    '''
+    lineFields = [field for field in _attributeFields(inputTable) if inputLineField and field.name == inputLineField]
+    sourceOIDs, columns, attributes = _readTable(inputTable,
+                                                 [inputXField, inputYField, inputLineField, inputSortField], [])
+    xs, ys, valid = _parseCoordinates(columns[0], columns[1], inputCoordinateFormat, inputSpatialReference)
+    validRows = valid.tolist()
+    lineValues, sortValues = [None if column is None else [value for value, isValid in zip(column, validRows) if isValid]
+                              for column in columns[2:]]
+
+    arcpy.AddMessage("Assembling vertices into {0} features...".format(geometryType.lower()))
+    features = _assembleVertices(xs[valid], ys[valid], lineValues, sortValues, geometryType)
+    spatialReference = SpatialReferenceUtilities.GetSpatialReference(inputSpatialReference)
+    geometry = arcpy.Polygon if geometryType == "POLYGON" else arcpy.Polyline
+    fieldNames, attributeIndexes = _createOutputFeatures(outputFeatures, geometryType, lineFields, inputSpatialReference)
+    skipped = 0
+    with arcpy.da.InsertCursor(outputFeatures, ['SHAPE@'] + fieldNames) as outRows:
+        for lineValue, parts in features:
+            if not parts:
+                skipped += 1
+                continue
+            shape = geometry(arcpy.Array([arcpy.Array([arcpy.Point(x, y) for x, y in part]) for part in parts]),
+                             spatialReference)
+            outRows.insertRow([shape] + [lineValue] * len(fieldNames))
+    if skipped:
+        arcpy.AddWarning("{0} features have too few vertices and are skipped.".format(skipped))
+    return outputFeatures
+
 ''' TOOL METHODS '''
 
 def tableTo2PointLine(inputTable,
@@ -324,7 +752,8 @@ def tableTo2PointLine(inputTable,
                         inputEndYField,
                         outputLineFeatures,
                         inputLineType,
-                        inputSpatialReference):
+                        inputSpatialReference,
+                        chunkSize=None):
     '''
     Creates line features from a start point coordinate and an endpoint coordinate.
 
@@ -338,6 +767,7 @@ def tableTo2PointLine(inputTable,
     outputLineFeatures - Output Line
     inputLineType - Line Type (from Value List)
     inputSpatialReference - Spatial Reference, default is GCS_WGS_1984
+    chunkSize - rows per block for very large tables, resumable, see _convertInChunks
 
     returns line feature class
 
@@ -362,84 +792,44 @@ def tableTo2PointLine(inputTable,
     * NORMAL_SECTION:
 
     '''
+    scratch = Utilities.ScratchWorkspace()
     try:
         # get/set environment
         env.overwriteOutput = True
         
-        deleteme = []
-        scratch = '%scratchGDB%'
-        
-        joinFieldName = "JoinID"
-        startXFieldName = "startX"
-        startYFieldName = "startY"
-        endXFieldName = "endX"
-        endYFieldName = "endY"
-        
-        if env.scratchWorkspace:
-            scratch = env.scratchWorkspace
         
         inputSpatialReference = _checkSpatialRef(inputSpatialReference)
-            
-        copyRows = os.path.join(scratch, "copyRows")
-        arcpy.CopyRows_management(inputTable, copyRows)
-        originalTableFieldNames = _tableFieldNames(inputTable, joinExcludeFields)
-        addUniqueRowID(copyRows, joinFieldName)
-        
-        #Convert Start Point
-        arcpy.AddMessage("Formatting start point...")
-        startCCN = os.path.join(scratch, "startCCN")
-        arcpy.ConvertCoordinateNotation_management(copyRows,
-                                                   startCCN,
-                                                   inputStartXField,
-                                                   inputStartYField,
-                                                   inputStartCoordinateFormat,
-                                                   "DD_NUMERIC",
-                                                   joinFieldName)
-        arcpy.AddField_management(startCCN, startXFieldName, "DOUBLE")
-        arcpy.CalculateField_management(startCCN, startXFieldName, "!DDLon!","PYTHON_9.3")
-        arcpy.AddField_management(startCCN, startYFieldName, "DOUBLE")
-        arcpy.CalculateField_management(startCCN, startYFieldName, "!DDLat!","PYTHON_9.3")
-        arcpy.JoinField_management(copyRows, joinFieldName,
-                                   startCCN, joinFieldName,
-                                   [startXFieldName, startYFieldName]) 
-
-        #Convert End Point
-        arcpy.AddMessage("Formatting end point...")
-        endCCN = os.path.join(scratch, "endCCN")
-        arcpy.ConvertCoordinateNotation_management(copyRows,
-                                                   endCCN,
-                                                   inputEndXField,
-                                                   inputEndYField,
-                                                   inputEndCoordinateFormat,
-                                                   "DD_NUMERIC",
-                                                   joinFieldName)
-        arcpy.AddField_management(endCCN, endXFieldName, "DOUBLE")
-        arcpy.CalculateField_management(endCCN, endXFieldName, "!DDLon!","PYTHON_9.3")
-        arcpy.AddField_management(endCCN, endYFieldName, "DOUBLE")
-        arcpy.CalculateField_management(endCCN, endYFieldName, "!DDLat!","PYTHON_9.3")
-        arcpy.JoinField_management(copyRows, joinFieldName,
-                                   endCCN, joinFieldName,
-                                   [endXFieldName, endYFieldName])
-
-        #XY TO LINE
-        arcpy.AddMessage("Connecting start point to end point as {0}...".format(inputLineType))
-        arcpy.XYToLine_management(copyRows,
-                                  outputLineFeatures,
-                                  startXFieldName, startYFieldName,
-                                  endXFieldName, endYFieldName,
-                                  inputLineType,
-                                  joinFieldName,
-                                  inputSpatialReference)
-        
-        #Join original table fields to output
-        arcpy.AddMessage("Joining fields from input table to output line features...")
-        arcpy.JoinField_management(outputLineFeatures, joinFieldName,
-                                   copyRows, joinFieldName,
-                                   originalTableFieldNames)
-        
-        arcpy.DeleteField_management(outputLineFeatures, [joinFieldName,
-                                                startXFieldName, startYFieldName,
-                                                endXFieldName, endYFieldName])
+        spatialReference = SpatialReferenceUtilities.GetSpatialReference(inputSpatialReference)
+
+        def buildRows(sourceOIDs, columns, attributes, attributeIndexes):
+            #Convert Start Point
+            arcpy.AddMessage("Formatting start point...")
+            startXs, startYs, startValid = _parseCoordinates(columns[0], columns[1],
+                                                             inputStartCoordinateFormat, inputSpatialReference)
+
+            #Convert End Point
+            arcpy.AddMessage("Formatting end point...")
+            endXs, endYs, endValid = _parseCoordinates(columns[2], columns[3],
+                                                       inputEndCoordinateFormat, inputSpatialReference)
+
+            # solve every line together, as Table To Line Of Bearing does, then write them with their attributes
+            arcpy.AddMessage("Connecting start point to end point as {0}...".format(inputLineType))
+            valid = startValid & endValid
+            startLons, startLats = _geographicPoints(startXs[valid], startYs[valid], spatialReference)
+            endLons, endLats = _geographicPoints(endXs[valid], endYs[valid], spatialReference)
+            lines = Geodesic.LineVerticesBetween(startLons, startLats, endLons, endLats, inputLineType)
+            for sourceOID, vertices in zip(numpy.asarray(sourceOIDs)[valid].tolist(), lines):
+                values = attributes[sourceOID]
+                yield [_geometryFromVertices(vertices, spatialReference)] + [values[index] for index in attributeIndexes]
+
+        # read coordinates and attributes once, keyed by source ObjectID, and insert the lines in one pass
+        _convertInChunks(inputTable,
+                         [inputStartXField, inputStartYField, inputEndXField, inputEndYField],
+                         _attributeFields(inputTable), outputLineFeatures, "POLYLINE",
+                         inputSpatialReference, [], buildRows, chunkSize,
+                         settings={"startFormat":inputStartCoordinateFormat,
+                                   "endFormat":inputEndCoordinateFormat,
+                                   "lineType":inputLineType})
 
         return outputLineFeatures
 
@@ -467,13 +857,10 @@ def tableTo2PointLine(inputTable,
         print(msgs)
 
     finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
+        # cleanup intermediate datasets
+        if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
+        scratch.cleanup()
+        if debug == True: arcpy.AddMessage("Done")
 
 def tableToEllipse(inputTable,
                    inputCoordinateFormat,
@@ -485,7 +872,8 @@ def tableToEllipse(inputTable,
                    outputEllipseFeatures,
                    inputAzimuthField,
                    inputAzimuthUnits,
-                   inputSpatialReference):
+                   inputSpatialReference,
+                   chunkSize=None):
 
     '''
     inputTable - input table, each row will be a separate line feature in output
@@ -499,6 +887,7 @@ def tableToEllipse(inputTable,
     inputAzimuthField - field in inputTable of rotation of ellipse from north
     inputAzimuthUnits - angular units of azimuth (rotation)
     inputSpatialReference - spatial reference of input coordinates
+    chunkSize - rows per block for very large tables, resumable, see _convertInChunks
     
     returns polygon ellipse feature class
     
@@ -530,60 +919,40 @@ def tableToEllipse(inputTable,
     * FEET
     * US_SURVEY_FEET
     '''
+    scratch = Utilities.ScratchWorkspace()
     try:
         env.overwriteOutput = True
 
-        deleteme = []
-        scratch = '%scratchGDB%'
-        joinFieldName = 'JoinID'
-        deleteJoinFieldName = 'JoinID_1'
-        
-        if env.scratchWorkspace:
-            scratch = env.scratchWorkspace
-            
         inputSpatialReference = _checkSpatialRef(inputSpatialReference)
-            
-        copyRows = os.path.join(scratch, "copyRows")
-        arcpy.CopyRows_management(inputTable, copyRows)
-        deleteme.append(copyRows)
-        originalTableFieldNames = _tableFieldNames(inputTable, joinExcludeFields)
-        addUniqueRowID(copyRows, joinFieldName)
-        
-        copyCCN = os.path.join(scratch, "copyCCN")
-        arcpy.ConvertCoordinateNotation_management(copyRows,
-                                                   copyCCN,
-                                                   inputXField,
-                                                   inputYField,
-                                                   inputCoordinateFormat,
-                                                   "DD_NUMERIC",
-                                                   joinFieldName,
-                                                   inputSpatialReference)
-        deleteme.append(copyCCN)
-    
-        #Table To Ellipse
-        copyEllipse = os.path.join(scratch, "copyEllipse")
-        arcpy.TableToEllipse_management(copyCCN,
-                                        copyEllipse,
-                                        "DDLon", "DDLat",
-                                        inputMajorAxisField,
-                                        inputMinorAxisField,
-                                        inputDistanceUnits,
-                                        inputAzimuthField,
-                                        inputAzimuthUnits,
-                                        joinFieldName,
-                                        inputSpatialReference)
-        deleteme.append(copyEllipse)
-        
-        #Polyline To Polygon
-        polylineToPolygon(copyEllipse, joinFieldName, outputEllipseFeatures)
-        
-        #Join original table fields to output
-        arcpy.AddMessage("Joining fields from input table to output line features...")
-        arcpy.JoinField_management(outputEllipseFeatures, joinFieldName,
-                                   copyRows, joinFieldName) 
-        
-        arcpy.DeleteField_management(outputEllipseFeatures,
-                                     [joinFieldName, deleteJoinFieldName])
+
+        spatialReference = SpatialReferenceUtilities.GetSpatialReference(inputSpatialReference)
+
+        def buildRows(sourceOIDs, columns, attributes, attributeIndexes):
+            xs, ys, valid = _parseCoordinates(columns[0], columns[1], inputCoordinateFormat, inputSpatialReference)
+            majorAxes = SpatialReferenceUtilities.ConvertLength(_numberColumn(columns[2]), inputDistanceUnits)
+            minorAxes = SpatialReferenceUtilities.ConvertLength(_numberColumn(columns[3]), inputDistanceUnits)
+            azimuths = _numberColumn(columns[4]) if inputAzimuthField else numpy.zeros(len(sourceOIDs))
+            valid &= ~(numpy.isnan(majorAxes) | numpy.isnan(minorAxes) | numpy.isnan(azimuths))
+
+            # build every ellipse together, then write the polygons with their attributes
+            arcpy.AddMessage("Writing ellipse polygons with the input table fields...")
+            lons, lats = _geographicPoints(xs[valid], ys[valid], spatialReference)
+            ellipses = Geodesic.EllipseVertices(lons, lats, majorAxes[valid], minorAxes[valid], azimuths[valid],
+                                                inputAzimuthUnits if inputAzimuthField else "DEGREES")
+            for sourceOID, lon, lat, vertices in zip(numpy.asarray(sourceOIDs)[valid].tolist(),
+                                                     lons.tolist(), lats.tolist(), ellipses):
+                values = attributes[sourceOID]
+                yield ([_geometryFromVertices(vertices, spatialReference, "POLYGON"), lon, lat]
+                       + [values[index] for index in attributeIndexes])
+
+        # read coordinates, axes and attributes once, keyed by source ObjectID, and insert the polygons in one pass
+        _convertInChunks(inputTable,
+                         [inputXField, inputYField, inputMajorAxisField, inputMinorAxisField, inputAzimuthField],
+                         _attributeFields(inputTable), outputEllipseFeatures, "POLYGON",
+                         inputSpatialReference, [["DDLon", "DOUBLE"], ["DDLat", "DOUBLE"]], buildRows, chunkSize,
+                         settings={"format":inputCoordinateFormat,
+                                   "distanceUnits":inputDistanceUnits,
+                                   "azimuthUnits":inputAzimuthUnits if inputAzimuthField else None})
 
         return outputEllipseFeatures
     
@@ -611,13 +980,9 @@ def tableToEllipse(inputTable,
         print(msgs)
         
     finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug : arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if debug : arcpy.AddMessage("Removing Temp Dataset: " + str(i))
-                # Comment this next line to skip delete:
-                arcpy.Delete_management(i)
+        # cleanup intermediate datasets
+        if debug : arcpy.AddMessage("Removing intermediate datasets...")
+        scratch.cleanup()
         if debug : arcpy.AddMessage("Done")
 
 def tableToLineOfBearing(inputTable,
@@ -630,7 +995,8 @@ def tableToLineOfBearing(inputTable,
                          inputDistanceField,
                          outputLineFeatures,
                          inputLineType,
-                         inputSpatialReference):
+                         inputSpatialReference,
+                         chunkSize=None):
     '''
     Tool method for converting a table of starting points, bearings, and distances
     to line features.
@@ -646,6 +1012,7 @@ def tableToLineOfBearing(inputTable,
     outputLineFeatures - polyline feature class to create
     inputLineType - 
     inputSpatialReference - spatial reference of input coordinates
+    chunkSize - rows per block for very large tables, resumable, see _convertInChunks
     
     returns polyline feature class
     
@@ -684,53 +1051,42 @@ def tableToLineOfBearing(inputTable,
     * NORMAL_SECTION:
     
     '''
+    scratch = Utilities.ScratchWorkspace()
     try:
         env.overwriteOutput = True
 
-        deleteme = []
-        joinFieldName = "JoinID"
-        scratch = '%scratchGDB%'
-        if env.scratchWorkspace:
-            scratch = env.scratchWorkspace
-            
         inputSpatialReference = _checkSpatialRef(inputSpatialReference)
-            
-        copyRows = os.path.join(scratch, "copyRows")
-        arcpy.CopyRows_management(inputTable, copyRows)
-        originalTableFieldNames = _tableFieldNames(inputTable, joinExcludeFields)
-        addUniqueRowID(copyRows, joinFieldName)
-        
-        arcpy.AddMessage("Formatting start point...")
-        copyCCN = os.path.join(scratch, "copyCCN")
-        arcpy.ConvertCoordinateNotation_management(copyRows,
-                                                   copyCCN,
-                                                   inputXField,
-                                                   inputYField,
-                                                   inputCoordinateFormat,
-                                                   "DD_NUMERIC",
-                                                   joinFieldName,
-                                                   inputSpatialReference)
-        
-        arcpy.AddMessage("Creating lines as {0}...".format(inputLineType))
-        arcpy.BearingDistanceToLine_management(copyCCN,
-                                               outputLineFeatures,
-                                               "DDLon",
-                                               "DDLat",
-                                               inputDistanceField,
-                                               inputDistanceUnits,
-                                               inputBearingField,
-                                               inputBearingUnits,
-                                               inputLineType,
-                                               joinFieldName,
-                                               inputSpatialReference)
-        
-        #Join original table fields to output
-        arcpy.AddMessage("Joining fields from input table to output line features...")
-        arcpy.JoinField_management(outputLineFeatures, joinFieldName,
-                                   copyRows, joinFieldName,
-                                   originalTableFieldNames)
-        arcpy.DeleteField_management(outputLineFeatures,
-                                     [joinFieldName])
+
+        spatialReference = SpatialReferenceUtilities.GetSpatialReference(inputSpatialReference)
+
+        def buildRows(sourceOIDs, columns, attributes, attributeIndexes):
+            arcpy.AddMessage("Formatting start point...")
+            xs, ys, valid = _parseCoordinates(columns[0], columns[1], inputCoordinateFormat, inputSpatialReference)
+            bearings = _numberColumn(columns[2])
+            distances = SpatialReferenceUtilities.ConvertLength(_numberColumn(columns[3]), inputDistanceUnits)
+            valid &= ~(numpy.isnan(bearings) | numpy.isnan(distances))
+
+            # solve every line together, then write them with their attributes
+            arcpy.AddMessage("Creating lines as {0}...".format(inputLineType))
+            lons, lats = _geographicPoints(xs[valid], ys[valid], spatialReference)
+            lines = Geodesic.LineVertices(lons, lats, bearings[valid], distances[valid],
+                                          inputLineType, inputBearingUnits)
+            for sourceOID, lon, lat, vertices in zip(numpy.asarray(sourceOIDs)[valid].tolist(),
+                                                     lons.tolist(), lats.tolist(), lines):
+                values = attributes[sourceOID]
+                yield ([_geometryFromVertices(vertices, spatialReference), lon, lat]
+                       + [values[index] for index in attributeIndexes])
+
+        # read coordinates, bearings, distances and attributes once, keyed by source ObjectID,
+        # and insert the lines in one pass
+        _convertInChunks(inputTable,
+                         [inputXField, inputYField, inputBearingField, inputDistanceField],
+                         _attributeFields(inputTable), outputLineFeatures, "POLYLINE",
+                         inputSpatialReference, [["DDLon", "DOUBLE"], ["DDLat", "DOUBLE"]], buildRows, chunkSize,
+                         settings={"format":inputCoordinateFormat,
+                                   "bearingUnits":inputBearingUnits,
+                                   "distanceUnits":inputDistanceUnits,
+                                   "lineType":inputLineType})
         
         return outputLineFeatures
     
@@ -758,20 +1114,18 @@ def tableToLineOfBearing(inputTable,
         print(msgs)
         
     finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
+        # cleanup intermediate datasets
+        if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
+        scratch.cleanup()
+        if debug == True: arcpy.AddMessage("Done")
 
 def tableToPoint(inputTable,
                  inputCoordinateFormat,
                  inputXField,
                  inputYField,
                  outputPointFeatures,
-                 inputSpatialReference):
+                 inputSpatialReference,
+                 chunkSize=None):
     '''
     Converts table of coordinate formats to point features.
     
@@ -781,6 +1135,8 @@ def tableToPoint(inputTable,
     inputYField - field in inputTable for vertex y-coordinate, or None
     outputPointFeatures - output point features to create
     inputSpatialReference - spatial reference of input coordinates
+    chunkSize - rows per block for very large tables, resumable, see _convertInChunks;
+                converts in process instead of with ConvertCoordinateNotation
     
     returns point feature class
     
@@ -799,25 +1155,38 @@ def tableToPoint(inputTable,
     * MGRS: Military Grid Reference System. Follows the UTM coordinates and divides the world into 6-degree longitude and 20 latitude bands, but MGRS then further subdivides the grid zones into smaller 100,000-meter grids. These 100,000-meter grids are then divided into 10,000-meter, 1,000-meter, 100-meter, 10-meter, and 1-meter grids.
 
     '''
+    scratch = Utilities.ScratchWorkspace()
     try:
         env.overwriteOutput = True
        
-        deleteme = []
-        scratch = '%scratchGDB%'
-        if env.scratchWorkspace:
-            scratch = env.scratchWorkspace
             
         inputSpatialReference = _checkSpatialRef(inputSpatialReference)
-        if (inputCoordinateFormat == 'DD_2') and (inputSpatialReference is not None) and \
+        if chunkSize:
+            spatialReference = SpatialReferenceUtilities.GetSpatialReference(inputSpatialReference)
+
+            def buildRows(sourceOIDs, columns, attributes, attributeIndexes):
+                xs, ys, valid = _parseCoordinates(columns[0], columns[1], inputCoordinateFormat, inputSpatialReference)
+                lons, lats = _geographicPoints(xs, ys, spatialReference)
+                for sourceOID, x, y, lon, lat, isValid in zip(sourceOIDs, xs.tolist(), ys.tolist(),
+                                                              lons.tolist(), lats.tolist(), valid.tolist()):
+                    if isValid:
+                        values = attributes[sourceOID]
+                        yield [(x, y), lat, lon] + [values[index] for index in attributeIndexes]
+
+            # DDLat and DDLon as ConvertCoordinateNotation adds them for DD_NUMERIC
+            _convertInChunks(inputTable, [inputXField, inputYField], _attributeFields(inputTable),
+                             outputPointFeatures, "POINT", inputSpatialReference,
+                             [["DDLat", "DOUBLE"], ["DDLon", "DOUBLE"]], buildRows, chunkSize,
+                             settings={"format":inputCoordinateFormat})
+
+        elif (inputCoordinateFormat == 'DD_2') and (inputSpatialReference is not None) and \
             (inputSpatialReference != arcpy.SpatialReference(4326)): 
             # default is GCS_WGS_1984 - if the SR is different, create feature class first using XYTableToPoint/MakeXYEventLayer
 
             # make scratch name for temp FC
-            scratch_name = arcpy.CreateScratchName("temp",
-                                                   data_type="Featureclass",
-                                                   workspace=scratch)
+            scratch_name = scratch.name("temp")
 
-            layername = os.path.basename(scratch_name) + "-layer"
+            layername = scratch.layer("tempLayer")
             tempLayerOut = arcpy.management.MakeXYEventLayer(inputTable,
                                                         inputXField,
                                                         inputYField,
@@ -835,8 +1204,6 @@ def tableToPoint(inputTable,
                                                    "#",
                                                    "#",
                                                    inputSpatialReference)
-            # Delete scratch dataset
-            arcpy.Delete_management(scratch_out)
 
         else:
             #Using Geographic coordinates
@@ -875,13 +1242,10 @@ def tableToPoint(inputTable,
         print(msgs)
         
     finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
+        # cleanup intermediate datasets
+        if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
+        scratch.cleanup()
+        if debug == True: arcpy.AddMessage("Done")
 
 def tableToPolygon(inputTable,
                    inputCoordinateFormat,
@@ -920,39 +1284,16 @@ def tableToPolygon(inputTable,
     * MGRS: Military Grid Reference System. Follows the UTM coordinates and divides the world into 6-degree longitude and 20 latitude bands, but MGRS then further subdivides the grid zones into smaller 100,000-meter grids. These 100,000-meter grids are then divided into 10,000-meter, 1,000-meter, 100-meter, 10-meter, and 1-meter grids.
         
     '''
+    scratch = Utilities.ScratchWorkspace()
     try:
         env.overwriteOutput = True
 
-        deleteme = []
-        scratch = '%scratchGDB%'
-        if env.scratchWorkspace:
-            scratch = env.scratchWorkspace
             
         inputSpatialReference = _checkSpatialRef(inputSpatialReference)
-        
-        copyRows = os.path.join(scratch, "copyRows")
-        arcpy.CopyRows_management(inputTable, copyRows)
-        copyCCN = os.path.join(scratch, "copyCCN")
-        
-        arcpy.ConvertCoordinateNotation_management(copyRows,
-                                                   copyCCN,
-                                                   inputXField,
-                                                   inputYField,
-                                                   inputCoordinateFormat,
-                                                   "DD_NUMERIC",
-                                                   "#",
-                                                   inputSpatialReference)
-        
-        copyPointsToLine = os.path.join(scratch, "copyPointsToLine")
 
-        arcpy.PointsToLine_management(copyCCN,
-                                      copyPointsToLine,
-                                      inputLineField,
-                                      inputSortField,
-                                      "CLOSE")
-        
-        polylineToPolygon(copyPointsToLine, inputLineField, outputPolygonFeatures)
-        
+        _verticesToFeatures(inputTable, inputCoordinateFormat, inputXField, inputYField, outputPolygonFeatures,
+                            inputLineField, inputSortField, inputSpatialReference, "POLYGON")
+
         return outputPolygonFeatures
     
     except arcpy.ExecuteError:
@@ -979,13 +1320,10 @@ def tableToPolygon(inputTable,
         print(msgs)
         
     finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
+        # cleanup intermediate datasets
+        if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
+        scratch.cleanup()
+        if debug == True: arcpy.AddMessage("Done")
               
 def tableToPolyline(inputTable,
                     inputCoordinateFormat,
@@ -1003,7 +1341,8 @@ def tableToPolyline(inputTable,
     inputXField - field in inputTable for vertex x-coordinate, or full coordinate
     inputYField - field in inputTable for vertex y-coordinate, or None
     outputPolylineFeatures - polyline feature class to create
-    inputLineField - field in inputTable to identify separate polylines
+    inputLineField - field in inputTable to identify separate polylines,
+    each polyline is a single part
     inputSortField - field in inputTable to sort vertices
     inputSpatialReference - spatial reference of input coordinates
     
@@ -1024,37 +1363,15 @@ def tableToPolyline(inputTable,
     * MGRS: Military Grid Reference System. Follows the UTM coordinates and divides the world into 6-degree longitude and 20 latitude bands, but MGRS then further subdivides the grid zones into smaller 100,000-meter grids. These 100,000-meter grids are then divided into 10,000-meter, 1,000-meter, 100-meter, 10-meter, and 1-meter grids.
      
     '''
+    scratch = Utilities.ScratchWorkspace()
     try:
         env.overwriteOutput = True
 
-        deleteme = []
-        joinFieldName = "JoinID"
-        scratch = '%scratchGDB%'
-        if env.scratchWorkspace:
-            scratch = env.scratchWorkspace
-            
         inputSpatialReference = _checkSpatialRef(inputSpatialReference)
-        
-        copyRows = os.path.join(scratch, "copyRows")
-        arcpy.CopyRows_management(inputTable, copyRows)
-        addUniqueRowID(copyRows, joinFieldName)
-        
-        copyCCN = os.path.join(scratch, "copyCCN")
-        arcpy.ConvertCoordinateNotation_management(copyRows,
-                                                   copyCCN,
-                                                   inputXField,
-                                                   inputYField,
-                                                   inputCoordinateFormat,
-                                                   "DD_NUMERIC",
-                                                   joinFieldName,
-                                                   inputSpatialReference)
-        
-        arcpy.PointsToLine_management(copyCCN,
-                                      outputPolylineFeatures,
-                                      inputLineField,
-                                      inputSortField,
-                                      "NO_CLOSE")
-        
+
+        _verticesToFeatures(inputTable, inputCoordinateFormat, inputXField, inputYField, outputPolylineFeatures,
+                            inputLineField, inputSortField, inputSpatialReference, "POLYLINE")
+
         return outputPolylineFeatures
     
     except arcpy.ExecuteError:
@@ -1081,10 +1398,7 @@ def tableToPolyline(inputTable,
         print(msgs)
         
     finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
\ No newline at end of file
+        # cleanup intermediate datasets
+        if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
+        scratch.cleanup()
+        if debug == True: arcpy.AddMessage("Done")
\ No newline at end of file
@@ -30,6 +30,7 @@ You may obtain a copy of the License at
  2014 - ? - initial creation
  6/9/2016 - mf - refactor ID count and internal methods
  11/18/2016 - mf - refactor as stand-alone GP script tool
+ single pass conversion of WGS84 input with CoordinateNotation
 ========================================================================
 '''
 
@@ -37,9 +38,28 @@ import sys, os, traceback
 import arcpy
 from arcpy import env
 
-deleteIntermediateDatasets = []
+try:
+    from . import Utilities
+    from . import CoordinateNotation
+    from . import SpatialReferenceUtilities
+except ImportError:
+    import Utilities
+    import CoordinateNotation
+    import SpatialReferenceUtilities
+
 DEBUG = False
 
+# [format, [field names], field type], in output field order
+outputNotations = [["DD_NUMERIC", ["DDLatNumeric", "DDLonNumeric"], "DOUBLE"],
+                   ["DD", ["DDLat", "DDLon"], "TEXT"],
+                   ["DDM", ["DDMLat", "DDMLon"], "TEXT"],
+                   ["DMS", ["DMSLat", "DMSLon"], "TEXT"],
+                   ["UTM_BANDS", ["UTM_BANDS"], "TEXT"],
+                   ["MGRS", ["MGRS"], "TEXT"],
+                   ["USNG", ["USNG"], "TEXT"],
+                   ["GARS", ["GARS"], "TEXT"],
+                   ["GEOREF", ["GEOREF"], "TEXT"]]
+
 def addUniqueID(dataset, fieldName):
     ''' adding unique ID field '''
     try:
@@ -97,12 +117,89 @@ def addNotation(notationType, fieldsToAdd, joinFieldName, outputTable, scratchTa
         #print msgs #UPDATE
         print(msgs)
 
+def _isWGS84(inputSpatialReference):
+    ''' True if the input coordinates are WGS84 geographic, which CoordinateNotation handles '''
+    if inputSpatialReference is None or str(inputSpatialReference) in ["", "#"]:
+        return True
+    try:
+        return SpatialReferenceUtilities.GetSpatialReference(inputSpatialReference).factoryCode == 4326
+    except Exception:
+        return False
+
+def convertCoordinatesSinglePass(inputTable,
+                                 inputCoordinateFormat,
+                                 inputXField,
+                                 inputYField,
+                                 outputTable):
+    '''
+    Converts WGS84 coordinates to all outputNotations in process: the
+    input coordinates are read and parsed once, and the output table is
+    written with the input attributes and every notation field in one
+    insert pass. Repeated strings and points come from the
+    CoordinateNotation cache, its hits and misses are reported.
+
+    returns table
+    '''
+    outputTable = str(outputTable)
+    readFields = [inputXField] if not inputYField or inputYField == inputXField else [inputXField, inputYField]
+    copyFields = [f.name for f in arcpy.ListFields(inputTable)
+                  if f.editable and f.type not in ["OID", "Geometry"]]
+
+    CoordinateNotation.ResetCacheStatistics()
+
+    # read the input once
+    arcpy.AddMessage("Reading {0} ...".format(inputTable))
+    with arcpy.da.SearchCursor(inputTable, readFields + copyFields) as cursor:
+        rows = [row for row in cursor]
+    readCount = len(readFields)
+    xValues = [row[0] for row in rows]
+    yValues = [row[1] for row in rows] if readCount == 2 else None
+
+    lons, lats, errors = CoordinateNotation.ParseNotation(xValues, yValues, inputCoordinateFormat)
+    if errors.any():
+        arcpy.AddWarning("{0} of {1} rows could not be read as {2} and have empty notation fields."
+                         .format(int(errors.sum()), len(rows), inputCoordinateFormat))
+
+    notationColumns = []
+    for notationFormat, fieldNames, fieldType in outputNotations:
+        arcpy.AddMessage("Converting {0} with fields {1} ...".format(notationFormat, "; ".join(fieldNames)))
+        notationColumns.extend(CoordinateNotation.FormatNotation(lons, lats, notationFormat))
+
+    # output has the input schema plus the notation fields
+    arcpy.CreateTable_management(os.path.dirname(outputTable),
+                                 os.path.basename(outputTable),
+                                 inputTable)
+    outputFieldNames = Utilities.GetFieldNames(outputTable)
+    keepIndexes = [index for index, name in enumerate(copyFields) if name in outputFieldNames]
+    outputFields = [copyFields[index] for index in keepIndexes]
+    for notationFormat, fieldNames, fieldType in outputNotations:
+        for fieldName in fieldNames:
+            if fieldName in outputFieldNames:
+                arcpy.DeleteField_management(outputTable, fieldName)
+                if fieldName in outputFields:
+                    del keepIndexes[outputFields.index(fieldName)]
+                    outputFields.remove(fieldName)
+            arcpy.AddField_management(outputTable, fieldName, fieldType)
+    notationFieldNames = [fieldName for notation in outputNotations for fieldName in notation[1]]
+
+    arcpy.AddMessage("Writing {0} rows to {1} ...".format(len(rows), outputTable))
+    with arcpy.da.InsertCursor(outputTable, outputFields + notationFieldNames) as cursor:
+        for row, notations in zip(rows, zip(*notationColumns)):
+            attributes = row[readCount:]
+            cursor.insertRow([attributes[index] for index in keepIndexes] + list(notations))
+
+    statistics = CoordinateNotation.GetCacheStatistics()
+    arcpy.AddMessage("Coordinate cache: {0} hits, {1} misses, {2} cached notations"
+                     .format(statistics["hits"], statistics["misses"], statistics["size"]))
+    return outputTable
+
 def convertCoordinates(inputTable,
                        inputCoordinateFormat,
                        inputXField,
                        inputYField,
                        outputTable,
-                       inputSpatialReference):
+                       inputSpatialReference,
+                       singlePass=True):
     '''
     inputTable - input table, each row will be a separate line feature in output
     inputCoordinateFormat - coordinate notation format of input vertices
@@ -110,6 +207,8 @@ def convertCoordinates(inputTable,
     inputYField - field in inputTable for vertex y-coordinate, or None
     outputTable -  output table containing converted coordinate notations
     inputSpatialReference - spatial reference of input coordinates
+    singlePass - convert WGS84 input in one pass with CoordinateNotation
+                 instead of one ConvertCoordinateNotation call per notation
     
     returns table
     
@@ -128,17 +227,18 @@ def convertCoordinates(inputTable,
     •	MGRS: Military Grid Reference System. Follows the UTM coordinates and divides the world into 6-degree longitude and 20 latitude bands, but MGRS then further subdivides the grid zones into smaller 100,000-meter grids. These 100,000-meter grids are then divided into 10,000-meter, 1,000-meter, 100-meter, 10-meter, and 1-meter grids.
     •	SHAPE: Only available when a point feature layer is selected as input. The coordinates of each point are used to define the output format
     '''
+    scratch = Utilities.ScratchWorkspace()
     try:
         currentOverwriteOutput = env.overwriteOutput
         env.overwriteOutput = True
+
+        if singlePass and _isWGS84(inputSpatialReference):
+            return convertCoordinatesSinglePass(inputTable, inputCoordinateFormat,
+                                                inputXField, inputYField, outputTable)
+
         joinFieldName = "JoinID"
     
-        scratchWS = env.scratchGDB
-        if not scratchWS:
-            scratchWS = r'in_memory'
-    
-        scratchTable = os.path.join(scratchWS,"cc_temp")
-        deleteIntermediateDatasets.append(scratchTable)
+        scratchTable = scratch.name("cc_temp")
     
         if DEBUG:
             arcpy.AddMessage("Copying %s to %s" % (inputTable, outputTable))
@@ -162,13 +262,7 @@ def convertCoordinates(inputTable,
                                joinFieldName, outputTable, scratchTable, 
                                inputXField, inputYField, inputCoordinateFormat, inputSpatialReference):
                 raise Exception("Failed to convert notation {0}.".format(notationFormat))
-    
-        # cleanup
-        arcpy.AddMessage("Removing scratch datasets...")
-        for ds in deleteIntermediateDatasets:
-            if arcpy.Exists(ds):
-                arcpy.Delete_management(ds)
-            
+
         return outputTable
         
     
@@ -199,7 +293,11 @@ def convertCoordinates(inputTable,
         print(pymsg + "\n")
         #print msgs #UPDATE
         print(msgs)
-        
+
+    finally:
+        # cleanup
+        arcpy.AddMessage("Removing scratch datasets...")
+        scratch.cleanup()
 
 # MAIN =============================================
 if __name__ == "__main__":
@@ -0,0 +1,778 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2018 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ CoordinateNotation.py
+ --------------------------------------------------
+ requirements: Python 2.7 or Python 3.4, NumPy
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ In-process parsing and formatting of coordinate notation columns for
+ the Conversion tools, in place of ConvertCoordinateNotation. Each
+ distinct string in a column is classified and split with a regular
+ expression once, then the components of the whole column are converted
+ to longitude and latitude with NumPy. Formatting goes the other way,
+ from longitude and latitude arrays to one string column per output
+ field. Does not need arcpy.
+
+ Grid references resolve to the lower left corner of the referenced
+ square, GARS cells resolve to their center. As with
+ ConvertCoordinateNotation, UTM output is truncated to the meter while
+ MGRS, USNG and GEOREF output is rounded.
+
+ Parsed strings and formatted points are kept in a bounded LRU cache
+ shared by all calls in a session, since feeds repeat the same grid
+ references across many rows.
+ ==================================================
+'''
+
+# IMPORTS ==========================================
+import re
+import collections
+import numpy
+
+# LOCALS ===========================================
+notationFormats = ["DD_1", "DD_2",
+                   "DDM_1", "DDM_2",
+                   "DMS_1", "DMS_2",
+                   "GARS", "GEOREF",
+                   "UTM_ZONES", "UTM_BANDS",
+                   "USNG", "MGRS"]
+outputFormats = ["DD_NUMERIC", "DD", "DDM", "DMS", "UTM_BANDS",
+                 "MGRS", "USNG", "GARS", "GEOREF"]
+angleNumberCounts = {"DD":1, "DDM":2, "DMS":3} # numbers in one angle of each format
+
+# WGS84, as in RefGrid
+utmScaleFactor = 0.9996
+earthRadius = 6378137.0
+eccentricitySquared = 0.006694379990
+
+latitudeBands = "CDEFGHJKLMNPQRSTUVWX" # 8 degree MGRS bands from 80S, X is 12 degrees
+mgrsColumnLetters = ["ABCDEFGH", "JKLMNPQR", "STUVWXYZ"] # 100 km columns by (zone - 1) % 3
+mgrsRowLetters = ["ABCDEFGHJKLMNPQRSTUV", "FGHJKLMNPQRSTUVABCDE"] # 100 km rows for odd, even zones
+gridLetters = "ABCDEFGHJKLMNPQRSTUVWXYZ" # A-Z without I and O, used by GARS and GEOREF
+
+maxCachedNotations = 100000
+_notationCache = collections.OrderedDict() # {(direction, format, string or point, spatial reference):result}
+cacheStatistics = {"hits":0, "misses":0} # rows served from the cache or converted
+
+_angleToken = re.compile(r"[NSEWnsew]|[-+]?\d+(?:\.\d*)?|[-+]?\.\d+")
+_utmPattern = re.compile(r"^\s*(\d{1,2})\s*([A-Za-z])\s*(\d+(?:\.\d*)?)\s*(?:mE)?[\s,]*(\d+(?:\.\d*)?)\s*(?:mN)?\s*$")
+_mgrsPattern = re.compile(r"^\s*(\d{1,2})\s*([C-HJ-NP-Xc-hj-np-x])\s*([A-HJ-NP-Za-hj-np-z])([A-HJ-NP-Va-hj-np-v])\s*(\d*)\s*(\d*)\s*$")
+_garsPattern = re.compile(r"^\s*(\d{3})([A-HJ-NP-Qa-hj-np-q])([A-HJ-NP-Za-hj-np-z])([1-4]?)([1-9]?)\s*$")
+_georefPattern = re.compile(r"^\s*([A-HJ-NP-Za-hj-np-z])([A-HJ-Ma-hj-m])([A-HJ-NP-Qa-hj-np-q])([A-HJ-NP-Qa-hj-np-q])\s*(\d*)\s*(\d*)\s*$")
+
+# FUNCTIONS ========================================
+def _uniqueStrings(values):
+    '''
+    Returns [uniqueStrings, inverse] for a column of values, None and
+    numbers included, so each distinct string is parsed once
+    '''
+    strings = numpy.array(["" if value is None else str(value).strip() for value in values], dtype=object)
+    if len(strings) == 0:
+        return [[], numpy.zeros(0, dtype=numpy.int64)]
+    unique, inverse = numpy.unique(strings.astype(str), return_inverse=True)
+    return [unique.tolist(), inverse]
+
+def _parseUnique(values, parser, width):
+    '''
+    Applies parser to each distinct string of values
+
+    parser - function of one string returning a list of width numbers, or None
+    width - number of components parser returns
+
+    returns [components, errors]; components is (N, width) float64, NaN on errors
+    '''
+    unique, inverse = _uniqueStrings(values)
+    parsed = numpy.full((len(unique), width), numpy.nan)
+    for index, text in enumerate(unique):
+        try:
+            result = parser(text)
+        except (ValueError, IndexError):
+            result = None
+        if result is not None:
+            parsed[index] = result
+    components = parsed[inverse] if len(unique) else numpy.zeros((0, width))
+    return [components, numpy.isnan(components).any(axis=1)]
+
+def _angleFromTokens(numbers, hemisphere):
+    ''' degrees from [degrees, minutes, seconds] tokens and an optional hemisphere letter '''
+    values = [float(number) for number in numbers]
+    if any(abs(value) >= 60.0 for value in values[1:]):
+        return None
+    angle = abs(values[0])
+    for index, value in enumerate(values[1:]):
+        angle += abs(value) / (60.0 ** (index + 1))
+    if numbers[0].startswith("-") or (hemisphere is not None and hemisphere in "SW"):
+        angle = -angle
+    return angle
+
+def _angleGroups(text, numberCount):
+    '''
+    Splits an angle string into groups of numberCount numbers, each with
+    its hemisphere letter (or None). Letters may lead or trail the numbers.
+
+    returns list of [numbers, hemisphere]
+    '''
+    tokens = _angleToken.findall(text)
+    numbers = [token for token in tokens if token[0] not in "NSEWnsew"]
+    letters = [token.upper() for token in tokens if token[0] in "NSEWnsew"]
+    if not numbers or len(numbers) % numberCount != 0:
+        return None
+    groupCount = len(numbers) // numberCount
+    if letters and len(letters) != groupCount:
+        return None
+    groups = []
+    for index in range(groupCount):
+        hemisphere = letters[index] if letters else None
+        groups.append([numbers[index * numberCount:(index + 1) * numberCount], hemisphere])
+    return groups
+
+def _parseAngle(text, numberCount, axis):
+    '''
+    Parses one DD, DDM or DMS angle string
+    axis - "lon" or "lat", to check the hemisphere letter
+    '''
+    groups = _angleGroups(text, numberCount)
+    if groups is None or len(groups) != 1:
+        return None
+    numbers, hemisphere = groups[0]
+    if hemisphere is not None and (hemisphere in "NS") != (axis == "lat"):
+        return None
+    angle = _angleFromTokens(numbers, hemisphere)
+    return None if angle is None else [angle]
+
+def _parseAnglePair(text, numberCount):
+    '''
+    Parses a DD_1, DDM_1 or DMS_1 string holding both angles. Hemisphere
+    letters decide which is latitude; without them latitude comes first.
+
+    returns [lon, lat] or None
+    '''
+    groups = _angleGroups(text, numberCount)
+    if groups is None or len(groups) != 2:
+        return None
+    first, second = groups
+    if first[1] is not None and first[1] in "EW":
+        if second[1] not in ["N", "S"]:
+            return None
+        first, second = second, first
+    elif first[1] is not None and second[1] not in ["E", "W"]:
+        return None
+    lat = _angleFromTokens(first[0], first[1])
+    lon = _angleFromTokens(second[0], second[1])
+    if lat is None or lon is None:
+        return None
+    return [lon, lat]
+
+def _checkRange(lons, lats, errors):
+    ''' marks rows outside of the valid longitude and latitude range as errors '''
+    with numpy.errstate(invalid="ignore"):
+        errors = errors | ~(numpy.abs(lats) <= 90.0) | ~(numpy.abs(lons) <= 180.0)
+    lons = numpy.where(errors, numpy.nan, lons)
+    lats = numpy.where(errors, numpy.nan, lats)
+    return [lons, lats, errors]
+
+def UTMToLatLon(zones, eastings, northings, southern):
+    '''
+    Vectorized inverse of the UTM series used by RefGrid._UTMtoLL
+
+    zones - UTM zone numbers
+    eastings, northings - UTM coordinates, northings with the false northing
+    southern - True where the coordinates are in the southern hemisphere
+
+    returns [lons, lats] in decimal degrees
+    '''
+    e2 = eccentricitySquared
+    e2ps = e2 / (1 - e2)
+    e1 = (1 - numpy.sqrt(1 - e2)) / (1 + numpy.sqrt(1 - e2))
+    x = numpy.asarray(eastings, dtype=numpy.float64) - 500000.0
+    y = numpy.where(southern, numpy.asarray(northings, dtype=numpy.float64) - 10000000.0,
+                    numpy.asarray(northings, dtype=numpy.float64))
+    lonOrigin = (numpy.asarray(zones, dtype=numpy.float64) - 1) * 6 - 180 + 3
+
+    mu = (y / utmScaleFactor) / (earthRadius * (1 - e2 / 4 - 3 * e2 * e2 / 64 - 5 * e2 * e2 * e2 / 256))
+    phi1 = (mu + (3 * e1 / 2 - 27 * e1 ** 3 / 32) * numpy.sin(2 * mu)
+            + (21 * e1 * e1 / 16 - 55 * e1 ** 4 / 32) * numpy.sin(4 * mu)
+            + (151 * e1 ** 3 / 96) * numpy.sin(6 * mu))
+    sinPhi1 = numpy.sin(phi1)
+    n1 = earthRadius / numpy.sqrt(1 - e2 * sinPhi1 * sinPhi1)
+    t1 = numpy.tan(phi1) ** 2
+    c1 = e2ps * numpy.cos(phi1) ** 2
+    r1 = earthRadius * (1 - e2) / numpy.power(1 - e2 * sinPhi1 * sinPhi1, 1.5)
+    d = x / (n1 * utmScaleFactor)
+
+    lat = phi1 - (n1 * numpy.tan(phi1) / r1) * (d * d / 2
+          - (5 + 3 * t1 + 10 * c1 - 4 * c1 * c1 - 9 * e2ps) * d ** 4 / 24
+          + (61 + 90 * t1 + 298 * c1 + 45 * t1 * t1 - 252 * e2ps - 3 * c1 * c1) * d ** 6 / 720)
+    lon = (d - (1 + 2 * t1 + c1) * d ** 3 / 6
+           + (5 - 2 * c1 + 28 * t1 - 3 * c1 * c1 + 8 * e2ps + 24 * t1 * t1) * d ** 5 / 120) / numpy.cos(phi1)
+    return [lonOrigin + numpy.degrees(lon), numpy.degrees(lat)]
+
+def LatLonToUTM(lats, lons, zones):
+    '''
+    Vectorized UTM series used by RefGrid._LLtoUTM
+
+    lats, lons - decimal degrees
+    zones - UTM zone numbers to project into
+
+    returns [eastings, northings]; northings are negative in the southern hemisphere
+    '''
+    e2 = eccentricitySquared
+    e2ps = e2 / (1 - e2)
+    lats = numpy.asarray(lats, dtype=numpy.float64)
+    lons = numpy.asarray(lons, dtype=numpy.float64)
+    lonTemp = (lons + 180) - numpy.floor((lons + 180) / 360) * 360 - 180
+    latRad = numpy.radians(lats)
+    lonRad = numpy.radians(lonTemp)
+    lonOriginRad = numpy.radians((numpy.asarray(zones, dtype=numpy.float64) - 1) * 6 - 180 + 3)
+
+    sinLat = numpy.sin(latRad)
+    n = earthRadius / numpy.sqrt(1 - e2 * sinLat * sinLat)
+    t = numpy.tan(latRad) ** 2
+    c = e2ps * numpy.cos(latRad) ** 2
+    # longitude difference wrapped so zones either side of 180 work
+    a = numpy.cos(latRad) * (((lonRad - lonOriginRad) + numpy.pi) % (2 * numpy.pi) - numpy.pi)
+    m = earthRadius * ((1 - e2 / 4 - 3 * e2 * e2 / 64 - 5 * e2 ** 3 / 256) * latRad
+                       - (3 * e2 / 8 + 3 * e2 * e2 / 32 + 45 * e2 ** 3 / 1024) * numpy.sin(2 * latRad)
+                       + (15 * e2 * e2 / 256 + 45 * e2 ** 3 / 1024) * numpy.sin(4 * latRad)
+                       - (35 * e2 ** 3 / 3072) * numpy.sin(6 * latRad))
+    eastings = (utmScaleFactor * n * (a + (1 - t + c) * a ** 3 / 6
+                + (5 - 18 * t + t * t + 72 * c - 58 * e2ps) * a ** 5 / 120) + 500000.0)
+    northings = (utmScaleFactor * (m + n * numpy.tan(latRad) * (a * a / 2
+                 + (5 - t + 9 * c + 4 * c * c) * a ** 4 / 24
+                 + (61 - 58 * t + t * t + 600 * c - 330 * e2ps) * a ** 6 / 720)))
+    return [eastings, northings]
+
+def _parseUTM(text):
+    ''' [zone, band or hemisphere code, easting, northing] of a UTM string '''
+    match = _utmPattern.match(text)
+    if not match:
+        return None
+    zone = int(match.group(1))
+    if zone < 1 or zone > 60:
+        return None
+    return [zone, ord(match.group(2).upper()), float(match.group(3)), float(match.group(4))]
+
+def _parseMGRS(text):
+    ''' [zone, band index, column index, row index, easting, northing] of an MGRS or USNG string '''
+    match = _mgrsPattern.match(text)
+    if not match:
+        return None
+    zone = int(match.group(1))
+    if zone < 1 or zone > 60:
+        return None
+    digits = match.group(5) + match.group(6)
+    if len(digits) % 2 != 0 or len(digits) > 10:
+        return None
+    if match.group(6) and len(match.group(5)) != len(match.group(6)):
+        return None
+    half = len(digits) // 2
+    scale = 10.0 ** (5 - half)
+    easting = float(digits[:half]) * scale if half else 0.0
+    northing = float(digits[half:]) * scale if half else 0.0
+    columnIndex = mgrsColumnLetters[(zone - 1) % 3].find(match.group(3).upper())
+    rowIndex = mgrsRowLetters[(zone + 1) % 2].find(match.group(4).upper())
+    if columnIndex < 0 or rowIndex < 0:
+        return None
+    return [zone, latitudeBands.index(match.group(2).upper()), columnIndex, rowIndex, easting, northing]
+
+def _bandMinimumNorthings(zones, bands):
+    ''' northing (with false northing in the south) of the bottom of each latitude band at the zone's central meridian '''
+    minLats = -80.0 + 8.0 * numpy.asarray(bands, dtype=numpy.float64)
+    centralMeridians = (numpy.asarray(zones, dtype=numpy.float64) - 1) * 6 - 180 + 3
+    northings = LatLonToUTM(minLats, centralMeridians, zones)[1]
+    return numpy.where(minLats < 0, northings + 10000000.0, northings)
+
+def _mgrsToLatLon(components):
+    ''' [lons, lats] from the (N, 6) components returned by _parseMGRS '''
+    zones, bands, columns, rows = [components[:, i] for i in range(4)]
+    eastings = (columns + 1) * 100000.0 + components[:, 4]
+    northings = rows * 100000.0 + components[:, 5]
+    # rows repeat every 2000 km; move up to the cycle that contains the latitude band
+    bandNorthings = _bandMinimumNorthings(zones, bands) - 100000.0
+    cycles = numpy.ceil((bandNorthings - northings) / 2000000.0)
+    northings = northings + numpy.maximum(cycles, 0) * 2000000.0
+    return UTMToLatLon(zones, eastings, northings, bands < latitudeBands.index("N"))
+
+def _parseGARS(text):
+    ''' [lon, lat] of the center of a GARS cell '''
+    match = _garsPattern.match(text)
+    if not match:
+        return None
+    lonBand = int(match.group(1))
+    latBand = gridLetters.index(match.group(2).upper()) * 24 + gridLetters.index(match.group(3).upper())
+    if lonBand < 1 or lonBand > 720 or latBand > 359:
+        return None
+    lon = -180.0 + (lonBand - 1) * 0.5
+    lat = -90.0 + latBand * 0.5
+    size = 0.5
+    if match.group(4):
+        quadrant = int(match.group(4)) - 1
+        size = 0.25
+        lon += (quadrant % 2) * size
+        lat += (1 - quadrant // 2) * size
+        if match.group(5):
+            # keypad numbered from the upper left
+            key = int(match.group(5)) - 1
+            size = 0.25 / 3.0
+            lon += (key % 3) * size
+            lat += (2 - key // 3) * size
+    elif match.group(5):
+        return None
+    return [lon + size / 2.0, lat + size / 2.0]
+
+def _parseGEOREF(text):
+    ''' [lon, lat] of the lower left corner of a GEOREF square '''
+    match = _georefPattern.match(text)
+    if not match:
+        return None
+    digits = match.group(5) + match.group(6)
+    if len(digits) % 2 != 0 or len(digits) == 2 or len(digits) > 10:
+        return None
+    lonDegrees = gridLetters.index(match.group(3).upper())
+    latDegrees = gridLetters.index(match.group(4).upper())
+    if lonDegrees > 14 or latDegrees > 14:
+        return None
+    lon = -180.0 + gridLetters.index(match.group(1).upper()) * 15 + lonDegrees
+    lat = -90.0 + gridLetters.index(match.group(2).upper()) * 15 + latDegrees
+    if digits:
+        half = len(digits) // 2
+        scale = 10.0 ** (2 - half)
+        lonMinutes = float(digits[:half]) * scale
+        latMinutes = float(digits[half:]) * scale
+        if lonMinutes >= 60.0 or latMinutes >= 60.0:
+            return None
+        lon += lonMinutes / 60.0
+        lat += latMinutes / 60.0
+    return [lon, lat]
+
+def _numericColumn(values):
+    ''' float64 array of values, or None if any value is not a number '''
+    try:
+        return numpy.array([numpy.nan if value is None else float(value) for value in values], dtype=numpy.float64)
+    except (TypeError, ValueError):
+        return None
+
+def _parseNotation(xValues, yValues, notationFormat):
+    ''' ParseNotation without the cache '''
+    notationFormat = str(notationFormat).upper()
+    if notationFormat not in notationFormats:
+        raise ValueError("Unsupported coordinate notation: {0}".format(notationFormat))
+    xValues = list(xValues)
+    count = len(xValues)
+
+    if notationFormat in ["DD_2", "DDM_2", "DMS_2"]:
+        if yValues is None:
+            raise ValueError("Coordinate notation {0} needs both X and Y values.".format(notationFormat))
+        yValues = list(yValues)
+        if len(yValues) != count:
+            raise ValueError("X and Y values must have the same length.")
+        numberCount = angleNumberCounts[notationFormat[:-2]]
+        lons = _numericColumn(xValues) if numberCount == 1 else None
+        lats = _numericColumn(yValues) if numberCount == 1 else None
+        if lons is None:
+            lons = _parseUnique(xValues, lambda text: _parseAngle(text, numberCount, "lon"), 1)[0][:, 0]
+        if lats is None:
+            lats = _parseUnique(yValues, lambda text: _parseAngle(text, numberCount, "lat"), 1)[0][:, 0]
+        return _checkRange(lons, lats, numpy.isnan(lons) | numpy.isnan(lats))
+
+    if notationFormat in ["DD_1", "DDM_1", "DMS_1"]:
+        numberCount = angleNumberCounts[notationFormat[:-2]]
+        components, errors = _parseUnique(xValues, lambda text: _parseAnglePair(text, numberCount), 2)
+        return _checkRange(components[:, 0], components[:, 1], errors)
+
+    if notationFormat in ["MGRS", "USNG"]:
+        components, errors = _parseUnique(xValues, _parseMGRS, 6)
+        lons = numpy.full(count, numpy.nan)
+        lats = numpy.full(count, numpy.nan)
+        valid = ~errors
+        if valid.any():
+            lons[valid], lats[valid] = _mgrsToLatLon(components[valid])
+        return _checkRange(lons, lats, errors)
+
+    if notationFormat in ["UTM_ZONES", "UTM_BANDS"]:
+        components, errors = _parseUnique(xValues, _parseUTM, 4)
+        codes = numpy.nan_to_num(components[:, 1]).astype(numpy.int64)
+        if notationFormat == "UTM_ZONES":
+            southern = codes == ord("S")
+            errors = errors | ~numpy.isin(codes, [ord("N"), ord("S")])
+        else:
+            bandCodes = numpy.array([ord(letter) for letter in latitudeBands])
+            southern = codes < ord("N")
+            errors = errors | ~numpy.isin(codes, bandCodes)
+        lons = numpy.full(count, numpy.nan)
+        lats = numpy.full(count, numpy.nan)
+        valid = ~errors
+        if valid.any():
+            lons[valid], lats[valid] = UTMToLatLon(components[valid, 0], components[valid, 2],
+                                                   components[valid, 3], southern[valid])
+        return _checkRange(lons, lats, errors)
+
+    parser = _parseGARS if notationFormat == "GARS" else _parseGEOREF
+    components, errors = _parseUnique(xValues, parser, 2)
+    return _checkRange(components[:, 0], components[:, 1], errors)
+
+def UTMZones(lons, lats):
+    '''
+    UTM zone numbers and latitude band indexes (into latitudeBands) of
+    longitude and latitude arrays, with the Norway and Svalbard exceptions
+
+    returns [zones, bands]; both are -1 outside of 80S to 84N
+    '''
+    lons = numpy.asarray(lons, dtype=numpy.float64)
+    lats = numpy.asarray(lats, dtype=numpy.float64)
+    lons = numpy.where(lons >= 180.0, lons - 360.0, lons)
+    zones = numpy.clip(numpy.floor(numpy.nan_to_num(lons + 180.0) / 6.0), 0, 59).astype(numpy.int64) + 1
+    zones = numpy.where((lats >= 56.0) & (lats < 64.0) & (lons >= 3.0) & (lons < 12.0), 32, zones)
+    svalbard = (lats >= 72.0) & (lats < 84.0) & (lons >= 0.0) & (lons < 42.0)
+    svalbardZones = numpy.select([lons < 9.0, lons < 21.0, lons < 33.0], [31, 33, 35], 37)
+    zones = numpy.where(svalbard, svalbardZones, zones)
+    with numpy.errstate(invalid="ignore"):
+        bands = numpy.clip(numpy.floor((lats + 80.0) / 8.0), 0, 19)
+        outside = ~((lats >= -80.0) & (lats <= 84.0)) | numpy.isnan(lons)
+    bands = numpy.where(outside, -1, bands).astype(numpy.int64)
+    zones = numpy.where(outside, -1, zones)
+    return [zones, bands]
+
+def _hemisphereStrings(values, positive, negative, formatter):
+    ''' formats the absolute values and appends the hemisphere letter, None for NaN '''
+    return [None if value != value else formatter(abs(value)) + (negative if value < 0 else positive)
+            for value in values.tolist()]
+
+def _formatDDM(value):
+    tenThousandths = int(round(value * 600000.0))
+    degrees, minutes = divmod(tenThousandths, 600000)
+    return "{0} {1:07.4f}".format(degrees, minutes / 10000.0)
+
+def _formatDMS(value):
+    hundredths = int(round(value * 360000.0))
+    degrees, rest = divmod(hundredths, 360000)
+    minutes, seconds = divmod(rest, 6000)
+    return "{0} {1:02d} {2:05.2f}".format(degrees, minutes, seconds / 100.0)
+
+def _utmComponents(lons, lats):
+    ''' [zones, bands, eastings, northings] with the false northing in the south, zones -1 if not in UTM '''
+    zones, bands = UTMZones(lons, lats)
+    eastings, northings = LatLonToUTM(numpy.nan_to_num(lats), numpy.nan_to_num(lons), numpy.maximum(zones, 1))
+    northings = numpy.where(northings < 0, northings + 10000000.0, northings)
+    return [zones, bands, eastings, northings]
+
+def _letters(alphabet, indexes):
+    ''' string array of alphabet[index] for an integer array '''
+    return numpy.array(list(alphabet))[numpy.asarray(indexes, dtype=numpy.int64)]
+
+def _digits(values, width):
+    ''' zero padded string array of non-negative integers, empty for width 0 '''
+    if width == 0:
+        return numpy.full(len(values), "", dtype="<U1")
+    return numpy.char.zfill(numpy.asarray(values, dtype=numpy.int64).astype(str), width)
+
+def _joinStrings(parts, invalid):
+    ''' concatenates string arrays into a list of strings, None where invalid '''
+    strings = parts[0]
+    for part in parts[1:]:
+        strings = numpy.char.add(strings, part)
+    strings = strings.astype(object)
+    strings[invalid] = None
+    return strings.tolist()
+
+def _checkPrecision(precision, maximum):
+    precision = int(precision)
+    if precision < 0 or precision > maximum:
+        raise ValueError("Precision must be from 0 to {0}.".format(maximum))
+    return precision
+
+def FormatUTM(lons, lats):
+    '''
+    UTM_BANDS strings of longitude and latitude arrays, truncated to the meter
+
+    returns list of strings, None for NaN and outside of 80S to 84N
+    '''
+    zones, bands, eastings, northings = _utmComponents(lons, lats)
+    invalid = zones < 0
+    bands = numpy.maximum(bands, 0)
+    return _joinStrings([numpy.maximum(zones, 1).astype(str), _letters(latitudeBands, bands), " ",
+                         numpy.floor(eastings).astype(numpy.int64).astype(str), " ",
+                         numpy.floor(northings).astype(numpy.int64).astype(str)], invalid)
+
+def FormatMGRS(lons, lats, precision=5, separator=""):
+    '''
+    MGRS strings of longitude and latitude arrays. Uses the UTM series and
+    100 km square letters of RefGrid._LLtoUTM and _findGridLetters for
+    whole arrays. Coordinates are rounded to the meter, then truncated to
+    precision.
+
+    precision - digits each for easting and northing, 0 (100 km) to 5 (1 m)
+    separator - between the grid zone, square and digits, " " for USNG
+
+    returns list of strings, None for NaN and outside of 80S to 84N
+    '''
+    precision = _checkPrecision(precision, 5)
+    zones, bands, eastings, northings = _utmComponents(lons, lats)
+    invalid = zones < 0
+    zones = numpy.maximum(zones, 1)
+    eastings = numpy.round(eastings).astype(numpy.int64)
+    northings = numpy.round(northings).astype(numpy.int64)
+
+    # one lookup table row per column set and row set
+    columnLetters = numpy.array([list(letters) for letters in mgrsColumnLetters])
+    rowLetters = numpy.array([list(letters) for letters in mgrsRowLetters])
+    columns = columnLetters[(zones - 1) % 3, (eastings // 100000 - 1) % 8]
+    rows = rowLetters[(zones + 1) % 2, (northings // 100000) % 20]
+
+    scale = 10 ** (5 - precision)
+    parts = [zones.astype(str), _letters(latitudeBands, numpy.maximum(bands, 0)), separator,
+             columns, rows]
+    if precision:
+        parts += [separator, _digits((eastings % 100000) // scale, precision),
+                  separator, _digits((northings % 100000) // scale, precision)]
+    return _joinStrings(parts, invalid)
+
+def FormatUSNG(lons, lats, precision=5):
+    ''' USNG strings of longitude and latitude arrays, see FormatMGRS '''
+    return FormatMGRS(lons, lats, precision, " ")
+
+def FormatGARS(lons, lats, precision=3):
+    '''
+    GARS strings of the cells containing longitude and latitude arrays
+
+    precision - 1 for 30 minute cells, 2 for 15 minute quadrants, 3 for 5 minute keypad cells
+
+    returns list of strings, None for NaN
+    '''
+    precision = _checkPrecision(precision, 3)
+    lons = numpy.asarray(lons, dtype=numpy.float64)
+    lats = numpy.asarray(lats, dtype=numpy.float64)
+    invalid = numpy.isnan(lons) | numpy.isnan(lats)
+    lonMinutes = numpy.clip(numpy.floor(numpy.nan_to_num(lons + 180.0) * 60.0), 0, 21599).astype(numpy.int64)
+    latMinutes = numpy.clip(numpy.floor(numpy.nan_to_num(lats + 90.0) * 60.0), 0, 10799).astype(numpy.int64)
+    latBands = latMinutes // 30
+    parts = [_digits(lonMinutes // 30 + 1, 3), _letters(gridLetters, latBands // 24),
+             _letters(gridLetters, latBands % 24)]
+    if precision > 1:
+        quadrants = 1 + (lonMinutes % 30) // 15 + 2 * (1 - (latMinutes % 30) // 15)
+        parts.append(quadrants.astype(str))
+    if precision > 2:
+        keys = 1 + (lonMinutes % 15) // 5 + 3 * (2 - (latMinutes % 15) // 5)
+        parts.append(keys.astype(str))
+    return _joinStrings(parts, invalid)
+
+def FormatGEOREF(lons, lats, precision=5):
+    '''
+    GEOREF strings of longitude and latitude arrays
+
+    precision - minute digits each for longitude and latitude: 0 for the
+                1 degree square, 2 for minutes, 3 to 5 for 0.1 to 0.001
+                minutes, rounded half up like ConvertCoordinateNotation
+
+    returns list of strings, None for NaN
+    '''
+    precision = _checkPrecision(precision, 5)
+    if precision == 1:
+        raise ValueError("GEOREF precision 1 is not defined.")
+    lons = numpy.asarray(lons, dtype=numpy.float64)
+    lats = numpy.asarray(lats, dtype=numpy.float64)
+    invalid = numpy.isnan(lons) | numpy.isnan(lats)
+    # minute units at this precision; without minutes the square is truncated
+    perMinute = 10 ** max(precision - 2, 0)
+    perDegree = 60 * perMinute
+    offset = 0.500001 if precision else 0.0 # half up, with the slack ConvertCoordinateNotation gives exact halves
+    lonUnits = numpy.floor(numpy.nan_to_num(lons + 180.0) * perDegree + offset).astype(numpy.int64) % (360 * perDegree)
+    latUnits = numpy.minimum(numpy.floor(numpy.nan_to_num(lats + 90.0) * perDegree + offset).astype(numpy.int64),
+                             180 * perDegree - 1)
+    lonDegrees, lonMinutes = numpy.divmod(lonUnits, perDegree)
+    latDegrees, latMinutes = numpy.divmod(latUnits, perDegree)
+    parts = [_letters(gridLetters, lonDegrees // 15), _letters(gridLetters, latDegrees // 15),
+             _letters(gridLetters, lonDegrees % 15), _letters(gridLetters, latDegrees % 15)]
+    if precision:
+        parts += [_digits(lonMinutes, precision), _digits(latMinutes, precision)]
+    return _joinStrings(parts, invalid)
+
+def _formatNotation(lons, lats, notationFormat):
+    ''' FormatNotation without the cache '''
+    notationFormat = str(notationFormat).upper()
+    if notationFormat not in outputFormats:
+        raise ValueError("Unsupported output coordinate notation: {0}".format(notationFormat))
+    lons = numpy.asarray(lons, dtype=numpy.float64)
+    lats = numpy.asarray(lats, dtype=numpy.float64)
+
+    if notationFormat == "DD_NUMERIC":
+        return [[None if value != value else value for value in lats.tolist()],
+                [None if value != value else value for value in lons.tolist()]]
+    if notationFormat in ["DD", "DDM", "DMS"]:
+        formatter = {"DD":"{0:.8f}".format, "DDM":_formatDDM, "DMS":_formatDMS}[notationFormat]
+        return [_hemisphereStrings(lats, "N", "S", formatter),
+                _hemisphereStrings(lons, "E", "W", formatter)]
+    formatter = {"UTM_BANDS":FormatUTM, "MGRS":FormatMGRS, "USNG":FormatUSNG,
+                 "GARS":FormatGARS, "GEOREF":FormatGEOREF}[notationFormat]
+    return [formatter(lons, lats)]
+
+def _spatialReferenceKey(spatialReference):
+    ''' cache key part for a WKID, spatial reference string or arcpy spatial reference '''
+    if spatialReference is None:
+        return 4326
+    factoryCode = getattr(spatialReference, "factoryCode", None)
+    if factoryCode:
+        return int(factoryCode)
+    exportToString = getattr(spatialReference, "exportToString", None)
+    if exportToString is not None:
+        return exportToString()
+    try:
+        return int(spatialReference)
+    except (TypeError, ValueError):
+        return str(spatialReference)
+
+def _cacheGet(key):
+    ''' cached result for key, or None '''
+    result = _notationCache.get(key)
+    if result is not None:
+        # most recently used moves to the end
+        del _notationCache[key]
+        _notationCache[key] = result
+    return result
+
+def _cachePut(key, result):
+    _notationCache[key] = result
+    while len(_notationCache) > maxCachedNotations:
+        _notationCache.popitem(last=False)
+
+def _countRows(rowCount, missCount):
+    cacheStatistics["hits"] += rowCount - missCount
+    cacheStatistics["misses"] += missCount
+
+def GetCacheStatistics():
+    ''' Returns {"hits", "misses", "size"}: rows served from the cache and converted since the last reset '''
+    return {"hits":cacheStatistics["hits"], "misses":cacheStatistics["misses"], "size":len(_notationCache)}
+
+def ResetCacheStatistics():
+    ''' Sets the hit and miss counts to zero, at the start of each tool run '''
+    cacheStatistics["hits"] = 0
+    cacheStatistics["misses"] = 0
+
+def clearCache():
+    ''' Clears the cached notations and their statistics '''
+    _notationCache.clear()
+    ResetCacheStatistics()
+
+def ParseNotation(xValues, yValues=None, notationFormat="DD_2", spatialReference=None, useCache=True):
+    '''
+    Parses columns of coordinate notation to WGS84 longitude and latitude
+
+    xValues - coordinate strings, or longitudes for the _2 formats
+    yValues - latitudes for the _2 formats, otherwise not used
+    notationFormat - one of notationFormats
+    spatialReference - coordinate system of the notation (WKID, string or
+                       arcpy spatial reference), part of the cache key;
+                       None for WGS84
+    useCache - look up and keep each distinct string in the LRU cache.
+               DD_2 is not cached, parsing numbers costs less than the lookup.
+
+    returns [lons, lats, errors] as float64, float64 and bool arrays;
+    lons and lats are NaN where errors is True
+    '''
+    notationFormat = str(notationFormat).upper()
+    if not useCache or notationFormat == "DD_2" or notationFormat not in notationFormats:
+        return _parseNotation(xValues, yValues, notationFormat)
+    xValues = list(xValues)
+    twoFields = notationFormat in ["DDM_2", "DMS_2"]
+    if twoFields and (yValues is None or len(list(yValues)) != len(xValues)):
+        return _parseNotation(xValues, yValues, notationFormat)
+    if not xValues:
+        return _parseNotation(xValues, yValues, notationFormat)
+
+    keys = numpy.array(["" if value is None else str(value).strip() for value in xValues])
+    if twoFields:
+        yValues = list(yValues)
+        yKeys = numpy.array(["" if value is None else str(value).strip() for value in yValues])
+        keys = numpy.char.add(numpy.char.add(keys, "\t"), yKeys)
+    unique, firstRows, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+
+    referenceKey = _spatialReferenceKey(spatialReference)
+    results = numpy.full((len(unique), 2), numpy.nan)
+    missing = []
+    for index, key in enumerate(unique.tolist()):
+        cached = _cacheGet(("parse", notationFormat, key, referenceKey))
+        if cached is None:
+            missing.append(index)
+        else:
+            results[index] = cached
+    if missing:
+        missRows = firstRows[missing]
+        lons, lats, errors = _parseNotation([xValues[row] for row in missRows],
+                                            [yValues[row] for row in missRows] if twoFields else None,
+                                            notationFormat)
+        results[missing, 0] = lons
+        results[missing, 1] = lats
+        for index, lon, lat in zip(missing, lons.tolist(), lats.tolist()):
+            _cachePut(("parse", notationFormat, unique[index], referenceKey), (lon, lat))
+    _countRows(len(xValues), len(missing))
+
+    lons = results[inverse.ravel(), 0]
+    lats = results[inverse.ravel(), 1]
+    return [lons, lats, numpy.isnan(lons) | numpy.isnan(lats)]
+
+def FormatNotation(lons, lats, notationFormat, spatialReference=None, useCache=True):
+    '''
+    Formats longitude and latitude arrays as one of outputFormats, grid
+    references at the precision ConvertCoordinateNotation writes
+
+    lons, lats - WGS84 decimal degrees; NaN gives None
+    notationFormat - one of outputFormats
+    spatialReference - part of the cache key, see ParseNotation
+    useCache - look up and keep each distinct point in the LRU cache
+
+    returns a list of columns: [latitudes, longitudes] for DD_NUMERIC,
+    DD, DDM and DMS, otherwise [strings]. Points outside of UTM give None
+    for UTM_BANDS, MGRS and USNG.
+    '''
+    notationFormat = str(notationFormat).upper()
+    lons = numpy.asarray(lons, dtype=numpy.float64)
+    lats = numpy.asarray(lats, dtype=numpy.float64)
+    if not useCache or notationFormat not in outputFormats or len(lons) == 0:
+        return _formatNotation(lons, lats, notationFormat)
+
+    valid = ~(numpy.isnan(lons) | numpy.isnan(lats))
+    points = lons[valid] + 1j * lats[valid]
+    unique, inverse = numpy.unique(points, return_inverse=True)
+
+    referenceKey = _spatialReferenceKey(spatialReference)
+    columnCount = 2 if notationFormat in ["DD_NUMERIC", "DD", "DDM", "DMS"] else 1
+    results = [None] * len(unique)
+    missing = []
+    for index, point in enumerate(unique.tolist()):
+        cached = _cacheGet(("format", notationFormat, point, referenceKey))
+        if cached is None:
+            missing.append(index)
+        else:
+            results[index] = cached
+    if missing:
+        columns = _formatNotation(unique.real[missing], unique.imag[missing], notationFormat)
+        for index, result in zip(missing, zip(*columns)):
+            results[index] = result
+            _cachePut(("format", notationFormat, unique[index], referenceKey), result)
+    _countRows(len(lons), len(missing) + int((~valid).sum()))
+
+    columns = []
+    for column in range(columnCount):
+        values = numpy.full(len(lons), None, dtype=object)
+        if len(unique):
+            uniqueValues = numpy.empty(len(unique), dtype=object)
+            uniqueValues[:] = [result[column] for result in results]
+            values[valid] = uniqueValues[inverse.ravel()]
+        columns.append(values.tolist())
+    return columns
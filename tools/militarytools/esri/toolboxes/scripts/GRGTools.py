@@ -155,6 +155,26 @@ class CreateGRGFromArea(object):
         output_features.symbology = os.path.join(os.path.dirname(os.path.dirname(__file__)),
                                                  "layers", "GRG.lyr")
 
+        grid_per_feature = arcpy.Parameter(name='grid_per_feature',
+                                           displayName='Create One GRG Per Input Feature',
+                                           direction='Input',
+                                           datatype='GPBoolean',
+                                           parameterType='Optional',
+                                           enabled=True,
+                                           multiValue=False)
+        grid_per_feature.value = False
+
+        subdivision_depth = arcpy.Parameter(name='subdivision_depth',
+                                            displayName='Keypad Subdivision Depth',
+                                            direction='Input',
+                                            datatype='GPLong',
+                                            parameterType='Optional',
+                                            enabled=True,
+                                            multiValue=False)
+        subdivision_depth.filter.type = 'ValueList'
+        subdivision_depth.filter.list = [0, 1, 2]
+        subdivision_depth.value = 0
+
         return [input_area_features,
                 cell_width,
                 cell_height,
@@ -162,7 +182,9 @@ class CreateGRGFromArea(object):
                 label_start_position,
                 label_type,
                 label_seperator,
-                output_features]
+                output_features,
+                grid_per_feature,
+                subdivision_depth]
 
     def updateParameters(self, parameters):
         '''
@@ -184,6 +206,17 @@ class CreateGRGFromArea(object):
     def execute(self, parameters, messages):
         ''' execute for toolbox'''
         #arcpy.AddError("Not built yet.")
+        subdivisionDepth = (parameters[9].value or 0) if len(parameters) > 9 else 0
+        if len(parameters) > 8 and parameters[8].value:
+            return GRGUtilities.BatchGRGFromArea(parameters[0].value,
+                                                 parameters[1].value,
+                                                 parameters[2].value,
+                                                 parameters[3].value,
+                                                 parameters[4].value,
+                                                 parameters[5].value,
+                                                 parameters[6].value,
+                                                 parameters[7].value,
+                                                 subdivisionDepth=subdivisionDepth)
         out_grg = GRGUtilities.GRGFromArea(parameters[0].value,
                                            parameters[1].value,
                                            parameters[2].value,
@@ -191,7 +224,8 @@ class CreateGRGFromArea(object):
                                            parameters[4].value,
                                            parameters[5].value,
                                            parameters[6].value,
-                                           parameters[7].value)
+                                           parameters[7].value,
+                                           subdivisionDepth)
         return out_grg
 
 class CreateGRGFromPoint(object):
@@ -341,6 +375,26 @@ class CreateGRGFromPoint(object):
         output_features.symbology = os.path.join(os.path.dirname(os.path.dirname(__file__)),
                                                  "layers", "GRG.lyr")
 
+        grid_per_feature = arcpy.Parameter(name='grid_per_feature',
+                                           displayName='Create One GRG Per Input Feature',
+                                           direction='Input',
+                                           datatype='GPBoolean',
+                                           parameterType='Optional',
+                                           enabled=True,
+                                           multiValue=False)
+        grid_per_feature.value = False
+
+        subdivision_depth = arcpy.Parameter(name='subdivision_depth',
+                                            displayName='Keypad Subdivision Depth',
+                                            direction='Input',
+                                            datatype='GPLong',
+                                            parameterType='Optional',
+                                            enabled=True,
+                                            multiValue=False)
+        subdivision_depth.filter.type = 'ValueList'
+        subdivision_depth.filter.list = [0, 1, 2]
+        subdivision_depth.value = 0
+
         return [input_start_location,
                 horizontal_cells,
                 vertical_cells,
@@ -351,7 +405,9 @@ class CreateGRGFromPoint(object):
                 label_type,
                 label_seperator,
                 grid_angle,
-                output_features]
+                output_features,
+                grid_per_feature,
+                subdivision_depth]
 
     def updateParameters(self, parameters):
         '''
@@ -387,12 +443,21 @@ class CreateGRGFromPoint(object):
         labelSeparator    = parameters[8].value #Labeling Seperator
         gridRotationAngle = parameters[9].value #Grid Angle
         output            = parameters[10].valueAsText  #Output
+        gridPerFeature    = len(parameters) > 11 and parameters[11].value #One GRG Per Input Feature
+        subdivisionDepth  = (parameters[12].value or 0) if len(parameters) > 12 else 0 #Keypad Subdivision Depth
+
+        if gridPerFeature:
+            return GRGUtilities.BatchGRGFromPoint(pointTargets, \
+                rows, cols, \
+                cellWidth, cellHeight, cellUnits, \
+                labelStart, labelStyle, labelSeparator, gridRotationAngle, \
+                output, subdivisionDepth=subdivisionDepth)
 
         out_grg = GRGUtilities.GRGFromPoint(pointTargets, \
                 rows, cols, \
                 cellWidth, cellHeight, cellUnits, \
                 labelStart, labelStyle, labelSeparator, gridRotationAngle, \
-                output)
+                output, subdivisionDepth)
 
         return out_grg
 
@@ -526,14 +591,7 @@ class NumberFeatures(object):
         self.category = "Gridded Reference Graphic"
 
     def isLicensed(self):
-        """Check for Advanced license needed by Sort_management(Shape)"""
-        """Allow the tool to execute, only if the ArcGIS Advanced is available."""
-        try:
-            license_available = ["Available", "AlreadyInitialized"]
-            if not (arcpy.CheckProduct("ArcInfo") in license_available):
-                raise Exception
-        except Exception:
-            return False
+        """Points are ordered in process, so no Advanced license is needed for a spatial sort"""
         return True
 
     def getParameterInfo(self):
@@ -587,10 +645,32 @@ class NumberFeatures(object):
         output_features.symbology = os.path.join(os.path.dirname(os.path.dirname(__file__)),
                                                  "layers", layerFile)
 
+        numbering_order = arcpy.Parameter(name='numbering_order',
+                                          displayName='Numbering Order',
+                                          direction='Input',
+                                          datatype='GPString',
+                                          parameterType='Optional',
+                                          enabled=True,
+                                          multiValue=False)
+        numbering_order.filter.type = 'ValueList'
+        numbering_order.filter.list = ['Reading Order', 'Hilbert Curve', 'Z-Order Curve', 'Nearest Neighbor']
+        numbering_order.value = numbering_order.filter.list[0]
+
+        row_tolerance = arcpy.Parameter(name='row_tolerance',
+                                        displayName='Row Tolerance',
+                                        direction='Input',
+                                        datatype='GPDouble',
+                                        parameterType='Optional',
+                                        enabled=True,
+                                        multiValue=False)
+        row_tolerance.value = 0.0
+
         return [input_area_features,
                 input_number_features,
                 field_to_number,
-                output_features]
+                output_features,
+                numbering_order,
+                row_tolerance]
 
     def updateParameters(self, parameters):
         '''
@@ -598,6 +678,7 @@ class NumberFeatures(object):
         validation is performed.  This method is called whenever a parameter
         has been changed.
         '''
+        parameters[5].enabled = (parameters[4].value in [None, "Reading Order"])
         return
 
     def updateMessages(self, parameters):
@@ -605,6 +686,8 @@ class NumberFeatures(object):
         Modify the messages created by internal validation for each tool
         parameter.  This method is called after internal validation
         '''
+        if parameters[5].value is not None and parameters[5].value < 0:
+            parameters[5].setErrorMessage("Row tolerance must not be negative")
         return
 
     def execute(self, parameters, messages):
@@ -616,11 +699,15 @@ class NumberFeatures(object):
         pointFeatures  = parameters[1].value
         numberingField = parameters[2].value
         outputFeatureClass = parameters[3].value
+        numberingOrder = parameters[4].value if len(parameters) > 4 else None
+        rowTolerance   = parameters[5].value if len(parameters) > 5 else None
 
         output_fc = GRGUtilities.NumberFeatures(areaToNumber,
                         pointFeatures,
                         numberingField,
-                        outputFeatureClass)
+                        outputFeatureClass,
+                        numberingOrder,
+                        rowTolerance)
 
         return output_fc
 
@@ -33,12 +33,21 @@ import os
 import sys
 import math
 import traceback
+import numpy
 import arcpy
 from arcpy import env
-from . import Utilities
+
+try:
+    from . import Utilities
+    from . import SpatialReferenceUtilities
+except ImportError:
+    import Utilities
+    import SpatialReferenceUtilities
 
 DEBUG = True
 appEnvironment = None
+parentIDField = "ParentID" # OID of the input feature of each cell in batch GRGs
+levelField = "Level" # keypad level of each cell, 0 for grid cells
 
 def labelFeatures(layer, field):
     ''' set up labeling for layer '''
@@ -110,183 +119,252 @@ def ColIdxToXlName_PointTargetGRG(index):
             return chr(index + ord('A') - 1) + result
 
 
-'''
-Sample adapted/taken from: https://github.com/usgs/arcgis-sample/blob/master/scripts/RotateFeatureClass.py
-License: Public Domain: https://github.com/usgs/arcgis-sample/blob/master/LICENSE.txt
-'''
-def RotateFeatureClass(inputFC, outputFC,
-                       angle=0, pivot_point=None):
-    """Rotate Feature Class
-
-    inputFC     Input features
-    outputFC    Output feature class
-    angle       Angle to rotate, in degrees
-    pivot_point X,Y coordinates (as space-separated string)
-                Default is lower-left of inputFC
-
-    As the output feature class no longer has a "real" xy locations,
-    after rotation, it no coordinate system defined.
-    """
-
-
-    def RotateXY(x, y, xc=0, yc=0, angle=0, units="DEGREES"):
-        """Rotate an xy cooordinate about a specified origin
-        x,y      xy coordinates
-        xc,yc   center of rotation
-        angle   angle
-        units    "DEGREES" (default) or "RADIANS"
-        """
-        x = x - xc
-        y = y - yc
-        # make angle clockwise (like Rotate_management)
-        angle = angle * -1
-        if units == "DEGREES":
-            angle = math.radians(angle)
-        xr = (x * math.cos(angle)) - (y * math.sin(angle)) + xc
-        yr = (x * math.sin(angle)) + (y * math.cos(angle)) + yc
-        return xr, yr
-
-    # temp names for cleanup
-    env_file = None
-    lyrFC, lyrTmp = [None] * 2  # layers
-    tmpFC  = None # temp dataset
-
-    try:
-        # process parameters
-        try:
-            xcen, ycen = [float(xy) for xy in pivot_point.split()]
-            pivot_point = xcen, ycen
-        except:
-            # if pivot point was not specified, get it from
-            # the lower-left corner of the feature class
-            ext = arcpy.Describe(inputFC).extent
-            xcen, ycen  = ext.XMin, ext.YMin
-            pivot_point = xcen, ycen
-
-        angle = float(angle)
-
-        # set up environment
-        env_file = arcpy.CreateScratchName("xxenv",".xml","file",
-                                           os.environ["TEMP"])
-        arcpy.gp.SaveSettings(env_file)
-
-        WKS = env.workspace
-        if not WKS:
-            if os.path.dirname(outputFC):
-                WKS = os.path.dirname(outputFC)
-            else:
-                WKS = os.path.dirname(
-                    arcpy.Describe(inputFC).catalogPath)
-        env.workspace = env.scratchWorkspace = WKS
-
-        # Disable any GP environment clips
-        arcpy.ClearEnvironment("extent")
-
-        # get feature class properties
-        lyrFC = 'lyrFC'
-        arcpy.MakeFeatureLayer_management(inputFC, lyrFC)
-        dFC = arcpy.Describe(lyrFC)
-        shpField = dFC.shapeFieldName
-        shpType = dFC.shapeType
-
-        # create temp feature class
-        tmpFC = arcpy.CreateScratchName("xxfc", "", "featureclass")
-
-        # Create Feature Class using inputFC as template (so will have "Grid" field)
-        arcpy.CreateFeatureclass_management(os.path.dirname(tmpFC),
-                                            os.path.basename(tmpFC),
-                                            shpType,
-                                            inputFC)
-        lyrTmp = 'lyrTmp'
-        arcpy.MakeFeatureLayer_management(tmpFC, lyrTmp)
-
-        ## WORKAROUND: removed below because it was creating a schema lock until Pro/arcpy exited
-        ## set up grid field
-        #gridField = "Grid"
-        #arcpy.AddField_management(lyrTmp, gridField, "TEXT")
-        #arcpy.DeleteField_management(lyrTmp, 'ID')
-
-        # rotate the feature class coordinates for each feature, and each feature part
-
-        # open read and write cursors
-        updateFields = ['SHAPE@','Grid']
-        arcpy.AddMessage('Rotating temporary dataset')
-
-        parts = arcpy.Array()
-        rings = arcpy.Array()
-        ring = arcpy.Array()
-
-        with arcpy.da.SearchCursor(lyrFC, updateFields) as inRows,\
-          arcpy.da.InsertCursor(lyrTmp, updateFields) as outRows:
-            for inRow in inRows:
-                shp = inRow[0] # SHAPE
-                p = 0
-                for part in shp:
-                    for pnt in part:
-                        if pnt:
-                            x, y = RotateXY(pnt.X, pnt.Y, xcen, ycen, angle)
-                            ring.add(arcpy.Point(x, y, pnt.ID))
-                        else:
-                            # if we have a ring, save it
-                            if len(ring) > 0:
-                                rings.add(ring)
-                                ring.removeAll()
-                    # we have our last ring, add it
-                    rings.add(ring)
-                    ring.removeAll()
-                    # if only one, remove nesting
-                    if len(rings) == 1: rings = rings.getObject(0)
-                    parts.add(rings)
-                    rings.removeAll()
-                    p += 1
-
-                # if only one, remove nesting
-                if len(parts) == 1: parts = parts.getObject(0)
-                if dFC.shapeType == "Polyline":
-                    shp = arcpy.Polyline(parts)
-                else:
-                    shp = arcpy.Polygon(parts)
-                parts.removeAll()
-
-                gridValue = inRow[1] # GRID string
-                outRows.insertRow([shp, gridValue])  # write row to output
-
-        arcpy.AddMessage('Merging temporary, rotated dataset with output')
-        env.qualifiedFieldNames = False
-        arcpy.Merge_management(lyrTmp, outputFC)
-
-    except MsgError as xmsg:
-        arcpy.AddError(str(xmsg))
-    except arcpy.ExecuteError:
-        tbinfo = traceback.format_tb(sys.exc_info()[2])[0]
-        arcpy.AddError(tbinfo.strip())
-        arcpy.AddError(arcpy.GetMessages())
-        numMsg = arcpy.GetMessageCount()
-        for i in range(0, numMsg):
-            arcpy.AddReturnMessage(i)
-    except Exception as xmsg:
-        tbinfo = traceback.format_tb(sys.exc_info()[2])[0]
-        arcpy.AddError(tbinfo + str(xmsg))
-    finally:
-        # reset environment
-        if env_file: arcpy.gp.LoadSettings(env_file)
-        # Clean up temp files
-        for f in [lyrFC, lyrTmp, tmpFC, env_file]:
-            try:
-                if f and arcpy.Exists(f) :
-                    arcpy.Delete_management(f)
-            except:
-                pass
-
-        # return pivot point
-        try:
-            pivot_point = "{0} {1}".format(*pivot_point)
-        except:
-            pivot_point = None
-
-        return pivot_point
-
-    # END RotateFeatureClass
+def _cellsFromStart(rows, cols, rowCount, colCount, labelStartPos):
+    ''' rows and columns counted from the labeling start position '''
+    rows = numpy.asarray(rows, dtype=numpy.int64)
+    cols = numpy.asarray(cols, dtype=numpy.int64)
+    if labelStartPos in ["Upper-Left", "Upper-Right"]:
+        rows = (int(rowCount) - 1) - rows
+    if labelStartPos in ["Upper-Right", "Lower-Right"]:
+        cols = (int(colCount) - 1) - cols
+    return rows, cols
+
+def GRGCellOrder(rows, cols, rowCount, colCount, labelStartPos):
+    '''
+    Returns the indexes of the cells in labeling order, row by row from labelStartPos.
+    rows, cols, rowCount, colCount and labelStartPos are as in GRGCellLabels.
+    '''
+    startRows, startCols = _cellsFromStart(rows, cols, rowCount, colCount, labelStartPos)
+    return numpy.argsort(startRows * int(colCount) + startCols, kind="mergesort")
+
+def GRGFishnetCells(originX, originY, angle, cellWidth, cellHeight, rowCount, colCount):
+    '''
+    Builds all cells of a rotated fishnet in one array operation.
+
+    originX, originY - lower left corner of the grid
+    angle - direction of the grid rows, degrees counter-clockwise from east
+    cellWidth, cellHeight - cell size in the units of the coordinates
+    rowCount, colCount - number of rows and columns
+
+    returns [rows, cols, rings]; rows and cols of each cell from the lower left,
+    and rings as an (N, 5, 2) array of closed, clockwise cell corners
+    '''
+    rows, cols = numpy.divmod(numpy.arange(int(rowCount) * int(colCount)), int(colCount))
+    # corner offsets of a cell, clockwise from its lower left corner
+    u = (cols[:, None] + numpy.array([0, 0, 1, 1, 0])) * float(cellWidth)
+    v = (rows[:, None] + numpy.array([0, 1, 1, 0, 0])) * float(cellHeight)
+    cosAngle, sinAngle = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    xs = float(originX) + u * cosAngle - v * sinAngle
+    ys = float(originY) + u * sinAngle + v * cosAngle
+    return [rows, cols, numpy.dstack([xs, ys])]
+
+def GRGKeypadCells(originX, originY, angle, cellWidth, cellHeight, rowCount, colCount, depth):
+    '''
+    Builds the cells of a rotated fishnet and depth levels of 3 x 3 keypad
+    sub-cells. All levels take their corners from one shared vertex lattice.
+
+    originX, originY, angle, cellWidth, cellHeight, rowCount, colCount - as in GRGFishnetCells
+    depth - number of keypad levels below the grid cells
+
+    returns list of [rows, cols, rings] for each level, level 0 being the grid
+    cells; rows and cols count cells of that level from the lower left
+    '''
+    rowCount, colCount, depth = int(rowCount), int(colCount), int(depth)
+    scale = 3 ** depth
+    u = numpy.arange(colCount * scale + 1) * (float(cellWidth) / scale)
+    v = numpy.arange(rowCount * scale + 1) * (float(cellHeight) / scale)
+    u, v = numpy.meshgrid(u, v)
+    cosAngle, sinAngle = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    latticeX = float(originX) + u * cosAngle - v * sinAngle
+    latticeY = float(originY) + u * sinAngle + v * cosAngle
+
+    levels = []
+    for level in range(depth + 1):
+        step = 3 ** (depth - level)
+        levelColCount = colCount * 3 ** level
+        rows, cols = numpy.divmod(numpy.arange(rowCount * 3 ** level * levelColCount), levelColCount)
+        # lattice indexes of the corners, clockwise from the lower left
+        cornerRows = (rows[:, None] + numpy.array([0, 1, 1, 0, 0])) * step
+        cornerCols = (cols[:, None] + numpy.array([0, 0, 1, 1, 0])) * step
+        rings = numpy.dstack([latticeX[cornerRows, cornerCols], latticeY[cornerRows, cornerCols]])
+        levels.append([rows, cols, rings])
+    return levels
+
+# keypad number of a sub-cell by its row (from the bottom) and column, 1 in the upper left
+keypadNumbers = numpy.array([[7, 8, 9],
+                             [4, 5, 6],
+                             [1, 2, 3]])
+
+def GRGKeypadKeys(rows, cols, level):
+    '''
+    Returns the keypad numbers of sub-cells, an (N, level) array from the
+    first keypad level down, for rows and cols of keypad level level
+    '''
+    rows = numpy.asarray(rows, dtype=numpy.int64)
+    cols = numpy.asarray(cols, dtype=numpy.int64)
+    keys = numpy.zeros((len(rows), int(level)), dtype=numpy.int64)
+    for k in range(1, int(level) + 1):
+        divisor = 3 ** (int(level) - k)
+        keys[:, k - 1] = keypadNumbers[(rows // divisor) % 3, (cols // divisor) % 3]
+    return keys
+
+def _cellSizeInMeters(cellWidth, cellHeight, cellUnits):
+    ''' converts GRG cell width and height from cellUnits to meters '''
+    if not cellUnits or cellUnits == "Meters":
+        return [cellWidth, cellHeight]
+    return [SpatialReferenceUtilities.ConvertLength(cellWidth, cellUnits),
+            SpatialReferenceUtilities.ConvertLength(cellHeight, cellUnits)]
+
+def _areaGridFrame(orientation, pts, cellWidth, cellHeight):
+    '''
+    Gets the grid covering a minimum bounding rectangle
+    orientation - MBG_Orientation of the rectangle
+    pts - first four (clockwise) corners of the rectangle
+
+    returns [originX, originY, angle, rowCount, colCount]
+    '''
+    # Pick the corner of the rectangle closest to upright as the grid origin.
+    # The rectangle is clockwise, so the next corner is on the grid's y-axis
+    # and the previous corner is on its x-axis.
+    if orientation < 45:
+        originIndex = 0
+    elif orientation >= 45 and orientation <= 135:
+        originIndex = 3
+    else:
+        originIndex = 2
+    origin = pts[originIndex]
+    yAxisPoint = pts[(originIndex + 1) % 4]
+    xAxisPoint = pts[(originIndex - 1) % 4]
+    angle = math.degrees(math.atan2(xAxisPoint[1] - origin[1], xAxisPoint[0] - origin[0]))
+    xLength = math.hypot(xAxisPoint[0] - origin[0], xAxisPoint[1] - origin[1])
+    yLength = math.hypot(yAxisPoint[0] - origin[0], yAxisPoint[1] - origin[1])
+    # round off floating point noise so an exact fit does not add a cell
+    colCount = max(1, int(math.ceil(round(xLength / float(cellWidth), 6))))
+    rowCount = max(1, int(math.ceil(round(yLength / float(cellHeight), 6))))
+    return [origin[0], origin[1], angle, rowCount, colCount]
+
+def _pointGridFrame(centerX, centerY, rotation, cellWidth, cellHeight, rowCount, colCount):
+    '''
+    Gets the origin and angle of a grid centered on a point and turned
+    clockwise by rotation degrees about the point
+
+    returns [originX, originY, angle]
+    '''
+    angle = -float(rotation or 0)
+    halfWidth = (float(cellWidth) * colCount) / 2.0
+    halfHeight = (float(cellHeight) * rowCount) / 2.0
+    cosAngle, sinAngle = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    originX = centerX - (halfWidth * cosAngle) + (halfHeight * sinAngle)
+    originY = centerY - (halfWidth * sinAngle) - (halfHeight * cosAngle)
+    return [originX, originY, angle]
+
+def _buildGRGCells(originX, originY, angle, cellWidth, cellHeight, rowCount, colCount,
+                   labelStartPos, labelStyle, labelSeperator, subdivisionDepth=0):
+    '''
+    Builds and labels the cells of one grid, with subdivisionDepth levels
+    of keypad sub-cells labeled like C7-3-5
+
+    returns [rings, labels, levels]; grid cells in labeling order, then the
+    sub-cells of each level ordered by grid cell and keypad number
+    '''
+    if not subdivisionDepth:
+        cellRows, cellCols, cellRings = GRGFishnetCells(originX, originY, angle,
+                                                        cellWidth, cellHeight,
+                                                        rowCount, colCount)
+        cellLabels = GRGCellLabels(cellRows, cellCols, rowCount, colCount,
+                                   labelStartPos, labelStyle, labelSeperator)
+        cellOrder = GRGCellOrder(cellRows, cellCols, rowCount, colCount, labelStartPos)
+        return [cellRings[cellOrder], [cellLabels[i] for i in cellOrder], [0] * len(cellOrder)]
+
+    levels = GRGKeypadCells(originX, originY, angle, cellWidth, cellHeight,
+                            rowCount, colCount, subdivisionDepth)
+    cellRows, cellCols = levels[0][0], levels[0][1]
+    cellLabels = numpy.array(GRGCellLabels(cellRows, cellCols, rowCount, colCount,
+                                           labelStartPos, labelStyle, labelSeperator))
+    cellOrder = GRGCellOrder(cellRows, cellCols, rowCount, colCount, labelStartPos)
+    cellRank = numpy.empty(len(cellOrder), dtype=numpy.int64)
+    cellRank[cellOrder] = numpy.arange(len(cellOrder))
+
+    rings, labels, cellLevels = [levels[0][2][cellOrder]], cellLabels[cellOrder].tolist(), [0] * len(cellOrder)
+    for level in range(1, len(levels)):
+        rows, cols, levelRings = levels[level]
+        parents = (rows // 3 ** level) * int(colCount) + (cols // 3 ** level)
+        keys = GRGKeypadKeys(rows, cols, level)
+        levelLabels = cellLabels[parents]
+        sortKey = cellRank[parents]
+        for k in range(level):
+            levelLabels = numpy.char.add(numpy.char.add(levelLabels, "-"), keys[:, k].astype(str))
+            sortKey = sortKey * 9 + (keys[:, k] - 1)
+        levelOrder = numpy.argsort(sortKey, kind="mergesort")
+        rings.append(levelRings[levelOrder])
+        labels.extend(levelLabels[levelOrder].tolist())
+        cellLevels.extend([level] * len(levelOrder))
+    return [numpy.concatenate(rings), labels, cellLevels]
+
+def CreateGRGFeatureClass(outputFeatureClass, spatialReference, rings, labels, parentIDs=None, levels=None):
+    '''
+    Creates a GRG polygon feature class with a Grid label field and inserts all cells
+
+    outputFeatureClass - feature class to create
+    spatialReference - spatial reference of the cell coordinates
+    rings - cell rings as returned by GRGFishnetCells, in output order
+    labels - Grid label for each ring
+    parentIDs - optional ID of the input feature of each ring, written to a ParentID field
+    levels - optional keypad level of each ring, written to a Level field
+
+    returns outputFeatureClass
+    '''
+    outputFeatureClass = str(outputFeatureClass)
+    arcpy.CreateFeatureclass_management(os.path.dirname(outputFeatureClass),
+                                        os.path.basename(outputFeatureClass),
+                                        "POLYGON",
+                                        None,
+                                        "DISABLED",
+                                        "DISABLED",
+                                        spatialReference)
+    gridField = "Grid"
+    arcpy.AddField_management(outputFeatureClass, gridField, "TEXT")
+    fields = ['SHAPE@', gridField]
+    columns = [labels]
+    for fieldName, fieldType, values in [[parentIDField, "LONG", parentIDs],
+                                         [levelField, "SHORT", levels]]:
+        if values is not None:
+            arcpy.AddField_management(outputFeatureClass, fieldName, fieldType)
+            fields.append(fieldName)
+            columns.append(values)
+    with arcpy.da.InsertCursor(outputFeatureClass, fields) as cursor:
+        for row in zip(rings.tolist(), *columns):
+            cell = arcpy.Polygon(arcpy.Array([arcpy.Point(x, y) for x, y in row[0]]), spatialReference)
+            cursor.insertRow([cell] + list(row[1:]))
+    return outputFeatureClass
+
+def GRGCellLabels(rows, cols, rowCount, colCount, labelStartPos, labelStyle, labelSeperator):
+    '''
+    Computes GRG labels from cell positions, without depending on the order
+    the cells are stored or visited.
+
+    rows - array of cell rows, 0 is the bottom row of the grid
+    cols - array of cell columns, 0 is the left column of the grid
+    rowCount, colCount - number of rows and columns in the grid
+    labelStartPos - Upper-Left, Upper-Right, Lower-Left, or Lower-Right cell is labeled first
+    labelStyle - Alpha-Numeric (A1), Alpha-Alpha (A-A), or Numeric (1)
+    labelSeperator - separator between letters for Alpha-Alpha
+
+    returns list of labels, one for each cell
+    '''
+    rowCount, colCount = int(rowCount), int(colCount)
+    rows, cols = _cellsFromStart(rows, cols, rowCount, colCount, labelStartPos)
+
+    if labelStyle == "Numeric":
+        labels = (rows * colCount + cols + 1).astype(str)
+    else:
+        rowLetters = numpy.array([ColIdxToXlName_CanvasAreaGRG(i) for i in range(rowCount)])
+        if labelStyle == "Alpha-Alpha":
+            colLetters = numpy.array([ColIdxToXlName_CanvasAreaGRG(i) for i in range(colCount)])
+            labels = numpy.char.add(numpy.char.add(rowLetters[rows], str(labelSeperator)), colLetters[cols])
+        else:
+            labels = numpy.char.add(rowLetters[rows], (cols + 1).astype(str))
+    return labels.tolist()
 
 def GRGFromArea(AOI,
                 cellWidth,
@@ -295,17 +373,18 @@ def GRGFromArea(AOI,
                 labelStartPos,
                 labelStyle,
                 labelSeperator,
-                outputFeatureClass):
-    '''Create Gridded Reference Graphic (GRG) from area input.'''
+                outputFeatureClass,
+                subdivisionDepth=0):
+    '''Create Gridded Reference Graphic (GRG) from area input, with
+    subdivisionDepth levels of keypad sub-cells.'''
 
-    fishnet = os.path.join("in_memory", "fishnet")
+    scratch = Utilities.ScratchWorkspace()
     DEBUG = True
     # GLOBALS
     mxd = None
     df = None
     aprx = None
     mapList = None
-    scratch = None
     fc_WM = None
 
     try:
@@ -313,7 +392,7 @@ def GRGFromArea(AOI,
         appEnvironment = Utilities.GetApplication()
         if DEBUG == True: arcpy.AddMessage("App environment: " + appEnvironment)
 
-        fc = os.path.join("in_memory", "AOI")
+        fc = scratch.name("AOI")
         arcpy.CopyFeatures_management(AOI, fc)
 
         if appEnvironment == "ARCGIS_PRO":
@@ -327,55 +406,18 @@ def GRGFromArea(AOI,
             df = arcpy.mapping.ListDataFrames(mxd)[0]
 
         arcpy.env.overwriteOutput = True
-        if arcpy.env.scratchWorkspace:
-            scratch = arcpy.env.scratchWorkspace
-        else:
-            scratch = r"%scratchGDB%"
 
         #If AOI is not in WebMercator, re-project to it
         if arcpy.Describe(AOI).spatialReference.name != "WGS_1984_Web_Mercator_Auxiliary_Sphere":
-            fc_WM = os.path.join(scratch, "AOI_WM")
-            outCS = arcpy.SpatialReference(3857) #the code for WGS84 Web Mercator
+            fc_WM = scratch.name("AOI_WM")
+            outCS = SpatialReferenceUtilities.GetSpatialReference(3857) #the code for WGS84 Web Mercator
             arcpy.Project_management(fc, fc_WM, outCS)
             fc = fc_WM
 
         # From the template extent, create a polygon that we can project into a localized World Azimuthal Equidistan
         if DEBUG == True: arcpy.AddMessage("Getting extent info...")
 
-        '''
-        ' If cell units are feet convert to meters
-        '''
-        if (cellUnits == "Feet"):
-            cellWidth = float(cellWidth) / 3.2808
-            cellHeight = float(cellHeight) / 3.2808
-
-        '''
-        ' If cell units are kilometers convert to meters
-        '''
-        if (cellUnits == "Kilometers"):
-            cellWidth = float(cellWidth) * 1000
-            cellHeight = float(cellHeight) * 1000
-
-        '''
-        ' If cell units are miles convert to meters
-        '''
-        if (cellUnits == "Miles"):
-            cellWidth = float(cellWidth) * 1609.344
-            cellHeight = float(cellHeight) * 1609.344
-
-        '''
-        ' If cell units are yards convert to meters
-        '''
-        if (cellUnits == "Yards"):
-            cellWidth = float(cellWidth) * 0.9144
-            cellHeight = float(cellHeight) * 0.9144
-
-        '''
-        ' If cell units are Nautical Miles convert to meters
-        '''
-        if (cellUnits == "Nautical Miles"):
-            cellWidth = float(cellWidth) * 1852
-            cellHeight = float(cellHeight) * 1852
+        cellWidth, cellHeight = _cellSizeInMeters(cellWidth, cellHeight, cellUnits)
 
         '''
         ' create a minimum bounding rectangle around the AOI
@@ -383,53 +425,15 @@ def GRGFromArea(AOI,
         ' tool also creates a field that has the shape orientation
         '''
         arcpy.AddMessage("Getting Minimum Bounding Geometry that fits the Area of Interest")
-        minBound = os.path.join("in_memory","minBound")
+        minBound = scratch.name("minBound")
         arcpy.MinimumBoundingGeometry_management(fc, minBound, 'RECTANGLE_BY_AREA','#','#','MBG_FIELDS')
 
         '''
         ' Extract the minimum bounding rectangle orienatation angle to a variable
         '''
-        for row in arcpy.da.SearchCursor(minBound,["MBG_Orientation","MBG_LENGTH","MBG_WIDTH"]):
+        for row in arcpy.da.SearchCursor(minBound,["MBG_Orientation"]):
             orientation = row[0]
             arcpy.AddMessage("Orientation Angle: {0}".format(str(orientation)))
-            if(orientation >= 45 and orientation <= 135):
-                horizontalCells = math.ceil(row[1]/float(cellWidth))
-                verticalCells = math.ceil(row[2]/float(cellHeight))
-            else:
-                verticalCells = math.ceil(row[1]/float(cellWidth))
-                horizontalCells = math.ceil(row[2]/float(cellHeight))
-            arcpy.AddMessage('Creating Grid {0} x {1}'.format(horizontalCells,verticalCells))
-
-        arcpy.AddMessage(labelStartPos)
-        '''
-        ' Set up labeling depending on start position
-        '''
-        labelNumber = 0
-        letterIndex = 0
-        secondLetterIndex = 0
-
-        if labelStartPos == "Upper-Left":
-            letterIndex = verticalCells - 1
-            secondLetterIndex = -1
-            if labelStyle != 'Numeric':
-                labelNumber = 0
-            else:
-                labelNumber = (verticalCells - 1) * horizontalCells
-        elif labelStartPos == "Upper-Right":
-            letterIndex = verticalCells - 1
-            secondLetterIndex = horizontalCells
-            if labelStyle != 'Numeric':
-                labelNumber = horizontalCells + 1
-            else:
-                labelNumber = (verticalCells * horizontalCells) + 1
-        elif labelStartPos == "Lower-Right":
-            letterIndex = 0
-            secondLetterIndex = horizontalCells
-            labelNumber = horizontalCells + 1
-        elif labelStartPos == "Lower-Left":
-            letterIndex = 0
-            secondLetterIndex = -1
-            labelNumber = 0
 
         '''
         ' Explode the minimum bounding rectangle to points
@@ -437,110 +441,23 @@ def GRGFromArea(AOI,
         with arcpy.da.SearchCursor(minBound, 'SHAPE@XY', explode_to_points=True) as cursor:
             pts = [r[0] for r in cursor][0:4]
 
-        '''
-        ' Because the fishnet tool always creates a non rotated fishnet before it applies
-        ' its rotation we need to determine what the opposite point location would be if the
-        ' minimum polygon was not rotated
-        '''
-        if orientation < 45:
-            angle = math.radians(orientation)
-            x = float(pts[2][0]) - float(pts[0][0])
-            y = float(pts[2][1]) - float(pts[0][1])
-            xr = (x * math.cos(angle)) - (y * math.sin(angle)) + float(pts[0][0])
-            yr = (x * math.sin(angle)) + (y * math.cos(angle)) + float(pts[0][1])
-            origin = str(pts[0][0]) + ' ' + str(pts[0][1])
-            yaxis =  str(pts[1][0]) + ' ' + str(pts[1][1])
-        elif orientation >= 45 and orientation <= 135:
-            angle = math.radians((90 - orientation) * -1)
-            x = float(pts[1][0]) - float(pts[3][0])
-            y = float(pts[1][1]) - float(pts[3][1])
-            xr = (x * math.cos(angle)) - (y * math.sin(angle)) + float(pts[3][0])
-            yr = (x * math.sin(angle)) + (y * math.cos(angle)) + float(pts[3][1])
-            origin = str(pts[3][0]) + ' ' + str(pts[3][1])
-            yaxis =  str(pts[0][0]) + ' ' + str(pts[0][1])
-        else:
-            angle = math.radians((180 - orientation) * -1)
-            x = float(pts[0][0]) - float(pts[2][0])
-            y = float(pts[0][1]) - float(pts[2][1])
-            xr = (x * math.cos(angle)) - (y * math.sin(angle)) + float(pts[2][0])
-            yr = (x * math.sin(angle)) + (y * math.cos(angle)) + float(pts[2][1])
-            origin = str(pts[2][0]) + ' ' + str(pts[2][1])
-            yaxis =  str(pts[3][0]) + ' ' + str(pts[3][1])
-
-        oppositeCorner = str(xr) + " " + str(yr)
+        originX, originY, angle, verticalCells, horizontalCells = _areaGridFrame(orientation, pts, cellWidth, cellHeight)
+        arcpy.AddMessage('Creating Grid {0} x {1}'.format(horizontalCells,verticalCells))
 
         '''
-        ' Now use the CreateFishnet_management tool to create the desired grid
+        ' Build the rotated grid cells, label them and write them in label order
         '''
         arcpy.AddMessage("Creating Fishnet Grid...")
-        arcpy.CreateFishnet_management(fishnet, origin, yaxis, str(cellWidth), str(cellHeight), 0, 0, oppositeCorner, "NO_LABELS", fc, "POLYGON")
-
-        '''
-        ' Add a field which will be used to add the grid labels
-        '''
-        arcpy.AddMessage("Adding field for labeling the grid")
-        gridField = "Grid"
-        arcpy.AddField_management(fishnet, gridField, "TEXT")
-
-        '''
-        ' Loop through features and label
-        '''
-
-        with arcpy.da.UpdateCursor(fishnet, ['OID','Grid']) as cursor:
-            verticalCount = 0
-            horizontalCount = 0
-            for row in cursor:
-                if labelStartPos == "Lower-Left" or labelStartPos == 'Upper-Left':
-                    labelNumber = labelNumber + 1
-                    secondLetterIndex = secondLetterIndex + 1
-                else:
-                    labelNumber = labelNumber - 1
-                    secondLetterIndex = secondLetterIndex - 1
-
-                letter = ColIdxToXlName_CanvasAreaGRG(int(letterIndex))
-                secondLetter = ColIdxToXlName_CanvasAreaGRG(int(secondLetterIndex))
-
-                if (labelStyle == "Alpha-Numeric"):
-                    row[1] = letter + str(int(labelNumber))
-                elif (labelStyle == "Alpha-Alpha"):
-                    row[1] = letter + labelSeperator + secondLetter
-                elif (labelStyle == "Numeric"):
-                    row[1] = labelNumber
-
-                cursor.updateRow(row)
-
-                horizontalCount = horizontalCount + 1
-
-                if horizontalCount >= horizontalCells:
-                    horizontalCount = 0
-                    verticalCount = verticalCount + 1
-                    if labelStartPos == "Upper-Left":
-                        letterIndex = letterIndex - 1
-                        secondLetterIndex = -1
-                        if labelStyle != 'Numeric':
-                            labelNumber = 0
-                        else:
-                            labelNumber = (verticalCells - (verticalCount + 1)) * horizontalCells
-                    elif labelStartPos == "Upper-Right":
-                        letterIndex = letterIndex - 1
-                        secondLetterIndex = horizontalCells
-                        if labelStyle != 'Numeric':
-                            labelNumber = horizontalCells + 1
-                    elif labelStartPos == "Lower-Right":
-                        letterIndex = letterIndex + 1
-                        secondLetterIndex = horizontalCells
-                        if labelStyle != 'Numeric':
-                            labelNumber = horizontalCells + 1
-                        else:
-                            labelNumber = ((verticalCount + 1) * horizontalCells) + 1
-                    elif labelStartPos == "Lower-Left":
-                        letterIndex = letterIndex + 1
-                        secondLetterIndex = -1
-                        if labelStyle != 'Numeric':
-                            labelNumber = 0
-
-        arcpy.CopyFeatures_management(fishnet, outputFeatureClass)
-        arcpy.Delete_management(fishnet)
+        cellRings, cellLabels, cellLevels = _buildGRGCells(originX, originY, angle,
+                                                           cellWidth, cellHeight,
+                                                           verticalCells, horizontalCells,
+                                                           labelStartPos, labelStyle, labelSeperator,
+                                                           subdivisionDepth)
+        CreateGRGFeatureClass(outputFeatureClass,
+                              arcpy.Describe(fc).spatialReference,
+                              cellRings,
+                              cellLabels,
+                              levels=cellLevels if subdivisionDepth else None)
 
         # Get and label the output feature
         #TODO: Update once applying symbology in Pro is fixed.
@@ -580,11 +497,7 @@ def GRGFromArea(AOI,
         print(msgs)
 
     finally:
-        try:
-            if arcpy.Exists(os.path.join(scratch, "AOI_WM")):
-                arcpy.Delete_management(fc_WM)
-        except:
-            pass
+        scratch.cleanup()
 
 def GRGFromPoint(starting_point,
                  horizontal_cells,
@@ -596,8 +509,10 @@ def GRGFromPoint(starting_point,
                  label_style,
                  labelSeperator,
                  gridAngle,
-                 output_feature_class):
-    ''' Create Gridded Reference Graphic (GRG) from point input.'''
+                 output_feature_class,
+                 subdivisionDepth=0):
+    ''' Create Gridded Reference Graphic (GRG) from point input, with
+    subdivisionDepth levels of keypad sub-cells.'''
 
 
     targetPointOrigin = starting_point
@@ -611,12 +526,9 @@ def GRGFromPoint(starting_point,
     rotation = gridAngle
     outputFeatureClass = output_feature_class
 
-    tempOutput = os.path.join("in_memory", "tempFishnetGrid")
     DEBUG = True
     mxd = None
     df, aprx = None, None
-    point_WM = None
-    scratch = None
 
     try:
         #UPDATE
@@ -639,65 +551,22 @@ def GRGFromPoint(starting_point,
             raise Exception("The input start location must contain at least one feature.")
 
         if(int(numberOfFeatures[0]) > 1):
-            arcpy.AddMessage("More than one feature detected for the start location, last feature entered will be used.")
+            arcpy.AddMessage("More than one feature detected for the start location, last feature entered will be used. Use One GRG Per Input Feature to grid every feature.")
 
         arcpy.env.overwriteOutput = True
-        if arcpy.env.scratchWorkspace:
-            scratch = arcpy.env.scratchWorkspace
-        else:
-            scratch = r"%scratchGDB%"
-
-        #If starting point is not in WebMercator, re-project to it
-        if arcpy.Describe(targetPointOrigin).spatialReference.name != "WGS_1984_Web_Mercator_Auxiliary_Sphere":
-            point_WM = os.path.join(scratch, "GRG_POINT_WM")
-            outCS = arcpy.SpatialReference(3857) #the code for WGS84 Web Mercator
-            arcpy.Project_management(targetPointOrigin, point_WM, outCS)
-            targetPointOrigin = point_WM
-            arcpy.AddMessage("Projected starting point to Web Mercator.")
-
-        '''
-        ' If cell units are feet convert to meters
-        '''
-        if (cellUnits == "Feet"):
-            cellWidth = float(cellWidth) / 3.2808
-            cellHeight = float(cellHeight) / 3.2808
-
-        '''
-        ' If cell units are kilometers convert to meters
-        '''
-        if (cellUnits == "Kilometers"):
-            cellWidth = float(cellWidth) * 1000
-            cellHeight = float(cellHeight) * 1000
 
-        '''
-        ' If cell units are miles convert to meters
-        '''
-        if (cellUnits == "Miles"):
-            cellWidth = float(cellWidth) * 1609.344
-            cellHeight = float(cellHeight) * 1609.344
+        #If starting point is not in WebMercator, read it in WebMercator
+        srGrid = arcpy.Describe(targetPointOrigin).spatialReference
+        if srGrid.name != "WGS_1984_Web_Mercator_Auxiliary_Sphere":
+            srGrid = SpatialReferenceUtilities.GetSpatialReference(3857) #the code for WGS84 Web Mercator
+            arcpy.AddMessage("Projecting starting point to Web Mercator.")
 
-        '''
-        ' If cell units are yards convert to meters
-        '''
-        if (cellUnits == "Yards"):
-            cellWidth = float(cellWidth) * 0.9144
-            cellHeight = float(cellHeight) * 0.9144
+        cellWidth, cellHeight = _cellSizeInMeters(cellWidth, cellHeight, cellUnits)
 
-        '''
-        ' If cell units are Nautical Miles convert to meters
-        '''
-        if (cellUnits == "Nautical Miles"):
-            cellWidth = float(cellWidth) * 1852
-            cellHeight = float(cellHeight) * 1852
-
-
-        # Get the coordinates of the point inputExtentDrawnFromMap.
-        rows = arcpy.SearchCursor(targetPointOrigin)
-        extent = None
-        for row in rows:
-            shape = row.getValue("SHAPE")
-            extent = shape.extent
-        pointExtents = str.split(str(extent))
+        # Get the coordinates of the start point, the last feature is used
+        with arcpy.da.SearchCursor(targetPointOrigin, ['SHAPE@XY'], spatial_reference=srGrid) as cursor:
+            for row in cursor:
+                centerX, centerY = row[0]
 
         ''' This seemed to be shifting the grid when it was not required so commented out
 
@@ -726,81 +595,26 @@ def GRGFromPoint(starting_point,
 
         '''
 
-        # From the template extent, get the origin, y axis, and opposite corner coordinates
-        rightCorner =  float(pointExtents[0]) + ((float(cellWidth) * float(numberCellsVert)) /2.0)
-        leftCorner = float(pointExtents[0]) - ((float(cellWidth) * float(numberCellsVert)) /2.0)
-        topCorner = float(pointExtents[1]) + ((float(cellHeight) * float(numberCellsHo)) /2.0)
-        bottomCorner = float(pointExtents[1]) - ((float(cellHeight) * float(numberCellsHo)) /2.0)
-        originCoordinate = str(leftCorner) + " " + str(bottomCorner)
-        yAxisCoordinate = str(leftCorner) + " " + str(bottomCorner + 10)
-        oppCornerCoordinate = str(rightCorner) + " " + str(topCorner)
-        fullExtent = str(leftCorner) + " " + str(bottomCorner) + " " + str(rightCorner) + " " + str(topCorner)
-
-        # Set the start position for labeling
-        startPos = None
-        if (labelStartPos == "Upper-Right"):
-            startPos = "UR"
-        elif (labelStartPos == "Upper-Left"):
-            startPos = "UL"
-        elif (labelStartPos == "Lower-Left"):
-            startPos = "LL"
-        elif (labelStartPos == "Lower-Right"):
-            startPos = "LR"
+        rowCount, colCount = int(numberCellsHo), int(numberCellsVert)
+        originX, originY, angle = _pointGridFrame(centerX, centerY, rotation,
+                                                  cellWidth, cellHeight,
+                                                  rowCount, colCount)
 
         arcpy.AddMessage("Creating Fishnet Grid")
-        env.outputCoordinateSystem = arcpy.Describe(targetPointOrigin).spatialReference
+        env.outputCoordinateSystem = srGrid
 
-        arcpy.CreateFishnet_management(tempOutput, originCoordinate, yAxisCoordinate, 0, 0, str(numberCellsHo), str(numberCellsVert), oppCornerCoordinate, "NO_LABELS", fullExtent, "POLYGON")
-
-        # Sort the grid upper left to lower right, and delete the in memory one
-        arcpy.AddMessage("Sorting the grid for labeling")
-        tempSort = os.path.join("in_memory", "tempSort")
-        arcpy.Sort_management(tempOutput, tempSort, [["Shape", "ASCENDING"]], startPos)
-
-        # Add a field which will be used to add the grid labels
-        arcpy.AddMessage("Adding field for labeling the grid")
-        gridField = "Grid"
-        arcpy.AddField_management(tempSort, gridField, "TEXT")
-
-        # Number the fields
+        # Number the cells from their row and column, and write them in label order
         arcpy.AddMessage("Numbering the grids")
-        letterIndex = 1
-        secondLetterIndex = 1
-        letter = 'A'
-        secondLetter = 'A'
-        number = 1
-        lastY = -9999
-        cursor = arcpy.UpdateCursor(tempSort)
-        for row in cursor:
-            yPoint = row.getValue("SHAPE").firstPoint.Y
-            if (lastY != yPoint) and (lastY != -9999):
-                letterIndex += 1
-                letter = ColIdxToXlName_PointTargetGRG(letterIndex)
-                if (labelStyle != "Numeric"):
-                    number = 1
-                secondLetter = 'A'
-                secondLetterIndex = 1
-            lastY = yPoint
-
-            if (labelStyle == "Alpha-Numeric"):
-                row.setValue(gridField, str(letter) + str(number))
-            elif (labelStyle == "Alpha-Alpha"):
-                row.setValue(gridField, str(letter) + labelSeperator + str(secondLetter))
-            elif (labelStyle == "Numeric"):
-                row.setValue(gridField, str(number))
-
-            cursor.updateRow(row)
-            number += 1
-            secondLetterIndex += 1
-            secondLetter = ColIdxToXlName_PointTargetGRG(secondLetterIndex)
-
-        # Rotate the shape, if needed.
-        if (rotation != 0):
-            arcpy.AddMessage("Rotating the grid")
-            RotateFeatureClass(tempSort, outputFeatureClass, rotation, pointExtents[0] + " " + pointExtents[1])
-        else:
-            arcpy.CopyFeatures_management(tempSort, outputFeatureClass)
-        arcpy.Delete_management(tempSort)
+        cellRings, cellLabels, cellLevels = _buildGRGCells(originX, originY, angle,
+                                                           cellWidth, cellHeight,
+                                                           rowCount, colCount,
+                                                           labelStartPos, labelStyle, labelSeperator,
+                                                           subdivisionDepth)
+        CreateGRGFeatureClass(outputFeatureClass,
+                              srGrid,
+                              cellRings,
+                              cellLabels,
+                              levels=cellLevels if subdivisionDepth else None)
 
         # Get and label the output feature
         #UPDATE
@@ -840,41 +654,325 @@ def GRGFromPoint(starting_point,
         print(pymsg + "\n")
         print(msgs)
 
+def _batchGRGCells(frames, parentIDs, cellWidth, cellHeight,
+                   labelStartPos, labelStyle, labelSeperator,
+                   subdivisionDepth=0):
+    '''
+    Builds the cells of many grids
+    frames - [originX, originY, angle, rowCount, colCount] of each grid
+    parentIDs - ID of the input feature of each grid
+    subdivisionDepth - levels of keypad sub-cells in each grid
+
+    returns [rings, labels, parentIDs, levels] of all grids, grid by grid
+    '''
+    grids = [_buildGRGCells(originX, originY, angle,
+                            cellWidth, cellHeight,
+                            rowCount, colCount,
+                            labelStartPos, labelStyle, labelSeperator,
+                            subdivisionDepth)
+             for originX, originY, angle, rowCount, colCount in frames]
+
+    rings = numpy.concatenate([grid[0] for grid in grids])
+    labels = [label for grid in grids for label in grid[1]]
+    cellParentIDs = [parentID for parentID, grid in zip(parentIDs, grids) for i in range(len(grid[1]))]
+    levels = [level for grid in grids for level in grid[2]]
+    return [rings, labels, cellParentIDs, levels]
+
+def BatchGRGFromArea(AOI,
+                     cellWidth,
+                     cellHeight,
+                     cellUnits,
+                     labelStartPos,
+                     labelStyle,
+                     labelSeperator,
+                     outputFeatureClass,
+                     subdivisionDepth=0):
+    '''
+    Create one Gridded Reference Graphic (GRG) for each input area, with the
+    ObjectID of the area in the ParentID field of its cells.
+    '''
+    scratch = Utilities.ScratchWorkspace()
+
+    try:
+        arcpy.env.overwriteOutput = True
+
+        if int(arcpy.GetCount_management(AOI)[0]) == 0:
+            raise Exception("The input area must contain at least one feature.")
+
+        # ObjectIDs of the input areas in cursor order, the projected copy keeps the order
+        with arcpy.da.SearchCursor(AOI, ['OID@']) as cursor:
+            sourceOIDs = [row[0] for row in cursor]
+
+        #If AOI is not in WebMercator, re-project to it
+        fc = AOI
+        if arcpy.Describe(AOI).spatialReference.name != "WGS_1984_Web_Mercator_Auxiliary_Sphere":
+            fc = scratch.name("AOI_WM")
+            arcpy.Project_management(AOI, fc, SpatialReferenceUtilities.GetSpatialReference(3857))
+        with arcpy.da.SearchCursor(fc, ['OID@']) as cursor:
+            toSourceOID = dict(zip([row[0] for row in cursor], sourceOIDs))
+
+        cellWidth, cellHeight = _cellSizeInMeters(cellWidth, cellHeight, cellUnits)
+
+        # One minimum bounding rectangle per area
+        arcpy.AddMessage("Getting Minimum Bounding Geometry of {0} areas".format(len(sourceOIDs)))
+        minBound = scratch.name("minBound")
+        arcpy.MinimumBoundingGeometry_management(fc, minBound, 'RECTANGLE_BY_AREA', 'NONE', '#', 'MBG_FIELDS')
+
+        frames, parentIDs = [], []
+        with arcpy.da.SearchCursor(minBound, ['ORIG_FID', 'MBG_Orientation', 'SHAPE@']) as cursor:
+            for origFID, orientation, shape in cursor:
+                pts = [(pt.X, pt.Y) for pt in shape.getPart(0)][0:4]
+                frames.append(_areaGridFrame(orientation, pts, cellWidth, cellHeight))
+                parentIDs.append(toSourceOID[origFID])
+
+        arcpy.AddMessage("Creating {0} grids".format(len(frames)))
+        rings, labels, cellParentIDs, levels = _batchGRGCells(frames, parentIDs, cellWidth, cellHeight,
+                                                              labelStartPos, labelStyle, labelSeperator,
+                                                              subdivisionDepth)
+        CreateGRGFeatureClass(outputFeatureClass,
+                              arcpy.Describe(fc).spatialReference,
+                              rings,
+                              labels,
+                              cellParentIDs,
+                              levels if subdivisionDepth else None)
+
+        return outputFeatureClass
+
+    except arcpy.ExecuteError:
+        # Get the tool error messages
+        msgs = arcpy.GetMessages()
+        arcpy.AddError(msgs)
+        print(msgs)
+
+    except Exception as xmsg:
+        arcpy.AddError(str(xmsg))
+
     finally:
-        try:
-            if arcpy.Exists(os.path.join(scratch, "GRG_POINT_WM")):
-                arcpy.Delete_management(point_WM)
-        except:
-            pass
+        scratch.cleanup()
+
+def BatchGRGFromPoint(starting_points,
+                      horizontal_cells,
+                      vertical_cells,
+                      cell_width,
+                      cell_height,
+                      cell_units,
+                      label_start_position,
+                      label_style,
+                      labelSeperator,
+                      gridAngle,
+                      output_feature_class,
+                      subdivisionDepth=0):
+    '''
+    Create one Gridded Reference Graphic (GRG) centered on each input point,
+    with the ObjectID of the point in the ParentID field of its cells.
+    '''
+    try:
+        arcpy.env.overwriteOutput = True
+
+        #If the points are not in WebMercator, read them in WebMercator
+        srGrid = arcpy.Describe(starting_points).spatialReference
+        if srGrid.name != "WGS_1984_Web_Mercator_Auxiliary_Sphere":
+            srGrid = SpatialReferenceUtilities.GetSpatialReference(3857) #the code for WGS84 Web Mercator
+
+        cellWidth, cellHeight = _cellSizeInMeters(cell_width, cell_height, cell_units)
+        rowCount, colCount = int(horizontal_cells), int(vertical_cells)
+
+        frames, parentIDs = [], []
+        with arcpy.da.SearchCursor(starting_points, ['OID@', 'SHAPE@XY'], spatial_reference=srGrid) as cursor:
+            for oid, (centerX, centerY) in cursor:
+                frames.append(_pointGridFrame(centerX, centerY, gridAngle,
+                                              cellWidth, cellHeight,
+                                              rowCount, colCount) + [rowCount, colCount])
+                parentIDs.append(oid)
+        if not frames:
+            raise Exception("The input start location must contain at least one feature.")
+
+        arcpy.AddMessage("Creating {0} grids".format(len(frames)))
+        rings, labels, cellParentIDs, levels = _batchGRGCells(frames, parentIDs, cellWidth, cellHeight,
+                                                              label_start_position, label_style, labelSeperator,
+                                                              subdivisionDepth)
+        CreateGRGFeatureClass(output_feature_class,
+                              srGrid,
+                              rings,
+                              labels,
+                              cellParentIDs,
+                              levels if subdivisionDepth else None)
+
+        return output_feature_class
+
+    except arcpy.ExecuteError:
+        # Get the tool error messages
+        msgs = arcpy.GetMessages()
+        arcpy.AddError(msgs)
+        print(msgs)
+
+    except Exception as xmsg:
+        arcpy.AddError(str(xmsg))
+
+def _gridIndices(xs, ys, bits):
+    '''
+    Scales coordinates to integer cells of a 2^bits square grid, with
+    row 0 at the top so curves start in the upper left
+    '''
+    xs = numpy.asarray(xs, dtype=numpy.float64)
+    ys = numpy.asarray(ys, dtype=numpy.float64)
+    span = max(xs.max() - xs.min(), ys.max() - ys.min())
+    if span <= 0.0:
+        span = 1.0
+    scale = ((1 << bits) - 1) / span
+    ix = numpy.floor((xs - xs.min()) * scale).astype(numpy.int64)
+    iy = numpy.floor((ys.max() - ys) * scale).astype(numpy.int64)
+    return [ix, iy]
+
+def ReadingOrder(xs, ys, tolerance=0.0):
+    '''
+    Orders points left to right in rows, top to bottom. Sorted by y, a gap
+    of more than tolerance starts a new row, so slightly jittered rows of
+    points read as one row.
+
+    returns array of point indices in order
+    '''
+    xs = numpy.asarray(xs, dtype=numpy.float64)
+    ys = numpy.asarray(ys, dtype=numpy.float64)
+    byY = numpy.argsort(-ys, kind='mergesort')
+    rowBreaks = numpy.diff(-ys[byY]) > float(tolerance or 0.0)
+    rowIds = numpy.empty(len(xs), dtype=numpy.int64)
+    rowIds[byY] = numpy.concatenate([[0], numpy.cumsum(rowBreaks)])
+    return numpy.lexsort((xs, rowIds))
+
+def HilbertOrder(xs, ys, bits=16):
+    '''
+    Orders points along a Hilbert curve from the upper left
+
+    returns array of point indices in order
+    '''
+    x, y = _gridIndices(xs, ys, bits)
+    n = 1 << bits
+    d = numpy.zeros(len(x), dtype=numpy.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(numpy.int64)) ^ ry.astype(numpy.int64))
+        # rotate the quadrant so the curve stays continuous
+        flip = ~ry & rx
+        x = numpy.where(flip, n - 1 - x, x)
+        y = numpy.where(flip, n - 1 - y, y)
+        x, y = numpy.where(~ry, y, x), numpy.where(~ry, x, y)
+        s >>= 1
+    return numpy.argsort(d, kind='mergesort')
+
+def ZOrder(xs, ys, bits=16):
+    '''
+    Orders points along a Z-order (Morton) curve from the upper left
+
+    returns array of point indices in order
+    '''
+    x, y = _gridIndices(xs, ys, bits)
+    code = numpy.zeros(len(x), dtype=numpy.int64)
+    for bit in range(bits):
+        code |= ((x >> bit) & 1) << (2 * bit)
+        code |= ((y >> bit) & 1) << (2 * bit + 1)
+    return numpy.argsort(code, kind='mergesort')
+
+def NearestNeighborOrder(xs, ys):
+    '''
+    Chains points from the upper left, always stepping to the closest
+    point not yet numbered
+
+    returns array of point indices in order
+    '''
+    xs = numpy.asarray(xs, dtype=numpy.float64)
+    ys = numpy.asarray(ys, dtype=numpy.float64)
+    count = len(xs)
+    order = numpy.empty(count, dtype=numpy.int64)
+    if count == 0:
+        return order
+    remaining = numpy.ones(count, dtype=bool)
+    current = ReadingOrder(xs, ys)[0]
+    for step in range(count):
+        order[step] = current
+        remaining[current] = False
+        if step == count - 1:
+            break
+        distances = (xs - xs[current]) ** 2 + (ys - ys[current]) ** 2
+        distances[~remaining] = numpy.inf
+        current = int(numpy.argmin(distances))
+    return order
+
+numberingOrders = {"Reading Order":ReadingOrder,
+                   "Hilbert Curve":HilbertOrder,
+                   "Z-Order Curve":ZOrder,
+                   "Nearest Neighbor":NearestNeighborOrder}
+
+def SpatialOrder(xs, ys, numberingOrder="Reading Order", rowTolerance=0.0):
+    '''
+    Orders points with one of the numberingOrders
+    rowTolerance - row tolerance for Reading Order, in coordinate units
+
+    returns array of point indices in order
+    '''
+    if len(xs) == 0:
+        return numpy.array([], dtype=numpy.int64)
+    if not numberingOrder:
+        numberingOrder = "Reading Order"
+    if numberingOrder not in numberingOrders:
+        raise Exception("Unknown numbering order: {0}".format(numberingOrder))
+    if numberingOrder == "Reading Order":
+        return ReadingOrder(xs, ys, rowTolerance)
+    return numberingOrders[numberingOrder](xs, ys)
+
+def SelectPointsInArea(pointFeatures, areaFeatures):
+    '''
+    Reads the points of pointFeatures that are inside any polygon of areaFeatures
+
+    pointFeatures - point features, a layer selection is honored
+    areaFeatures - polygon features
+
+    returns [oids, xs, ys] of the points inside the area
+    '''
+    spatialReference = arcpy.Describe(pointFeatures).spatialReference
+    with arcpy.da.SearchCursor(pointFeatures, ['OID@', 'SHAPE@XY']) as cursor:
+        rows = [row for row in cursor if row[1][0] is not None]
+    oids = numpy.array([row[0] for row in rows], dtype=numpy.int64)
+    xs = numpy.array([row[1][0] for row in rows], dtype=numpy.float64)
+    ys = numpy.array([row[1][1] for row in rows], dtype=numpy.float64)
+
+    inside = numpy.zeros(len(oids), dtype=bool)
+    with arcpy.da.SearchCursor(areaFeatures, ['SHAPE@'], spatial_reference=spatialReference) as cursor:
+        for row in cursor:
+            if row[0] is None:
+                continue
+            # test each polygon separately so overlapping polygons do not cancel out
+            outside = ~inside
+            inside[outside] = Utilities.pointsInRings(xs[outside], ys[outside],
+                                                      Utilities.geometryRings(row[0]))
+    return [oids[inside], xs[inside], ys[inside]]
 
 def NumberFeatures(areaToNumber,
                     pointFeatures,
                     numberingField,
-                    outputFeatureClass):
+                    outputFeatureClass,
+                    numberingOrder="Reading Order",
+                    rowTolerance=0.0):
 
         descPointFeatures = arcpy.Describe(pointFeatures)
         arcpy.AddMessage("pointFeatures: {0}".format(descPointFeatures.catalogPath))
 
-        # If no output FC is specified, then set it a temporary one, as this will be copied to the input and then deleted.
+        # If no output FC is specified, the input features are numbered
+        scratch = Utilities.ScratchWorkspace()
         overwriteFC = False
         if not outputFeatureClass:
-            DEFAULT_OUTPUT_LOCATION = r'%scratchGDB%\tempSortedPoints'
-            outputFeatureClass = DEFAULT_OUTPUT_LOCATION
             overwriteFC = True
         else:
             descOutputFeatureClass = arcpy.Describe(outputFeatureClass)
             arcpy.AddMessage("outputFeatureClass: {0}".format(descOutputFeatureClass.catalogPath))
 
-        # Sort layer by upper right across and then down spatially
-        areaToNumberInMemory = os.path.join("in_memory","areaToNumber")
+        # Copy the area so feature sets can be read
+        areaToNumberInMemory = scratch.name("areaToNumber")
         arcpy.CopyFeatures_management(areaToNumber, areaToNumberInMemory)
         areaToNumber = areaToNumberInMemory
 
-        DEBUG = True
-        appEnvironment = None
-        mxd, df, aprx, mp, mapList = None, None, None, None, None
-        pointFeatureName = os.path.basename(str(pointFeatures))
-        layerExists = False
         try:
             # Check that area to number is a polygon
             descArea = arcpy.Describe(areaToNumber)
@@ -883,106 +981,65 @@ def NumberFeatures(areaToNumber,
             if (descArea.shapeType != "Polygon"):
                 raise Exception("ERROR: The area to number must be a polygon.")
 
-            #Checking the version of the Desktop Application
-            appEnvironment = Utilities.GetApplication()
-            if DEBUG == True: arcpy.AddMessage("App environment: " + appEnvironment)
-
-            #Getting the layer name from the Table of Contents
-            if appEnvironment == Utilities.PLATFORM_PRO:
-                from arcpy import mp
-                aprx = arcpy.mp.ArcGISProject("CURRENT")
-                mapList = aprx.listMaps()[0]
-                for lyr in mapList.listLayers():
-                    if lyr.name == pointFeatureName:
-                        layerExists = True
-            #else:
-            if appEnvironment == Utilities.PLATFORM_DESKTOP:
-                from arcpy import mapping
-                mxd = arcpy.mapping.MapDocument('CURRENT')
-                df = arcpy.mapping.ListDataFrames(mxd)[0]
-                for lyr in arcpy.mapping.ListLayers(mxd):
-                    if lyr.name == pointFeatureName:
-                        layerExists = True
-
-            if layerExists == False:
-                arcpy.MakeFeatureLayer_management(pointFeatures, pointFeatureName)
-            else:
-                pointFeatureName = pointFeatures
-
-            # Select all the points that are inside of area
-            if areaToNumber:
-                arcpy.AddMessage("Selecting points from {0} inside of the area {1}".format(pointFeatureName, areaToNumber))
-            else:
-                arcpy.AddMessage("Selecting points from {0} inside of the area {1}".format(pointFeatureName, areaToNumber.name))
+            # Read the points that are inside of area
+            arcpy.AddMessage("Selecting points from {0} inside of the area".format(os.path.basename(str(pointFeatures))))
+            oids, xs, ys = SelectPointsInArea(pointFeatures, areaToNumber)
+            arcpy.AddMessage("Selected {0} points".format(len(oids)))
 
-            selectionLayer = arcpy.SelectLayerByLocation_management(pointFeatureName, "INTERSECT",
-                                                                    areaToNumber, "#", "NEW_SELECTION")
-            if DEBUG == True:
-                arcpy.AddMessage("Selected " + str(arcpy.GetCount_management(pointFeatureName).getOutput(0)) + " points")
+            arcpy.AddMessage("Ordering the selected points by {0}".format(numberingOrder))
+            order = SpatialOrder(xs, ys, numberingOrder, rowTolerance)
+            numbers = dict((int(oids[index]), number) for number, index in enumerate(order, 1))
 
-            arcpy.AddMessage("Sorting the selected points geographically, left to right, top to bottom")
-            arcpy.Sort_management(pointFeatureName, outputFeatureClass, [["Shape", "ASCENDING"]])
+            if overwriteFC:
+                # Number the input in place
+                if hasattr(descPointFeatures, "layer"):
+                    numberTarget = descPointFeatures.layer.catalogPath
+                else:
+                    numberTarget = descPointFeatures.catalogPath
+            else:
+                # Copy the selected points to the output
+                numberTarget = str(outputFeatureClass)
+                arcpy.CreateFeatureclass_management(os.path.dirname(numberTarget),
+                                                    os.path.basename(numberTarget),
+                                                    "POINT",
+                                                    pointFeatures,
+                                                    "SAME_AS_TEMPLATE",
+                                                    "SAME_AS_TEMPLATE",
+                                                    descPointFeatures.spatialReference)
+                scratch.clearFieldNames(numberTarget)
+                targetFields = scratch.fieldNames(numberTarget)
+                copyFields = [f.name for f in arcpy.ListFields(pointFeatures)
+                              if f.editable and f.type not in ["OID", "Geometry"]
+                              and f.name in targetFields]
+                arcpy.AddMessage("Copying {0} points to the output".format(len(numbers)))
+                insertedNumbers = []
+                with arcpy.da.SearchCursor(pointFeatures, ['OID@', 'SHAPE@'] + copyFields) as inRows:
+                    with arcpy.da.InsertCursor(numberTarget, ['SHAPE@'] + copyFields) as outRows:
+                        for inRow in inRows:
+                            if inRow[0] in numbers:
+                                outRows.insertRow(inRow[1:])
+                                insertedNumbers.append(numbers[inRow[0]])
+                # output ObjectIDs follow the insert order
+                with arcpy.da.SearchCursor(numberTarget, ['OID@']) as cursor:
+                    numbers = dict(zip([row[0] for row in cursor], insertedNumbers))
 
             #global numberingField
             if numberingField is None or numberingField == "":
-                fnames = [field.name for field in arcpy.ListFields(outputFeatureClass)]
-                addfield = "Number"
-                if addfield in fnames:
+                numberingField = "Number"
+                if numberingField in scratch.fieldNames(numberTarget):
                     arcpy.AddMessage("Number field is already used")
-                    numberingField = "Number"
                 else:
-                    arcpy.AddMessage("Add One")
                     arcpy.AddMessage("Adding Number field because no input field was given")
-                    arcpy.AddField_management(outputFeatureClass,"Number","SHORT")
-                    numberingField = "Number"
-            else:
-                pass
+                    arcpy.AddField_management(numberTarget, numberingField, "SHORT")
+                    scratch.clearFieldNames(numberTarget)
 
-            # Number the fields
+            # Number the fields in one pass
             arcpy.AddMessage("Numbering the fields")
-            i = 1
-            cursor = arcpy.UpdateCursor(outputFeatureClass) # Object: Error in parsing arguments for UpdateCursor
-            for row in cursor:
-                row.setValue(numberingField, i)
-                cursor.updateRow(row)
-                i += 1
-            # Clear the selection
-            arcpy.AddMessage("Clearing the selection")
-            arcpy.SelectLayerByAttribute_management(pointFeatureName, "CLEAR_SELECTION")
-
-            # Overwrite the Input Point Features, and then delete the temporary output feature class
-            targetLayerName = ""
-            if (overwriteFC):
-                arcpy.AddMessage("Copying the features to the input, and then deleting the temporary feature class")
-                desc = arcpy.Describe(pointFeatures)
-                if hasattr(desc, "layer"):
-                    overwriteFC = desc.layer.catalogPath
-                else:
-                    overwriteFC = desc.catalogPath
-
-                arcpy.AddMessage("what is the numberingField: " + str(numberingField))
-                addfield = "Number"
-                fnames1 = [field.name for field in arcpy.ListFields(overwriteFC)]
-                if addfield in fnames1:
-                    arcpy.AddMessage("Number field is already used")
-                else:
-                    arcpy.AddMessage("Adding Number field to overwriteFC due to no input field")
-                    arcpy.AddField_management(overwriteFC,"Number")
-                    arcpy.AddMessage("Added Number field to overwriteFC")
-
-                fields = (str(numberingField), "SHAPE@")
-
-                overwriteCursor = arcpy.da.UpdateCursor(overwriteFC, fields)
-                for overwriteRow in overwriteCursor:
-                    sortedPointsCursor = arcpy.da.SearchCursor(outputFeatureClass, fields)
-                    for sortedRow in sortedPointsCursor:
-                        if sortedRow[1].equals(overwriteRow[1]):
-                            overwriteRow[0] = sortedRow[0]
-                    overwriteCursor.updateRow(overwriteRow)
-                arcpy.Delete_management(outputFeatureClass)
-                targetLayerName = pointFeatureName
-            else:
-                targetLayerName = os.path.basename(str(outputFeatureClass))
+            with arcpy.da.UpdateCursor(numberTarget, ['OID@', str(numberingField)]) as cursor:
+                for row in cursor:
+                    if row[0] in numbers:
+                        row[1] = numbers[row[0]]
+                        cursor.updateRow(row)
 
             # Workaround: don't set the outputFeatureClass if none was supplied to the tool
             if overwriteFC:
@@ -1011,4 +1068,7 @@ def NumberFeatures(areaToNumber,
             print(pymsg + "\n")
             print(msgs)
 
+        finally:
+            scratch.cleanup()
+
         return outputFeatureClass
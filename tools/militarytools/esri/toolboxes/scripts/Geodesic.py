@@ -0,0 +1,563 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2018 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ Geodesic.py
+ --------------------------------------------------
+ requirements: Python 2.7 or Python 3.4, NumPy
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ Vectorized direct and inverse problems on the WGS84 ellipsoid for the
+ line types of BearingDistanceToLine and XYToLine: from arrays of
+ origins, bearings and distances, or of start and end points, find the
+ end points, bearings and distances, or the densified vertices of each
+ line for bulk insertion, and the outlines of geodesic ellipses. Does
+ not need arcpy.
+
+ * GEODESIC: Vincenty's direct and inverse formulas
+ * GREAT_CIRCLE: great elliptic arc, the section of the ellipsoid by the
+   plane through its center, the origin and the bearing
+ * NORMAL_SECTION: the section by the plane holding the ellipsoid normal
+   at the origin and the bearing
+ * RHUMB_LINE: loxodrome, through the meridian arc length and the
+   isometric latitude
+
+ Longitudes along a line are continuous, so lines crossing 180 degrees
+ may have longitudes past +/-180.
+ ==================================================
+'''
+
+# IMPORTS ==========================================
+import numpy
+
+# LOCALS ===========================================
+lineTypes = ["GEODESIC", "GREAT_CIRCLE", "RHUMB_LINE", "NORMAL_SECTION"]
+degreesPerBearingUnit = {"DEGREES":1.0,
+                         "MILS":360.0 / 6400.0,
+                         "RADS":180.0 / numpy.pi,
+                         "RADIANS":180.0 / numpy.pi,
+                         "GRAD":0.9,
+                         "GRADS":0.9} # bearing unit:degrees per unit
+
+# WGS84
+semiMajorAxis = 6378137.0
+flattening = 1.0 / 298.257223563
+semiMinorAxis = semiMajorAxis * (1.0 - flattening)
+eccentricitySquared = flattening * (2.0 - flattening)
+
+defaultVertexSpacing = 10000.0 # meters between densified vertices
+maxLineVertices = 1000
+maxVincentyIterations = 100
+planeSectionSamples = 1024 # chord directions sampled along each plane section
+planeSectionInverseSamples = 128 # chord directions sampled for each inverse, then extrapolated
+planeSectionChunk = 256 # lines solved together, bounds the sample arrays
+ellipseVertexSpacing = 1000.0 # meters between ellipse vertices
+minEllipseVertices = 90
+maxEllipseVertices = 3600
+
+# meridian arc series in the third flattening n
+_n = flattening / (2.0 - flattening)
+_meridianScale = semiMajorAxis / (1.0 + _n) * (1.0 + _n ** 2 / 4.0 + _n ** 4 / 64.0)
+_meridianTerms = [-3.0 * _n / 2.0 + 9.0 * _n ** 3 / 16.0,
+                  15.0 * _n ** 2 / 16.0 - 15.0 * _n ** 4 / 32.0,
+                  -35.0 * _n ** 3 / 48.0,
+                  315.0 * _n ** 4 / 512.0] # sin(2kφ) coefficients of the arc length
+_rectifyingTerms = [3.0 * _n / 2.0 - 27.0 * _n ** 3 / 32.0,
+                    21.0 * _n ** 2 / 16.0 - 55.0 * _n ** 4 / 32.0,
+                    151.0 * _n ** 3 / 96.0,
+                    1097.0 * _n ** 4 / 512.0] # sin(2kμ) coefficients of the latitude
+
+# FUNCTIONS ========================================
+def BearingsToDegrees(bearings, bearingUnits="DEGREES"):
+    '''
+    Converts bearings to degrees clockwise from north
+
+    bearingUnits - DEGREES, MILS, RADS or GRAD
+
+    returns a float64 array, raises ValueError for unknown units
+    '''
+    key = str(bearingUnits).upper()
+    if key not in degreesPerBearingUnit:
+        raise ValueError("Unknown bearing unit: {0}".format(bearingUnits))
+    return numpy.asarray(bearings, dtype=numpy.float64) * degreesPerBearingUnit[key]
+
+def _checkLineType(lineType):
+    ''' Raises ValueError for line types other than lineTypes '''
+    if lineType not in lineTypes:
+        raise ValueError("Unknown line type: {0}".format(lineType))
+
+def _geodesicDirect(lons, lats, azimuths, distances):
+    ''' Vincenty's direct formula, angles in radians, returns [lons, lats] in radians '''
+    sinAlpha1 = numpy.sin(azimuths)
+    cosAlpha1 = numpy.cos(azimuths)
+    tanU1 = (1.0 - flattening) * numpy.tan(lats)
+    cosU1 = 1.0 / numpy.sqrt(1.0 + tanU1 * tanU1)
+    sinU1 = tanU1 * cosU1
+    sigma1 = numpy.arctan2(tanU1, cosAlpha1)
+    sinAlpha = cosU1 * sinAlpha1
+    cosSqAlpha = 1.0 - sinAlpha * sinAlpha
+    uSq = cosSqAlpha * (semiMajorAxis ** 2 - semiMinorAxis ** 2) / semiMinorAxis ** 2
+    a = 1.0 + uSq / 16384.0 * (4096.0 + uSq * (-768.0 + uSq * (320.0 - 175.0 * uSq)))
+    b = uSq / 1024.0 * (256.0 + uSq * (-128.0 + uSq * (74.0 - 47.0 * uSq)))
+
+    sigma = distances / (semiMinorAxis * a)
+    for iteration in range(maxVincentyIterations):
+        cos2SigmaM = numpy.cos(2.0 * sigma1 + sigma)
+        sinSigma = numpy.sin(sigma)
+        cosSigma = numpy.cos(sigma)
+        deltaSigma = b * sinSigma * (cos2SigmaM + b / 4.0 * (cosSigma * (-1.0 + 2.0 * cos2SigmaM ** 2)
+                     - b / 6.0 * cos2SigmaM * (-3.0 + 4.0 * sinSigma ** 2) * (-3.0 + 4.0 * cos2SigmaM ** 2)))
+        nextSigma = distances / (semiMinorAxis * a) + deltaSigma
+        converged = numpy.all(numpy.abs(nextSigma - sigma) < 1e-12)
+        sigma = nextSigma
+        if converged:
+            break
+    cos2SigmaM = numpy.cos(2.0 * sigma1 + sigma)
+    sinSigma = numpy.sin(sigma)
+    cosSigma = numpy.cos(sigma)
+
+    x = sinU1 * sinSigma - cosU1 * cosSigma * cosAlpha1
+    lats2 = numpy.arctan2(sinU1 * cosSigma + cosU1 * sinSigma * cosAlpha1,
+                          (1.0 - flattening) * numpy.sqrt(sinAlpha * sinAlpha + x * x))
+    lambdas = numpy.arctan2(sinSigma * sinAlpha1, cosU1 * cosSigma - sinU1 * sinSigma * cosAlpha1)
+    c = flattening / 16.0 * cosSqAlpha * (4.0 + flattening * (4.0 - 3.0 * cosSqAlpha))
+    deltaLons = lambdas - (1.0 - c) * flattening * sinAlpha * (sigma + c * sinSigma
+                * (cos2SigmaM + c * cosSigma * (-1.0 + 2.0 * cos2SigmaM ** 2)))
+    return [lons + deltaLons, lats2]
+
+def _meridianArc(lats):
+    ''' Meridian arc length from the equator, latitudes in radians '''
+    arc = lats.copy()
+    for k, term in enumerate(_meridianTerms):
+        arc += term * numpy.sin(2.0 * (k + 1) * lats)
+    return _meridianScale * arc
+
+def _latitudeFromArc(arcs):
+    ''' Latitude in radians at a meridian arc length '''
+    mu = arcs / _meridianScale
+    lats = mu.copy()
+    for k, term in enumerate(_rectifyingTerms):
+        lats += term * numpy.sin(2.0 * (k + 1) * mu)
+    return lats
+
+def _isometricLatitude(lats):
+    ''' Isometric latitude of latitudes in radians '''
+    e = numpy.sqrt(eccentricitySquared)
+    return numpy.arcsinh(numpy.tan(lats)) - e * numpy.arctanh(e * numpy.sin(lats))
+
+def _rhumbDirect(lons, lats, azimuths, distances):
+    ''' Loxodrome direct problem, angles in radians, returns [lons, lats] in radians '''
+    quarterMeridian = _meridianArc(numpy.array([numpy.pi / 2.0]))[0]
+    arcs1 = _meridianArc(lats)
+    # lines that would run past a pole stop at it
+    arcs2 = numpy.clip(arcs1 + distances * numpy.cos(azimuths), -quarterMeridian, quarterMeridian)
+    lats2 = numpy.clip(_latitudeFromArc(arcs2), -numpy.pi / 2.0, numpy.pi / 2.0)
+    deltaArcs = arcs2 - arcs1
+    northing = numpy.abs(deltaArcs) > 1e-9
+    # dψ/dM is 1 / (N cos φ) on east-west lines
+    sinLats = numpy.sin(lats)
+    primeVertical = semiMajorAxis / numpy.sqrt(1.0 - eccentricitySquared * sinLats * sinLats)
+    psiPerArc = numpy.where(northing,
+                            (_isometricLatitude(lats2) - _isometricLatitude(lats)) / numpy.where(northing, deltaArcs, 1.0),
+                            1.0 / (primeVertical * numpy.cos(lats)))
+    return [lons + distances * numpy.sin(azimuths) * psiPerArc, lats2]
+
+def _toCartesian(lons, lats):
+    ''' Earth centered coordinates of surface points, angles in radians, shape (..., 3) '''
+    sinLats = numpy.sin(lats)
+    cosLats = numpy.cos(lats)
+    primeVertical = semiMajorAxis / numpy.sqrt(1.0 - eccentricitySquared * sinLats * sinLats)
+    return numpy.stack([primeVertical * cosLats * numpy.cos(lons),
+                        primeVertical * cosLats * numpy.sin(lons),
+                        primeVertical * (1.0 - eccentricitySquared) * sinLats], axis=-1)
+
+def _fromCartesian(points):
+    ''' Longitudes and latitudes in radians of earth centered surface points '''
+    lons = numpy.arctan2(points[..., 1], points[..., 0])
+    lats = numpy.arctan2(points[..., 2], numpy.hypot(points[..., 0], points[..., 1]) * (1.0 - eccentricitySquared))
+    return [lons, lats]
+
+def _planeSectionFrames(lons, lats, azimuths, lineType):
+    '''
+    Earth centered origins of plane sections and the unit vectors of their
+    planes: forward along the bearing, and inward, perpendicular to it
+    toward the ellipsoid (the center for GREAT_CIRCLE, the normal for
+    NORMAL_SECTION); angles in radians
+
+    returns [origins, forward, inward], each shaped (lines, 3)
+    '''
+    lineCount = len(lons)
+    sinLons, cosLons = numpy.sin(lons), numpy.cos(lons)
+    sinLats, cosLats = numpy.sin(lats), numpy.cos(lats)
+    origins = _toCartesian(lons, lats)
+    east = numpy.stack([-sinLons, cosLons, numpy.zeros(lineCount)], axis=-1)
+    north = numpy.stack([-sinLats * cosLons, -sinLats * sinLons, cosLats], axis=-1)
+    normals = numpy.stack([cosLats * cosLons, cosLats * sinLons, sinLats], axis=-1)
+    forward = numpy.sin(azimuths)[:, None] * east + numpy.cos(azimuths)[:, None] * north
+    inward = -normals if lineType == "NORMAL_SECTION" else -origins
+    inward = inward - numpy.sum(inward * forward, axis=-1)[:, None] * forward
+    inward /= numpy.linalg.norm(inward, axis=-1)[:, None]
+    return [origins, forward, inward]
+
+def _sectionPoints(origins, forward, inward, angles):
+    ''' Second intersection with the ellipsoid of the chords at angles (lines, samples) from the bearing '''
+    scale = numpy.array([1.0 / semiMajorAxis, 1.0 / semiMajorAxis, 1.0 / semiMinorAxis])
+    directions = numpy.cos(angles)[..., None] * forward[:, None, :] + numpy.sin(angles)[..., None] * inward[:, None, :]
+    scaled = directions * scale
+    chords = -2.0 * numpy.sum((origins * scale)[:, None, :] * scaled, axis=-1) / numpy.sum(scaled * scaled, axis=-1)
+    return origins[:, None, :] + chords[..., None] * directions
+
+def _planeSectionDirect(lons, lats, azimuths, distanceRows, lineType):
+    '''
+    Points along the plane sections through each origin and bearing.
+    The section is sampled by chord direction from the origin, the
+    cumulative chord length gives the arc length, and each distance is
+    interpolated back to a chord direction and intersected exactly.
+
+    lons, lats, azimuths - one per line, in radians
+    distanceRows - (lines, points) distances along each line
+
+    returns [lons, lats] in radians, shaped like distanceRows
+    '''
+    lineCount = len(lons)
+    origins, forward, inward = _planeSectionFrames(lons, lats, azimuths, lineType)
+
+    # chord angle is about half the arc angle; sample a little past the longest distance
+    longest = distanceRows.max(axis=1) if distanceRows.size else numpy.zeros(lineCount)
+    maxAngles = numpy.minimum(numpy.pi, 1.05 * longest / (2.0 * semiMinorAxis ** 2 / semiMajorAxis) + 1e-9)
+    angles = maxAngles[:, None] * numpy.linspace(0.0, 1.0, planeSectionSamples + 1)[None, :]
+    samples = _sectionPoints(origins, forward, inward, angles)
+    arcs = numpy.concatenate([numpy.zeros((lineCount, 1)),
+                              numpy.cumsum(numpy.linalg.norm(numpy.diff(samples, axis=1), axis=-1), axis=1)], axis=1)
+    # chord sums fall short of the arc by the square of the sample spacing, so
+    # extrapolate from every other sample and interpolate between those
+    coarseArcs = numpy.concatenate([numpy.zeros((lineCount, 1)), numpy.cumsum(
+        numpy.linalg.norm(numpy.diff(samples[:, ::2], axis=1), axis=-1), axis=1)], axis=1)
+    angles = angles[:, ::2]
+    arcs = arcs[:, ::2] + (arcs[:, ::2] - coarseArcs) / 3.0
+
+    # offset each line's arcs so one searchsorted covers all lines
+    offsets = (numpy.arange(lineCount) * (arcs[:, -1].max() + 1.0 if lineCount else 0.0))[:, None]
+    flatArcs = (arcs + offsets).ravel()
+    targets = numpy.minimum(distanceRows, arcs[:, -1:]) + offsets
+    upper = numpy.clip(numpy.searchsorted(flatArcs, targets.ravel()), 1, flatArcs.size - 1).reshape(targets.shape)
+    rowLength = angles.shape[1]
+    rowStarts = (numpy.arange(lineCount) * rowLength)[:, None]
+    upper = numpy.clip(upper, rowStarts + 1, rowStarts + rowLength - 1)
+    flatAngles = angles.ravel()
+    span = flatArcs[upper] - flatArcs[upper - 1]
+    weights = (targets - flatArcs[upper - 1]) / numpy.where(span > 0, span, 1.0)
+    pointAngles = flatAngles[upper - 1] + weights * (flatAngles[upper] - flatAngles[upper - 1])
+    points = _sectionPoints(origins, forward, inward, pointAngles)
+    # the origin itself is a tangent chord of zero length
+    points = numpy.where((distanceRows <= 0)[..., None], origins[:, None, :], points)
+    pointLons, pointLats = _fromCartesian(points)
+    # keep longitudes continuous from the origin
+    pointLons = lons[:, None] + numpy.angle(numpy.exp(1j * (pointLons - lons[:, None])))
+    pointLons = numpy.concatenate([pointLons[:, :1], pointLons[:, :1] + numpy.cumsum(
+        numpy.angle(numpy.exp(1j * numpy.diff(pointLons, axis=1))), axis=1)], axis=1)
+    return [pointLons, pointLats]
+
+def _planeSections(lons, lats, azimuths, distanceRows, lineType):
+    ''' _planeSectionDirect over blocks of planeSectionChunk lines '''
+    blocks = [_planeSectionDirect(lons[start:start + planeSectionChunk], lats[start:start + planeSectionChunk],
+                                  azimuths[start:start + planeSectionChunk],
+                                  distanceRows[start:start + planeSectionChunk], lineType)
+              for start in range(0, len(lons), planeSectionChunk)]
+    if not blocks:
+        return [numpy.zeros(distanceRows.shape), numpy.zeros(distanceRows.shape)]
+    return [numpy.concatenate([block[0] for block in blocks]), numpy.concatenate([block[1] for block in blocks])]
+
+def _geodesicInverse(lons1, lats1, lons2, lats2):
+    '''
+    Vincenty's inverse formula, angles in radians. Nearly antipodal
+    points, where the iteration does not converge, are flagged so
+    another solution can be used for them.
+
+    returns [azimuths, distances, converged]
+    '''
+    deltaLons = numpy.angle(numpy.exp(1j * (lons2 - lons1)))
+    tanU1 = (1.0 - flattening) * numpy.tan(lats1)
+    cosU1 = 1.0 / numpy.sqrt(1.0 + tanU1 * tanU1)
+    sinU1 = tanU1 * cosU1
+    tanU2 = (1.0 - flattening) * numpy.tan(lats2)
+    cosU2 = 1.0 / numpy.sqrt(1.0 + tanU2 * tanU2)
+    sinU2 = tanU2 * cosU2
+
+    lambdas = deltaLons.copy()
+    converged = numpy.zeros(lambdas.shape, dtype=bool)
+    for iteration in range(maxVincentyIterations):
+        sinLambda, cosLambda = numpy.sin(lambdas), numpy.cos(lambdas)
+        sinSigma = numpy.hypot(cosU2 * sinLambda, cosU1 * sinU2 - sinU1 * cosU2 * cosLambda)
+        cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLambda
+        sigma = numpy.arctan2(sinSigma, cosSigma)
+        sinAlpha = numpy.where(sinSigma > 0, cosU1 * cosU2 * sinLambda / numpy.where(sinSigma > 0, sinSigma, 1.0), 0.0)
+        cosSqAlpha = 1.0 - sinAlpha * sinAlpha
+        # on the equator cos2SigmaM is not used
+        cos2SigmaM = numpy.where(cosSqAlpha > 0,
+                                 cosSigma - 2.0 * sinU1 * sinU2 / numpy.where(cosSqAlpha > 0, cosSqAlpha, 1.0), 0.0)
+        c = flattening / 16.0 * cosSqAlpha * (4.0 + flattening * (4.0 - 3.0 * cosSqAlpha))
+        nextLambdas = deltaLons + (1.0 - c) * flattening * sinAlpha * (sigma + c * sinSigma
+                      * (cos2SigmaM + c * cosSigma * (-1.0 + 2.0 * cos2SigmaM ** 2)))
+        converged = numpy.abs(nextLambdas - lambdas) < 1e-12
+        lambdas = nextLambdas
+        if converged.all():
+            break
+    converged &= numpy.abs(lambdas) <= numpy.pi
+
+    sinLambda, cosLambda = numpy.sin(lambdas), numpy.cos(lambdas)
+    sinSigma = numpy.hypot(cosU2 * sinLambda, cosU1 * sinU2 - sinU1 * cosU2 * cosLambda)
+    cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLambda
+    sigma = numpy.arctan2(sinSigma, cosSigma)
+    uSq = cosSqAlpha * (semiMajorAxis ** 2 - semiMinorAxis ** 2) / semiMinorAxis ** 2
+    a = 1.0 + uSq / 16384.0 * (4096.0 + uSq * (-768.0 + uSq * (320.0 - 175.0 * uSq)))
+    b = uSq / 1024.0 * (256.0 + uSq * (-128.0 + uSq * (74.0 - 47.0 * uSq)))
+    deltaSigma = b * sinSigma * (cos2SigmaM + b / 4.0 * (cosSigma * (-1.0 + 2.0 * cos2SigmaM ** 2)
+                 - b / 6.0 * cos2SigmaM * (-3.0 + 4.0 * sinSigma ** 2) * (-3.0 + 4.0 * cos2SigmaM ** 2)))
+    distances = semiMinorAxis * a * (sigma - deltaSigma)
+    azimuths = numpy.arctan2(cosU2 * sinLambda, cosU1 * sinU2 - sinU1 * cosU2 * cosLambda)
+    return [azimuths, distances, converged]
+
+def _rhumbInverse(lons1, lats1, lons2, lats2):
+    ''' Loxodrome inverse problem, angles in radians, returns [azimuths, distances] '''
+    deltaLons = numpy.angle(numpy.exp(1j * (lons2 - lons1)))
+    deltaPsis = _isometricLatitude(lats2) - _isometricLatitude(lats1)
+    deltaArcs = _meridianArc(lats2) - _meridianArc(lats1)
+    northing = numpy.abs(deltaPsis) > 1e-12
+    # dM/dψ is N cos φ on east-west lines
+    sinLats = numpy.sin(lats1)
+    primeVertical = semiMajorAxis / numpy.sqrt(1.0 - eccentricitySquared * sinLats * sinLats)
+    arcPerPsi = numpy.where(northing, deltaArcs / numpy.where(northing, deltaPsis, 1.0),
+                            primeVertical * numpy.cos(lats1))
+    return [numpy.arctan2(deltaLons, deltaPsis), numpy.hypot(deltaLons, deltaPsis) * numpy.abs(arcPerPsi)]
+
+def _planeSectionInverse(lons1, lats1, lons2, lats2, lineType):
+    '''
+    Bearings and arc lengths of the plane sections from each start point
+    through its end point, angles in radians. The arc length is the
+    chord length of the section sampled by chord direction, as in
+    _planeSectionDirect, with Richardson extrapolation from every
+    other sample, so fewer samples are needed.
+
+    returns [azimuths, distances]
+    '''
+    lineCount = len(lons1)
+    sinLons, cosLons = numpy.sin(lons1), numpy.cos(lons1)
+    sinLats, cosLats = numpy.sin(lats1), numpy.cos(lats1)
+    origins = _toCartesian(lons1, lats1)
+    chords = _toCartesian(lons2, lats2) - origins
+    east = numpy.stack([-sinLons, cosLons, numpy.zeros(lineCount)], axis=-1)
+    north = numpy.stack([-sinLats * cosLons, -sinLats * sinLons, cosLats], axis=-1)
+    normals = numpy.stack([cosLats * cosLons, cosLats * sinLons, sinLats], axis=-1)
+    # the section plane holds the chord and the center or the normal, its
+    # tangent at the start is perpendicular to both plane and surface normals
+    planeNormals = numpy.cross(normals if lineType == "NORMAL_SECTION" else origins, chords)
+    tangents = numpy.cross(planeNormals, normals)
+    azimuths = numpy.arctan2(numpy.sum(tangents * east, axis=-1), numpy.sum(tangents * north, axis=-1))
+
+    origins, forward, inward = _planeSectionFrames(lons1, lats1, azimuths, lineType)
+    chordAngles = numpy.arctan2(numpy.sum(chords * inward, axis=-1), numpy.sum(chords * forward, axis=-1))
+    angles = chordAngles[:, None] * numpy.linspace(0.0, 1.0, planeSectionInverseSamples + 1)[None, :]
+    samples = _sectionPoints(origins, forward, inward, angles)
+    distances = numpy.linalg.norm(numpy.diff(samples, axis=1), axis=-1).sum(axis=1)
+    # chord sums fall short of the arc by the square of the sample spacing
+    coarseDistances = numpy.linalg.norm(numpy.diff(samples[:, ::2], axis=1), axis=-1).sum(axis=1)
+    distances += (distances - coarseDistances) / 3.0
+    # the same point has no chord to follow
+    distances = numpy.where(numpy.linalg.norm(chords, axis=-1) > 1e-6, distances, 0.0)
+    return [azimuths, distances]
+
+def _planeSectionInverses(lons1, lats1, lons2, lats2, lineType):
+    ''' _planeSectionInverse over blocks of planeSectionChunk lines '''
+    blocks = [_planeSectionInverse(lons1[start:start + planeSectionChunk], lats1[start:start + planeSectionChunk],
+                                   lons2[start:start + planeSectionChunk], lats2[start:start + planeSectionChunk],
+                                   lineType)
+              for start in range(0, len(lons1), planeSectionChunk)]
+    if not blocks:
+        return [numpy.zeros(0), numpy.zeros(0)]
+    return [numpy.concatenate([block[0] for block in blocks]), numpy.concatenate([block[1] for block in blocks])]
+
+def Inverse(lons1, lats1, lons2, lats2, lineType="GEODESIC"):
+    '''
+    Solves the inverse problem for arrays of start and end points
+
+    lons1, lats1 - start points in decimal degrees
+    lons2, lats2 - end points in decimal degrees
+    lineType - one of lineTypes; GEODESIC lines between nearly antipodal
+               points, which Vincenty's formula does not solve, follow
+               the great elliptic arc
+
+    returns [bearings, distances], bearings in degrees clockwise from
+    north at the start point, distances in meters
+    '''
+    _checkLineType(lineType)
+    lons1, lats1, lons2, lats2 = [numpy.radians(array.ravel()) for array in numpy.broadcast_arrays(
+        numpy.asarray(lons1, dtype=numpy.float64), numpy.asarray(lats1, dtype=numpy.float64),
+        numpy.asarray(lons2, dtype=numpy.float64), numpy.asarray(lats2, dtype=numpy.float64))]
+    if lineType == "GEODESIC":
+        azimuths, distances, converged = _geodesicInverse(lons1, lats1, lons2, lats2)
+        if not converged.all():
+            unsolved = ~converged
+            azimuths[unsolved], distances[unsolved] = _planeSectionInverses(
+                lons1[unsolved], lats1[unsolved], lons2[unsolved], lats2[unsolved], "GREAT_CIRCLE")
+    elif lineType == "RHUMB_LINE":
+        azimuths, distances = _rhumbInverse(lons1, lats1, lons2, lats2)
+    else:
+        azimuths, distances = _planeSectionInverses(lons1, lats1, lons2, lats2, lineType)
+    return [numpy.degrees(azimuths) % 360.0, distances]
+
+def Direct(lons, lats, bearings, distances, lineType="GEODESIC", bearingUnits="DEGREES"):
+    '''
+    Solves the direct problem for arrays of origins, bearings and distances
+
+    lons, lats - origins in decimal degrees
+    bearings - clockwise from north, in bearingUnits
+    distances - meters
+    lineType - one of lineTypes
+
+    returns [lons, lats] of the end points in decimal degrees
+    '''
+    _checkLineType(lineType)
+    lons, lats, azimuths, distances = numpy.broadcast_arrays(
+        numpy.radians(numpy.asarray(lons, dtype=numpy.float64)),
+        numpy.radians(numpy.asarray(lats, dtype=numpy.float64)),
+        numpy.radians(BearingsToDegrees(bearings, bearingUnits)),
+        numpy.asarray(distances, dtype=numpy.float64))
+    if lineType == "GEODESIC":
+        endLons, endLats = _geodesicDirect(lons, lats, azimuths, distances)
+    elif lineType == "RHUMB_LINE":
+        endLons, endLats = _rhumbDirect(lons, lats, azimuths, distances)
+    else:
+        shape = lons.shape
+        endLons, endLats = _planeSections(lons.ravel(), lats.ravel(), azimuths.ravel(),
+                                               distances.reshape(-1, 1), lineType)
+        endLons, endLats = endLons.reshape(shape), endLats.reshape(shape)
+    return [numpy.degrees(endLons), numpy.degrees(endLats)]
+
+def LineVertices(lons, lats, bearings, distances, lineType="GEODESIC", bearingUnits="DEGREES",
+                 vertexSpacing=defaultVertexSpacing, maxVertices=maxLineVertices):
+    '''
+    Densified vertices of lines from origins, bearings and distances, all
+    lines solved together
+
+    lons, lats - origins in decimal degrees
+    bearings - clockwise from north, in bearingUnits
+    distances - meters
+    lineType - one of lineTypes
+    vertexSpacing - most meters between vertices, up to maxVertices per line
+
+    returns a list with one (vertices, 2) array of longitude, latitude
+    per line, from the origin to the end point
+    '''
+    _checkLineType(lineType)
+    lons, lats, bearings, distances = [array.ravel() for array in numpy.broadcast_arrays(
+        numpy.asarray(lons, dtype=numpy.float64), numpy.asarray(lats, dtype=numpy.float64),
+        BearingsToDegrees(bearings, bearingUnits), numpy.asarray(distances, dtype=numpy.float64))]
+    if lons.size == 0:
+        return []
+    segmentCounts = numpy.clip(numpy.ceil(numpy.abs(distances) / vertexSpacing), 1, maxVertices - 1).astype(numpy.int64)
+    vertexCounts = segmentCounts + 1
+
+    if lineType in ["GEODESIC", "RHUMB_LINE"]:
+        # one flat array of every vertex of every line
+        lineIndexes = numpy.repeat(numpy.arange(lons.size), vertexCounts)
+        steps = numpy.arange(lineIndexes.size) - numpy.repeat(numpy.cumsum(vertexCounts) - vertexCounts, vertexCounts)
+        vertexLons, vertexLats = Direct(lons[lineIndexes], lats[lineIndexes], bearings[lineIndexes],
+                                        distances[lineIndexes] * steps / segmentCounts[lineIndexes], lineType)
+        vertices = numpy.column_stack([vertexLons, vertexLats])
+        return numpy.split(vertices, numpy.cumsum(vertexCounts)[:-1])
+
+    # plane sections: blocks of lines in rows, padded with their end point
+    lines = []
+    for start in range(0, lons.size, planeSectionChunk):
+        block = slice(start, start + planeSectionChunk)
+        blockSegments = segmentCounts[block]
+        steps = numpy.minimum(numpy.arange(blockSegments.max() + 1)[None, :], blockSegments[:, None])
+        vertexLons, vertexLats = _planeSectionDirect(numpy.radians(lons[block]), numpy.radians(lats[block]),
+                                                     numpy.radians(bearings[block]),
+                                                     distances[block, None] * steps / blockSegments[:, None], lineType)
+        vertices = numpy.stack([numpy.degrees(vertexLons), numpy.degrees(vertexLats)], axis=-1)
+        lines += [vertices[index, :count + 1] for index, count in enumerate(blockSegments.tolist())]
+    return lines
+
+def LineVerticesBetween(lons1, lats1, lons2, lats2, lineType="GEODESIC",
+                        vertexSpacing=defaultVertexSpacing, maxVertices=maxLineVertices):
+    '''
+    Densified vertices of lines from start points to end points, as
+    XYToLine draws them: the inverse problem gives each line's bearing
+    and distance, and LineVertices the vertices along it
+
+    lons1, lats1 - start points in decimal degrees
+    lons2, lats2 - end points in decimal degrees
+    lineType - one of lineTypes
+
+    returns a list with one (vertices, 2) array of longitude, latitude
+    per line, starting and ending exactly at the given points
+    '''
+    lons1, lats1, lons2, lats2 = [array.ravel() for array in numpy.broadcast_arrays(
+        numpy.asarray(lons1, dtype=numpy.float64), numpy.asarray(lats1, dtype=numpy.float64),
+        numpy.asarray(lons2, dtype=numpy.float64), numpy.asarray(lats2, dtype=numpy.float64))]
+    bearings, distances = Inverse(lons1, lats1, lons2, lats2, lineType)
+    lines = LineVertices(lons1, lats1, bearings, distances, lineType,
+                         vertexSpacing=vertexSpacing, maxVertices=maxVertices)
+    for vertices, startLon, startLat, endLon, endLat in zip(lines, lons1.tolist(), lats1.tolist(),
+                                                           lons2.tolist(), lats2.tolist()):
+        vertices[0] = [startLon, startLat]
+        # keep the longitude continuous with the line
+        vertices[-1] = [endLon + 360.0 * round((vertices[-1, 0] - endLon) / 360.0), endLat]
+    return lines
+
+def EllipseVertices(lons, lats, majorAxes, minorAxes, azimuths=0.0, azimuthUnits="DEGREES",
+                    vertexSpacing=ellipseVertexSpacing, minVertices=minEllipseVertices,
+                    maxVertices=maxEllipseVertices):
+    '''
+    Closed outlines of geodesic ellipses, as TableToEllipse draws them:
+    each vertex is the geodesic distance of the ellipse radius from the
+    center, along the bearing of its angle from the major axis. The
+    vertex count follows the perimeter, all ellipses solved together.
+
+    lons, lats - centers in decimal degrees
+    majorAxes, minorAxes - full axis lengths in meters
+    azimuths - bearing of the major axis, in azimuthUnits
+
+    returns a list with one (vertices, 2) array of longitude, latitude
+    per ellipse, clockwise, with the first vertex repeated at the end
+    '''
+    lons, lats, majorAxes, minorAxes, azimuths = [array.ravel() for array in numpy.broadcast_arrays(
+        numpy.asarray(lons, dtype=numpy.float64), numpy.asarray(lats, dtype=numpy.float64),
+        numpy.abs(numpy.asarray(majorAxes, dtype=numpy.float64)) / 2.0,
+        numpy.abs(numpy.asarray(minorAxes, dtype=numpy.float64)) / 2.0,
+        BearingsToDegrees(azimuths, azimuthUnits))]
+    if lons.size == 0:
+        return []
+    # Ramanujan's perimeter of each ellipse
+    h = ((majorAxes - minorAxes) / numpy.maximum(majorAxes + minorAxes, 1e-12)) ** 2
+    perimeters = numpy.pi * (majorAxes + minorAxes) * (1.0 + 3.0 * h / (10.0 + numpy.sqrt(4.0 - 3.0 * h)))
+    vertexCounts = numpy.clip(numpy.ceil(perimeters / vertexSpacing), minVertices, maxVertices).astype(numpy.int64)
+
+    # one flat array of every vertex of every ellipse, closed by repeating the first
+    ellipseIndexes = numpy.repeat(numpy.arange(lons.size), vertexCounts + 1)
+    steps = numpy.arange(ellipseIndexes.size) - numpy.repeat(numpy.cumsum(vertexCounts + 1) - vertexCounts - 1,
+                                                             vertexCounts + 1)
+    angles = 2.0 * numpy.pi * (steps % vertexCounts[ellipseIndexes]) / vertexCounts[ellipseIndexes]
+    a = majorAxes[ellipseIndexes]
+    b = minorAxes[ellipseIndexes]
+    radii = a * b / numpy.maximum(numpy.hypot(b * numpy.cos(angles), a * numpy.sin(angles)), 1e-12)
+    vertexLons, vertexLats = Direct(lons[ellipseIndexes], lats[ellipseIndexes],
+                                    azimuths[ellipseIndexes] + numpy.degrees(angles), radii)
+    vertices = numpy.column_stack([vertexLons, vertexLats])
+    return numpy.split(vertices, numpy.cumsum(vertexCounts + 1)[:-1])
@@ -30,8 +30,10 @@ import os
 import arcpy
 
 try:
+    from . import Utilities
     from . import VisibilityUtilities
 except ImportError:
+    import Utilities
     import VisibilityUtilities
 
 DEBUG = False
@@ -127,34 +129,16 @@ def copyFeaturesAndProject(source_fc, out_projected_fc, spatial_reference):
 def addViewshedFields(observerPointsFC, innerRadiusInput, outerRadiusInput, \
     leftAzimuthInput, rightAzimuthInput, observerOffsetInput, targetOffsetInput):
 
-    desc = arcpy.Describe(observerPointsFC)
-    fieldNames = [x.name for x in desc.Fields]
+    # Add any missing fields and write all values in a single cursor pass
+    viewshedFields = {"RADIUS1":[innerRadiusInput, "RADIUS1"],
+                      "RADIUS2":[outerRadiusInput, "RADIUS2"],
+                      "AZIMUTH1":[leftAzimuthInput, "AZIMUTH1"],
+                      "AZIMUTH2":[rightAzimuthInput, "AZIMUTH2"],
+                      "OFFSETA":[observerOffsetInput, "OFFSETA"],
+                      "OFFSETB":[targetOffsetInput, "OFFSETB"]}
 
-    # arcpy.AddMessage('Current Fields: ' + str(fieldNames))
-    
-    if "RADIUS1" not in fieldNames : 
-        arcpy.AddField_management(observerPointsFC, "RADIUS1", "SHORT")
-    arcpy.CalculateField_management(observerPointsFC, "RADIUS1", innerRadiusInput, "PYTHON_9.3", "")
-
-    if "RADIUS2" not in fieldNames : 
-        arcpy.AddField_management(observerPointsFC, "RADIUS2", "SHORT")
-    arcpy.CalculateField_management(observerPointsFC, "RADIUS2", outerRadiusInput, "PYTHON_9.3", "")
-
-    if "AZIMUTH1" not in fieldNames : 
-        arcpy.AddField_management(observerPointsFC, "AZIMUTH1", "SHORT")
-    arcpy.CalculateField_management(observerPointsFC, "AZIMUTH1", leftAzimuthInput, "PYTHON_9.3", "")
-
-    if "AZIMUTH2" not in fieldNames : 
-        arcpy.AddField_management(observerPointsFC, "AZIMUTH2", "SHORT")
-    arcpy.CalculateField_management(observerPointsFC, "AZIMUTH2", rightAzimuthInput, "PYTHON_9.3", "")
-
-    if "OFFSETA" not in fieldNames : 
-        arcpy.AddField_management(observerPointsFC, "OFFSETA", "SHORT")
-    arcpy.CalculateField_management(observerPointsFC, "OFFSETA", observerOffsetInput, "PYTHON_9.3", "")
-
-    if "OFFSETB" not in fieldNames : 
-        arcpy.AddField_management(observerPointsFC, "OFFSETB", "SHORT")
-    arcpy.CalculateField_management(observerPointsFC, "OFFSETB", targetOffsetInput, "PYTHON_9.3", "")
+    VisibilityUtilities._addFieldsAndCalculateValues(observerPointsFC, viewshedFields,
+                                                     fieldType="SHORT")
 
 def createViewshed(inputObserverPoints, elevationRaster, outerRadiusInput, \
     leftAzimuthInput, rightAzimuthInput, observerOffsetInput, \
@@ -190,77 +174,79 @@ def createViewshed(inputObserverPoints, elevationRaster, outerRadiusInput, \
     # Done error checking, do processing:
     arcpy.env.outputCoordinateSystem = elevationSR
 
-    donutWedges = []
-    pieWedges = []
-
-    tempObserverPoints = r"in_memory\tempPoints"
-    copyFeaturesAndProject(inputObserverPoints, tempObserverPoints, elevationSR)
-
-    # Check if points falls within surface extent
-    isWithin = VisibilityUtilities.surfaceContainsPoints(tempObserverPoints, elevationRaster)
-    if not isWithin:
-        msgErrorPointNotInSurface = \
-            "Error: Input Observer(s) does not fall within the extent of the input surface: {0}!".format(os.path.basename(elevationRaster))
-        arcpy.AddError(msgErrorPointNotInSurface)
-        return
-
-    addViewshedFields(tempObserverPoints, innerRadiusInput, outerRadiusInput, \
-        leftAzimuthInput, rightAzimuthInput, observerOffsetInput, \
-        0) # Set Target Height to 0
-
-    arcpy.AddMessage("Buffering observers...")
-    arcpy.Buffer_analysis(tempObserverPoints, \
-        r"in_memory\OuterBuffer", "RADIUS2", "FULL", "ROUND", "NONE", "", "GEODESIC")
-
-    desc = arcpy.Describe(r"in_memory\OuterBuffer")
-    xMin = desc.Extent.XMin
-    yMin = desc.Extent.YMin
-    xMax = desc.Extent.XMax
-    yMax = desc.Extent.YMax
-    Extent = str(xMin) + " " + str(yMin) + " " + str(xMax) + " " + str(yMax)
-
-    arcpy.env.extent = desc.Extent
-
-    # Set Raster Output Mask (to improve performance)
-    arcpy.env.mask = r"in_memory\OuterBuffer"
-
-    arcpy.AddMessage("Clipping image to observer buffer...")
-    arcpy.Clip_management(elevationRaster, Extent, r"in_memory\clip")
-
-    arcpy.AddMessage("Calculating viewshed...")
-    arcpy.Viewshed_3d("in_memory\clip", tempObserverPoints, r"in_memory\intervis", "1", "FLAT_EARTH", "0.13")
-
-    arcpy.AddMessage("Creating features from raster...")
-    arcpy.RasterToPolygon_conversion(in_raster=r"in_memory\intervis", out_polygon_features=r"in_memory\unclipped",simplify="NO_SIMPLIFY")
-
-    fields = ["SHAPE@XY","RADIUS1","RADIUS2","AZIMUTH1","AZIMUTH2"]
-    ## get the attributes from the input point
-    with arcpy.da.SearchCursor(tempObserverPoints,fields) as cursor:
-        for row in cursor:
-            centerX      = row[0][0]
-            centerY      = row[0][1]
-            radiusInner  = row[1]
-            radiusOuter  = row[2]
-            startBearing = row[3]
-            endBearing   = row[4]
-
-            # TODO/IMPORTANT: radius must be in map units
-            donutWedge = drawWedge(centerX, centerY, radiusInner, radiusOuter, startBearing, endBearing)
-            donutWedges.append(donutWedge)
-
-            pieWedge = drawWedge(centerX, centerY, 0, radiusOuter, startBearing, endBearing)
-            pieWedges.append(pieWedge)
-
-    arcpy.CopyFeatures_management(donutWedges, sectorWedge)
-    arcpy.CopyFeatures_management(pieWedges, fullWedge)
-
-    arcpy.AddMessage("Finishing output features...")
-    arcpy.Clip_analysis(r"in_memory\unclipped", sectorWedge, r"in_memory\dissolve")
-    arcpy.Dissolve_management(r"in_memory\dissolve", viewshed, "gridcode", "", "MULTI_PART", "DISSOLVE_LINES")
-
-    # Output Symbol layer requires the field to be "VISIBILITY"
-    arcpy.AddField_management(viewshed, "VISIBILITY", "LONG")
-    arcpy.CalculateField_management(viewshed, "VISIBILITY", '!gridcode!', "PYTHON_9.3")
+    # Intermediate data is unique to this run and removed when done
+    with Utilities.ScratchWorkspace() as scratch:
+        donutWedges = []
+        pieWedges = []
+
+        tempObserverPoints = scratch.name("tempPoints")
+        copyFeaturesAndProject(inputObserverPoints, tempObserverPoints, elevationSR)
+
+        # Check if points falls within surface extent
+        isWithin = VisibilityUtilities.surfaceContainsPoints(tempObserverPoints, elevationRaster)
+        if not isWithin:
+            msgErrorPointNotInSurface = \
+                "Error: Input Observer(s) does not fall within the extent of the input surface: {0}!".format(os.path.basename(elevationRaster))
+            arcpy.AddError(msgErrorPointNotInSurface)
+            return
+
+        addViewshedFields(tempObserverPoints, innerRadiusInput, outerRadiusInput, \
+            leftAzimuthInput, rightAzimuthInput, observerOffsetInput, \
+            0) # Set Target Height to 0
+
+        arcpy.AddMessage("Buffering observers...")
+        outerBuffer = scratch.name("OuterBuffer")
+        arcpy.Buffer_analysis(tempObserverPoints, \
+            outerBuffer, "RADIUS2", "FULL", "ROUND", "NONE", "", "GEODESIC")
+
+        desc = arcpy.Describe(outerBuffer)
+        arcpy.env.extent = desc.Extent
+
+        # Set Raster Output Mask (to improve performance)
+        arcpy.env.mask = outerBuffer
+
+        arcpy.AddMessage("Clipping image to observer buffer...")
+        clipSurface = VisibilityUtilities._clipRasterToArea(elevationRaster, outerBuffer)
+
+        arcpy.AddMessage("Calculating viewshed...")
+        intervis = scratch.name("intervis")
+        arcpy.Viewshed_3d(clipSurface, tempObserverPoints, intervis, "1", "FLAT_EARTH", "0.13")
+
+        arcpy.AddMessage("Creating features from raster...")
+        unclipped = scratch.name("unclipped")
+        arcpy.RasterToPolygon_conversion(in_raster=intervis, out_polygon_features=unclipped,simplify="NO_SIMPLIFY")
+
+        fields = ["SHAPE@XY","RADIUS1","RADIUS2","AZIMUTH1","AZIMUTH2"]
+        ## get the attributes from the input point
+        with arcpy.da.SearchCursor(tempObserverPoints,fields) as cursor:
+            for row in cursor:
+                centerX      = row[0][0]
+                centerY      = row[0][1]
+                radiusInner  = row[1]
+                radiusOuter  = row[2]
+                startBearing = row[3]
+                endBearing   = row[4]
+
+                # TODO/IMPORTANT: radius must be in map units
+                donutWedge = drawWedge(centerX, centerY, radiusInner, radiusOuter, startBearing, endBearing)
+                donutWedges.append(donutWedge)
+
+                pieWedge = drawWedge(centerX, centerY, 0, radiusOuter, startBearing, endBearing)
+                pieWedges.append(pieWedge)
+
+        arcpy.CopyFeatures_management(donutWedges, sectorWedge)
+        arcpy.CopyFeatures_management(pieWedges, fullWedge)
+
+        arcpy.AddMessage("Finishing output features...")
+        clipped = scratch.name("dissolve")
+        arcpy.Clip_analysis(unclipped, sectorWedge, clipped)
+        arcpy.Dissolve_management(clipped, viewshed, "gridcode", "", "MULTI_PART", "DISSOLVE_LINES")
+        # Mask dataset is deleted with the scratch data
+        arcpy.env.mask = None
+
+        # Output Symbol layer requires the field to be "VISIBILITY"
+        arcpy.AddField_management(viewshed, "VISIBILITY", "LONG")
+        arcpy.CalculateField_management(viewshed, "VISIBILITY", '!gridcode!', "PYTHON_9.3")
 
 def main():
 
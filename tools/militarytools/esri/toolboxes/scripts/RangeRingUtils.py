@@ -31,13 +31,24 @@ history:
 import os
 import sys
 import traceback
+import numpy
 import arcpy
 
+try:
+    from . import Utilities
+    from . import Geodesic
+    from . import SpatialReferenceUtilities
+except ImportError:
+    import Utilities
+    import Geodesic
+    import SpatialReferenceUtilities
+
 acceptableDistanceUnits = ['METERS', 'KILOMETERS',
                            'MILES', 'NAUTICAL_MILES',
                            'FEET', 'US_SURVEY_FEET']
 
 srDefault = arcpy.SpatialReference(54032) # World_Azimuthal_Equidistant
+srWGS84 = SpatialReferenceUtilities.GetSpatialReference(4326) # GCS_WGS_1984
 
 def rangeRingsFromList(centerFC, rangeList, distanceUnits, numRadials, outputRingFeatures, outputRadialFeatures, sr):
     ''' Make range ring features from a center, and list of distances '''
@@ -133,7 +144,8 @@ class RingMaker:
     def __init__(self, center, inputRangeList, distanceUnits, sr):
         ''' initialize rings '''
 
-        self.deleteme = []
+        # run-scoped, uniquely named intermediate data
+        self.scratch = Utilities.ScratchWorkspace()
 
         # project center to sr, and keep it as a list of PointGeometries object
         originalGeom = arcpy.CopyFeatures_management(center, arcpy.Geometry())
@@ -161,9 +173,7 @@ class RingMaker:
 
     def __del__(self):
         ''' clean up rings '''
-        for i in self.deleteme:
-            if arcpy.Exists(i):
-                arcpy.Delete_management(i)
+        self.scratch.cleanup()
 
     def _sortList(self, listToSort):
         ''' sort list of distances '''
@@ -180,10 +190,9 @@ class RingMaker:
 
     def _makeTempTable(self, name, fields):
         ''' make a temporary, in_memory table '''
-        tab = os.path.join("in_memory", name)
+        tab = self.scratch.name(name)
         arcpy.CreateTable_management(os.path.dirname(tab),
                                      os.path.basename(tab))
-        self.deleteme.append(tab)
         if fields:
             newtab = self._addFieldsToTable(tab, fields)
         else:
@@ -204,14 +213,12 @@ class RingMaker:
                 cursor.insertRow([pt.X, pt.Y, r * 2])
 
         del cursor
-        self.deleteme.append(inTable)
-        outFeatures = os.path.join("in_memory", "outRings")
+        outFeatures = self.scratch.name("outRings")
         arcpy.TableToEllipse_management(inTable, outFeatures,
                                         'x', 'y', 'Range', 'Range',
                                         self.distanceUnits,
                                         '#', '#', '#', self.sr)
 
-        self.deleteme.append(outFeatures)
         self.ringFeatures = outFeatures
         arcpy.CalculateField_management(outFeatures, "Range",'!Range! / 2.0','PYTHON_9.3')
         return outFeatures
@@ -225,20 +232,28 @@ class RingMaker:
             segmentAngleList.append(a)
             a += segmentAngle
 
+        # solve all radials of all centers together with Geodesic
+        centers = [i.firstPoint for i in self.center]
+        geographic = [i.projectAs(srWGS84).firstPoint for i in self.center]
+        bearings = numpy.tile(segmentAngleList, len(centers))
+        lines = Geodesic.LineVertices(numpy.repeat([pt.X for pt in geographic], len(segmentAngleList)),
+                                      numpy.repeat([pt.Y for pt in geographic], len(segmentAngleList)),
+                                      bearings,
+                                      SpatialReferenceUtilities.ConvertLength(self.ringMax, self.distanceUnits),
+                                      "GEODESIC")
+
+        outRadialFeatures = self.scratch.name("outRadials")
+        arcpy.CreateFeatureclass_management(os.path.dirname(outRadialFeatures),
+                                            os.path.basename(outRadialFeatures),
+                                            "POLYLINE", None, "DISABLED", "DISABLED", self.sr)
         fields = {'x':'DOUBLE', 'y':'DOUBLE', 'Bearing':'DOUBLE', 'Range':'DOUBLE'}
-        tab = self._makeTempTable("radTable", fields)
-        cursor = arcpy.da.InsertCursor(tab, ['x', 'y', 'Bearing', 'Range'])
-        for i in self.center:
-            pt = i.firstPoint
-            for r in segmentAngleList:
-                cursor.insertRow([pt.X, pt.Y, r, self.ringMax])
+        self._addFieldsToTable(outRadialFeatures, fields)
+        cursor = arcpy.da.InsertCursor(outRadialFeatures, ['SHAPE@', 'x', 'y', 'Bearing', 'Range'])
+        for index, vertices in enumerate(lines):
+            pt = centers[index // len(segmentAngleList)]
+            radial = arcpy.Polyline(arcpy.Array([arcpy.Point(lon, lat) for lon, lat in vertices.tolist()]), srWGS84)
+            cursor.insertRow([radial.projectAs(self.sr), pt.X, pt.Y, bearings[index], self.ringMax])
         del cursor
-        self.deleteme.append(tab)
-        outRadialFeatures = os.path.join("in_memory", "outRadials")
-        arcpy.BearingDistanceToLine_management(tab, outRadialFeatures, 'x', 'y',
-                                               'Range', self.distanceUnits, 'Bearing', "DEGREES",
-                                               "GEODESIC", "#", self.sr)
-        self.deleteme.append(outRadialFeatures)
         self.radialFeatures = outRadialFeatures
         return outRadialFeatures
 
@@ -0,0 +1,166 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2018 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ SpatialReferenceUtilities.py
+ --------------------------------------------------
+ requirements: ArcGIS 10.3+, Python 2.7 or Python 3.4
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ Shared length units and spatial references for the toolboxes. Lengths
+ are converted through one table of meters per unit. Spatial references
+ are kept in an LRU cache, so each WKID, string or localized azimuthal
+ equidistant reference is built once per session. Cached spatial
+ references are shared and must not be changed by callers.
+ ==================================================
+'''
+
+# IMPORTS ==========================================
+import re
+import collections
+import numpy
+import arcpy
+
+# LOCALS ===========================================
+metersPerUnit = {"METERS":1.0,
+                 "KILOMETERS":1000.0,
+                 "CENTIMETERS":0.01,
+                 "MILLIMETERS":0.001,
+                 "DECIMETERS":0.1,
+                 "FEET":0.3048,
+                 "INCHES":0.0254,
+                 "YARDS":0.9144,
+                 "MILES":1609.344,
+                 "NAUTICALMILES":1852.0,
+                 "FEETUS":1200.0 / 3937.0} # unit key:meters per unit
+
+maxCachedSpatialReferences = 64
+_spatialReferenceCache = collections.OrderedDict() # {key:arcpy.SpatialReference}
+_localAzimuthalTemplate = None # World Azimuthal Equidistant WKT with center placeholders
+
+# FUNCTIONS ========================================
+def _unitKey(units):
+    '''
+    Normalizes unit names, so 'Nautical Miles', 'NAUTICAL_MILES' and
+    'NauticalMile' all give the same key
+    '''
+    key = re.sub(r'[\s_\-]', '', str(units)).upper()
+    if key.startswith("INTERNATIONAL"):
+        key = key[len("INTERNATIONAL"):]
+    if key in ["FOOT", "FOOTINTL"]:
+        return "FEET"
+    if key in ["FOOTUS", "USSURVEYFEET", "USSURVEYFOOT"]:
+        return "FEETUS"
+    if key in ["INCH"]:
+        return "INCHES"
+    if key in metersPerUnit:
+        return key
+    if key + "S" in metersPerUnit:
+        return key + "S"
+    if key.endswith("ES") and key[:-2] + "S" in metersPerUnit:
+        return key[:-2] + "S"
+    return key
+
+def GetMetersPerUnit(units):
+    '''
+    Returns the number of meters in one of units, raises ValueError for unknown units
+    '''
+    key = _unitKey(units)
+    if key not in metersPerUnit:
+        raise ValueError("Unknown length unit: {0}".format(units))
+    return metersPerUnit[key]
+
+def ConvertLength(values, fromUnits, toUnits="Meters"):
+    '''
+    Converts lengths between units
+
+    values - a number or a sequence or array of numbers
+    fromUnits, toUnits - unit names like Meters, Feet or Nautical Miles
+
+    returns a float for a number, otherwise a float64 array
+    '''
+    factor = GetMetersPerUnit(fromUnits) / GetMetersPerUnit(toUnits)
+    if numpy.isscalar(values):
+        return float(values) * factor
+    return numpy.asarray(values, dtype=numpy.float64) * factor
+
+def _cachedSpatialReference(key, build):
+    ''' Returns the cached spatial reference for key, building it with build() if needed '''
+    spatialReference = _spatialReferenceCache.get(key)
+    if spatialReference is not None:
+        # most recently used moves to the end
+        del _spatialReferenceCache[key]
+        _spatialReferenceCache[key] = spatialReference
+        return spatialReference
+    spatialReference = build()
+    _spatialReferenceCache[key] = spatialReference
+    while len(_spatialReferenceCache) > maxCachedSpatialReferences:
+        _spatialReferenceCache.popitem(last=False)
+    return spatialReference
+
+def GetSpatialReference(reference):
+    '''
+    Returns a shared spatial reference for a WKID, or for a spatial
+    reference string or name as accepted by arcpy.SpatialReference
+    '''
+    if isinstance(reference, arcpy.SpatialReference):
+        return reference
+    try:
+        key = int(reference)
+    except (TypeError, ValueError):
+        key = str(reference)
+
+    def build():
+        if isinstance(key, int):
+            return arcpy.SpatialReference(key)
+        spatialReference = arcpy.SpatialReference()
+        if key.lstrip().startswith(("PROJCS", "GEOGCS")):
+            spatialReference.loadFromString(key)
+        else:
+            spatialReference = arcpy.SpatialReference(key)
+        return spatialReference
+
+    return _cachedSpatialReference(key, build)
+
+def GetLocalAzimuthalEquidistant(longitude, latitude, decimals=6):
+    '''
+    Returns a World Azimuthal Equidistant spatial reference centered on
+    longitude, latitude (WGS84 decimal degrees). The center is rounded to
+    decimals places, so nearby centers share one cached reference.
+    '''
+    longitude = round(float(longitude), decimals)
+    latitude = round(float(latitude), decimals)
+
+    def build():
+        global _localAzimuthalTemplate
+        if _localAzimuthalTemplate is None:
+            strAZED = GetSpatialReference(54032).exportToString() # World Azimuthal Equidistant
+            strAZED = re.sub(r"PARAMETER\['Central_Meridian',.+?]",
+                             "PARAMETER['Central_Meridian',%CENTRAL_MERIDIAN%]", strAZED)
+            strAZED = re.sub(r"PARAMETER\['Latitude_Of_Origin',.+?]",
+                             "PARAMETER['Latitude_Of_Origin',%LATITUDE_OF_ORIGIN%]", strAZED)
+            _localAzimuthalTemplate = strAZED
+        spatialReference = arcpy.SpatialReference()
+        spatialReference.loadFromString(_localAzimuthalTemplate.replace("%CENTRAL_MERIDIAN%", str(longitude))
+                                                               .replace("%LATITUDE_OF_ORIGIN%", str(latitude)))
+        return spatialReference
+
+    return _cachedSpatialReference(("AZED", longitude, latitude), build)
+
+def clearCache():
+    ''' Clears the cached spatial references '''
+    _spatialReferenceCache.clear()
@@ -0,0 +1,370 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2018 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ SurfaceReader.py
+ --------------------------------------------------
+ requirements: ArcGIS 10.3+, Python 2.7 or Python 3.4
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ Windowed access to elevation surfaces as NumPy arrays for the Visibility
+ tools. Surfaces are read in fixed size blocks that are kept in a shared
+ LRU cache, so analyses over overlapping areas decode each block once.
+ Uncompressed ESRI .flt and single band .bil surfaces are memory-mapped
+ instead of read through arcpy.
+ ==================================================
+'''
+
+# IMPORTS ==========================================
+import os
+import collections
+import numpy
+import arcpy
+
+try:
+    from . import Utilities
+except ImportError:
+    import Utilities
+
+# LOCALS ===========================================
+blockSize = 256 # rows and columns in each cached block
+maxCachedBlocks = 64 # blocks kept in memory for all surfaces
+_blockCache = collections.OrderedDict() # {(identity, blockRow, blockCol):array}
+_readers = {} # {catalogPath:SurfaceReader}
+integerPixelTypes = {"U1":"uint8", "U2":"uint8", "U4":"uint8",
+                     "S8":"int8", "U8":"uint8",
+                     "S16":"int16", "U16":"uint16",
+                     "S32":"int32", "U32":"uint32"} # arcpy pixelType:numpy dtype
+
+# FUNCTIONS ========================================
+def _readHeader(headerFile):
+    '''
+    Reads a .hdr file of KEY VALUE lines into a dictionary with UPPERCASE keys
+    '''
+    header = {}
+    with open(headerFile, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2:
+                header[parts[0].upper()] = parts[1]
+    return header
+
+def _memoryMap(rasterPath, nrows, ncols):
+    '''
+    Returns a read-only numpy.memmap of rasterPath if it is an uncompressed
+    ESRI .flt or single band .bil surface of nrows by ncols, otherwise None
+    '''
+    base, ext = os.path.splitext(rasterPath)
+    ext = ext.lower()
+    headerFile = base + ".hdr"
+    if ext not in [".flt", ".bil"] or not os.path.exists(headerFile):
+        return None
+    header = _readHeader(headerFile)
+    if ext == ".flt":
+        dtype = numpy.dtype("float32")
+        byteOrder = header.get("BYTEORDER", "LSBFIRST").upper()
+        bigEndian = byteOrder.startswith("M")
+    else:
+        if int(header.get("NBANDS", 1)) != 1:
+            return None
+        nbits = int(header.get("NBITS", 8))
+        pixelType = header.get("PIXELTYPE", "").upper()
+        if pixelType == "FLOAT":
+            dtype = numpy.dtype("float{0}".format(nbits))
+        elif pixelType == "SIGNEDINT":
+            dtype = numpy.dtype("int{0}".format(nbits))
+        else:
+            dtype = numpy.dtype("uint{0}".format(nbits))
+        bigEndian = header.get("BYTEORDER", "I").upper() == "M"
+    if int(header.get("NROWS", -1)) != nrows or int(header.get("NCOLS", -1)) != ncols:
+        return None
+    dtype = dtype.newbyteorder(">" if bigEndian else "<")
+    if os.path.getsize(rasterPath) < nrows * ncols * dtype.itemsize:
+        return None
+    return numpy.memmap(rasterPath, dtype=dtype, mode="r", shape=(nrows, ncols))
+
+def _lastModified(catalogPath):
+    '''
+    Returns the last write time of the files holding catalogPath. Rasters in
+    a geodatabase are not files, so the newest file in the geodatabase is used,
+    as are the newest files of folder based rasters such as GRIDs.
+    '''
+    path = catalogPath
+    while path and not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    if not path or not os.path.exists(path):
+        return None
+    if not os.path.isdir(path):
+        return os.path.getmtime(path)
+    modified = [os.path.getmtime(path)]
+    for f in os.listdir(path):
+        modified.append(os.path.getmtime(os.path.join(path, f)))
+    return max(modified)
+
+def getSurfaceReader(inputSurface):
+    '''
+    Returns the shared SurfaceReader for inputSurface, creating it if needed.
+    Readers for the same surface share cached blocks.
+    '''
+    catalogPath = arcpy.Describe(inputSurface).catalogPath
+    reader = _readers.get(catalogPath)
+    if reader is None or reader.identity != SurfaceReader.surfaceIdentity(catalogPath):
+        reader = SurfaceReader(catalogPath)
+        _readers[catalogPath] = reader
+    return reader
+
+def clearCache():
+    '''
+    Drops all cached blocks and readers
+    '''
+    _blockCache.clear()
+    _readers.clear()
+
+class SurfaceReader(object):
+    '''
+    Reads cell values of an elevation surface as NumPy arrays. Row 0 is the
+    top (north) row of the surface; NoData cells are returned as NaN.
+    '''
+
+    @staticmethod
+    def surfaceIdentity(catalogPath):
+        '''
+        Returns a value that changes when the surface at catalogPath changes:
+        its path, extent, cell size and dimensions, and when it was last written
+        '''
+        desc = arcpy.Describe(catalogPath)
+        extent = desc.extent
+        return (catalogPath,
+                extent.XMin, extent.YMin, extent.XMax, extent.YMax,
+                desc.meanCellWidth, desc.meanCellHeight,
+                desc.height, desc.width,
+                _lastModified(catalogPath))
+
+    def __init__(self, inputSurface):
+        raster = arcpy.Raster(inputSurface)
+        self.catalogPath = arcpy.Describe(inputSurface).catalogPath
+        self.identity = SurfaceReader.surfaceIdentity(self.catalogPath)
+        self.spatialReference = raster.spatialReference
+        self.extent = raster.extent
+        self.xMin = raster.extent.XMin
+        self.yMax = raster.extent.YMax
+        self.cellWidth = raster.meanCellWidth
+        self.cellHeight = raster.meanCellHeight
+        self.nrows = raster.height
+        self.ncols = raster.width
+        self.noData = raster.noDataValue
+        self.pixelType = raster.pixelType
+        self.memoryMap = _memoryMap(self.catalogPath, self.nrows, self.ncols)
+
+    def _toFloat(self, values):
+        ''' copy of values as float64 with NoData set to NaN '''
+        values = numpy.array(values, dtype=numpy.float64)
+        if self.noData is not None:
+            values[values == float(self.noData)] = numpy.nan
+        return values
+
+    def block(self, blockRow, blockCol):
+        '''
+        Returns the cached block at blockRow, blockCol as a float64 array
+        '''
+        key = (self.identity, blockRow, blockCol)
+        values = _blockCache.get(key)
+        if values is not None:
+            # most recently used moves to the end
+            del _blockCache[key]
+            _blockCache[key] = values
+            return values
+
+        row0, col0 = blockRow * blockSize, blockCol * blockSize
+        nrows = min(blockSize, self.nrows - row0)
+        ncols = min(blockSize, self.ncols - col0)
+        if self.memoryMap is not None:
+            values = self._toFloat(self.memoryMap[row0:row0 + nrows, col0:col0 + ncols])
+        else:
+            lowerLeft = arcpy.Point(self.xMin + col0 * self.cellWidth,
+                                    self.yMax - (row0 + nrows) * self.cellHeight)
+            values = self._toFloat(arcpy.RasterToNumPyArray(self.catalogPath,
+                                                            lowerLeft,
+                                                            ncols,
+                                                            nrows))
+        values.flags.writeable = False
+        _blockCache[key] = values
+        while len(_blockCache) > maxCachedBlocks:
+            _blockCache.popitem(last=False)
+        return values
+
+    def readWindow(self, row0, col0, nrows, ncols):
+        '''
+        Returns the nrows by ncols window starting at row0, col0. A window
+        inside one block is a read-only view of the cached block.
+        '''
+        row0, col0 = max(0, int(row0)), max(0, int(col0))
+        nrows = min(int(nrows), self.nrows - row0)
+        ncols = min(int(ncols), self.ncols - col0)
+        if nrows <= 0 or ncols <= 0:
+            return numpy.empty((0, 0))
+        firstBlockRow, lastBlockRow = row0 // blockSize, (row0 + nrows - 1) // blockSize
+        firstBlockCol, lastBlockCol = col0 // blockSize, (col0 + ncols - 1) // blockSize
+        if firstBlockRow == lastBlockRow and firstBlockCol == lastBlockCol:
+            r, c = row0 - firstBlockRow * blockSize, col0 - firstBlockCol * blockSize
+            return self.block(firstBlockRow, firstBlockCol)[r:r + nrows, c:c + ncols]
+
+        window = numpy.empty((nrows, ncols), dtype=numpy.float64)
+        for blockRow in range(firstBlockRow, lastBlockRow + 1):
+            for blockCol in range(firstBlockCol, lastBlockCol + 1):
+                values = self.block(blockRow, blockCol)
+                top, left = blockRow * blockSize, blockCol * blockSize
+                r0, r1 = max(row0, top), min(row0 + nrows, top + values.shape[0])
+                c0, c1 = max(col0, left), min(col0 + ncols, left + values.shape[1])
+                window[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = values[r0 - top:r1 - top, c0 - left:c1 - left]
+        return window
+
+    def windowForExtent(self, extent):
+        '''
+        Returns [row0, col0, nrows, ncols] of the cells that overlap extent
+        '''
+        col0 = int(numpy.floor((extent.XMin - self.xMin) / self.cellWidth))
+        col1 = int(numpy.ceil((extent.XMax - self.xMin) / self.cellWidth))
+        row0 = int(numpy.floor((self.yMax - extent.YMax) / self.cellHeight))
+        row1 = int(numpy.ceil((self.yMax - extent.YMin) / self.cellHeight))
+        row0, col0 = max(0, row0), max(0, col0)
+        row1, col1 = min(self.nrows, row1), min(self.ncols, col1)
+        return [row0, col0, max(0, row1 - row0), max(0, col1 - col0)]
+
+    def cellCenters(self, row0, col0, nrows, ncols):
+        '''
+        Returns the X of the cell centers of each column and the Y of each
+        row of a window, the cell at row, col is centered at xs[col], ys[row]
+        '''
+        xs = self.xMin + (numpy.arange(col0, col0 + ncols) + 0.5) * self.cellWidth
+        ys = self.yMax - (numpy.arange(row0, row0 + nrows) + 0.5) * self.cellHeight
+        return [xs, ys]
+
+    def readPolygon(self, polygons):
+        '''
+        Reads the cells whose centers fall inside any of the polygons
+        (arcpy Polygons in the surface spatial reference)
+
+        returns [values, row0, col0], values are NaN outside the polygons.
+        Cells are tested a block of rows at a time, by scanline against the
+        rings that cross each row.
+        '''
+        extent = None
+        polygonRings = []
+        for polygon in polygons:
+            polygonRings.append(Utilities.geometryRings(polygon))
+            if extent is None:
+                extent = [polygon.extent.XMin, polygon.extent.YMin, polygon.extent.XMax, polygon.extent.YMax]
+            else:
+                extent = [min(extent[0], polygon.extent.XMin), min(extent[1], polygon.extent.YMin),
+                          max(extent[2], polygon.extent.XMax), max(extent[3], polygon.extent.YMax)]
+        row0, col0, nrows, ncols = self.windowForExtent(arcpy.Extent(*extent))
+        values = numpy.array(self.readWindow(row0, col0, nrows, ncols))
+        xs, ys = self.cellCenters(row0, col0, nrows, ncols)
+        for top in range(0, nrows, blockSize):
+            bandYs = ys[top:top + blockSize]
+            # test each polygon separately so overlapping polygons do not cancel out
+            inside = numpy.zeros((len(bandYs), ncols), dtype=bool)
+            for rings in polygonRings:
+                inside |= Utilities.gridInRings(xs, bandYs, rings)
+            values[top:top + blockSize][~inside] = numpy.nan
+        return [values, row0, col0]
+
+    def windowLowerLeft(self, row0, col0, nrows):
+        '''
+        Returns the lower left corner of a window as an arcpy.Point
+        '''
+        return arcpy.Point(self.xMin + col0 * self.cellWidth,
+                           self.yMax - (row0 + nrows) * self.cellHeight)
+
+    def _cellValues(self, rows, cols):
+        ''' values at integer rows and cols, read block by block '''
+        values = numpy.full(rows.shape, numpy.nan)
+        valid = (rows >= 0) & (rows < self.nrows) & (cols >= 0) & (cols < self.ncols)
+        blockRows, blockCols = rows // blockSize, cols // blockSize
+        for blockRow, blockCol in set(zip(blockRows[valid].tolist(), blockCols[valid].tolist())):
+            inBlock = valid & (blockRows == blockRow) & (blockCols == blockCol)
+            values[inBlock] = self.block(blockRow, blockCol)[rows[inBlock] - blockRow * blockSize,
+                                                             cols[inBlock] - blockCol * blockSize]
+        return values
+
+    def valuesAt(self, xs, ys, bilinear=True):
+        '''
+        Returns surface values at map coordinates xs, ys, bilinear
+        interpolated from the four nearest cell centers by default
+        '''
+        xs = numpy.asarray(xs, dtype=float)
+        ys = numpy.asarray(ys, dtype=float)
+        colF = (xs - self.xMin) / self.cellWidth - 0.5
+        rowF = (self.yMax - ys) / self.cellHeight - 0.5
+        if not bilinear:
+            return self._cellValues(numpy.floor(rowF + 0.5).astype(int),
+                                    numpy.floor(colF + 0.5).astype(int))
+        # clamp so points in the outer half cell use the edge cells
+        colF = numpy.clip(colF, 0, self.ncols - 1)
+        rowF = numpy.clip(rowF, 0, self.nrows - 1)
+        c0, r0 = numpy.floor(colF).astype(int), numpy.floor(rowF).astype(int)
+        c1, r1 = numpy.minimum(c0 + 1, self.ncols - 1), numpy.minimum(r0 + 1, self.nrows - 1)
+        fc, fr = colF - c0, rowF - r0
+        top = self._cellValues(r0, c0) * (1 - fc) + self._cellValues(r0, c1) * fc
+        bottom = self._cellValues(r1, c0) * (1 - fc) + self._cellValues(r1, c1) * fc
+        return top * (1 - fr) + bottom * fr
+
+    def windowRaster(self, values, row0, col0, pixelType=None):
+        '''
+        Returns a window of values (NaN as NoData) as a temporary arcpy
+        Raster in the surface spatial reference, for tools that need a
+        raster input; it is not saved
+
+        pixelType - arcpy pixel type of the raster, default is the surface pixel type
+        '''
+        lowerLeft = self.windowLowerLeft(row0, col0, values.shape[0])
+        dtype = integerPixelTypes.get(pixelType or self.pixelType)
+        if dtype is None:
+            outValues, noData = numpy.asarray(values, dtype=numpy.float32), numpy.nan
+        else:
+            # keep integer surfaces as integers, NoData as the surface NoData value
+            noData = numpy.iinfo(dtype).max if dtype.startswith("u") else numpy.iinfo(dtype).min
+            if pixelType is None and self.noData is not None:
+                noData = self.noData
+            outValues = numpy.where(numpy.isnan(values), noData, values).astype(dtype)
+        outputCoordinateSystem = arcpy.env.outputCoordinateSystem
+        try:
+            arcpy.env.outputCoordinateSystem = self.spatialReference
+            return arcpy.NumPyArrayToRaster(outValues,
+                                            lowerLeft,
+                                            self.cellWidth,
+                                            self.cellHeight,
+                                            noData)
+        finally:
+            arcpy.env.outputCoordinateSystem = outputCoordinateSystem
+
+    def saveWindow(self, values, row0, col0, outputRaster, pixelType=None):
+        '''
+        Saves a window of values (NaN as NoData) as outputRaster in the
+        surface spatial reference
+
+        pixelType - arcpy pixel type of outputRaster, default is the surface pixel type
+
+        returns outputRaster
+        '''
+        self.windowRaster(values, row0, col0, pixelType).save(outputRaster)
+        arcpy.DefineProjection_management(outputRaster, self.spatialReference)
+        return outputRaster
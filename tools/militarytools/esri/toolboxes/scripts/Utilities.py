@@ -32,8 +32,11 @@ HISTORY:
 
 import os
 import sys
+import shutil
 import string
 import random
+import uuid
+import numpy
 import arcpy
 
 PLATFORM_PRO = 'ARCGIS_PRO'
@@ -92,4 +95,245 @@ def MakeScratchGeodatabase():
     '''
     name = ''.join([random.choice(string.ascii_uppercase) for _ in range(6)])
     ws = arcpy.CreateFileGDB_management('%scratchFolder%',name,'CURRENT')[0]
-    return ws
\ No newline at end of file
+    return ws
+
+def GetFieldNames(dataset, scratch=None):
+    '''
+    Returns the list of field names for dataset
+
+    scratch - ScratchWorkspace of the tool run, to read through its
+    field name cache; None calls arcpy.ListFields every time
+    '''
+    if scratch is None:
+        return [f.name for f in arcpy.ListFields(dataset)]
+    return scratch.fieldNames(dataset)
+
+def pointsInRings(xs, ys, rings, chunkSize=1000000):
+    '''
+    Even-odd (ray casting) test of points against polygon rings
+
+    xs, ys - arrays of point coordinates
+    rings - list of (N, 2) arrays of ring vertices, holes included
+    chunkSize - most point and ring vertex pairs tested at once, to bound memory
+
+    returns boolean array, True where a point is inside the polygon
+    '''
+    xs = numpy.asarray(xs, dtype=float)
+    ys = numpy.asarray(ys, dtype=float)
+    inside = numpy.zeros(xs.shape, dtype=bool)
+    for ring in rings:
+        ring = numpy.asarray(ring, dtype=float)
+        if len(ring) < 3:
+            continue
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = numpy.roll(x1, -1), numpy.roll(y1, -1)
+        # bounding box prefilter for this ring
+        candidates = numpy.flatnonzero((xs >= x1.min()) & (xs <= x1.max()) &
+                                       (ys >= y1.min()) & (ys <= y1.max()))
+        step = max(1, int(chunkSize) // len(ring))
+        for start in range(0, len(candidates), step):
+            chunk = candidates[start:start + step]
+            px = xs[chunk][:, None]
+            py = ys[chunk][:, None]
+            crosses = (y1 > py) != (y2 > py)
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                xCross = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+            hits = numpy.count_nonzero(crosses & (px < xCross), axis=1)
+            inside[chunk] ^= (hits % 2 == 1)
+    return inside
+
+def gridInRings(xs, ys, rings, chunkSize=1000000):
+    '''
+    Even-odd test of a grid of points against polygon rings by scanline:
+    only rows inside a ring's y range are tested, each against the edges
+    of the ring that cross it, so no per-point coordinates are built
+
+    xs - increasing x of the grid columns
+    ys - y of the grid rows
+    rings - list of (N, 2) arrays of ring vertices, holes included
+    chunkSize - most row and ring vertex pairs tested at once, to bound memory
+
+    returns boolean array of len(ys) by len(xs), True inside the polygon;
+    the same cells as pointsInRings on every grid point
+    '''
+    xs = numpy.asarray(xs, dtype=float)
+    ys = numpy.asarray(ys, dtype=float)
+    inside = numpy.zeros((len(ys), len(xs)), dtype=bool)
+    for ring in rings:
+        ring = numpy.asarray(ring, dtype=float)
+        if len(ring) < 3 or len(xs) == 0:
+            continue
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = numpy.roll(x1, -1), numpy.roll(y1, -1)
+        rows = numpy.flatnonzero((ys >= y1.min()) & (ys <= y1.max()))
+        step = max(1, int(chunkSize) // len(ring))
+        for start in range(0, len(rows), step):
+            chunk = rows[start:start + step]
+            rowIndex, edgeIndex = numpy.nonzero((y1 > ys[chunk][:, None]) != (y2 > ys[chunk][:, None]))
+            xCross = x1[edgeIndex] + ((ys[chunk][rowIndex] - y1[edgeIndex]) * (x2[edgeIndex] - x1[edgeIndex]) /
+                                      (y2[edgeIndex] - y1[edgeIndex]))
+            # a cell is inside when an odd number of crossings are to its right
+            crossings = numpy.zeros((len(chunk), len(xs) + 1), dtype=numpy.int32)
+            numpy.add.at(crossings, (rowIndex, numpy.searchsorted(xs, xCross)), 1)
+            inside[chunk] ^= numpy.cumsum(crossings[:, ::-1], axis=1)[:, -2::-1] % 2 == 1
+    return inside
+
+def geometryRings(geometry):
+    '''
+    Returns the rings of an arcpy Polygon as a list of (N, 2) arrays
+    '''
+    rings = []
+    for part in geometry:
+        ring = []
+        for pnt in part:
+            if pnt:
+                ring.append((pnt.X, pnt.Y))
+            elif ring:
+                # a None point separates the exterior ring from holes
+                rings.append(numpy.array(ring))
+                ring = []
+        if ring:
+            rings.append(numpy.array(ring))
+    return rings
+
+def GetMemoryWorkspace():
+    '''
+    Returns the memory workspace for the current platform:
+    "memory" for ArcGIS Pro 2.4+, "in_memory" otherwise
+    '''
+    if GetPlatform() == PLATFORM_PRO:
+        try:
+            version = [int(v) for v in arcpy.GetInstallInfo()['Version'].split('.')[:2]]
+            if version >= [2, 4]:
+                return "memory"
+        except:
+            pass
+    return "in_memory"
+
+class ScratchWorkspace(object):
+    '''
+    Hands out unique, run-scoped names for intermediate datasets and
+    deletes everything it handed out when the run is done, so two tool
+    runs can share a process or scratch geodatabase without overwriting
+    each other's data. Field names read through it are cached for the
+    run only, see fieldNames:
+
+        with Utilities.ScratchWorkspace() as scratch:
+            clipSurface = scratch.name("clipSurface", inMemory=False, raster=True)
+            ...
+    '''
+
+    def __init__(self, preferMemory=True):
+        '''
+        preferMemory - default for name(): use the memory workspace
+        instead of the scratch workspace
+        '''
+        self.runID = uuid.uuid4().hex[:8]
+        self.preferMemory = preferMemory
+        self.memoryWorkspace = GetMemoryWorkspace()
+        self.workspace = arcpy.env.scratchWorkspace or arcpy.env.scratchGDB
+        self.datasets = []
+        self.folders = []
+        self._count = 0
+        self._fieldNames = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        self.cleanup()
+        return False
+
+    def _uniqueName(self, baseName):
+        self._count += 1
+        return "{0}_{1}_{2}".format(baseName, self.runID, self._count)
+
+    def _shortName(self):
+        ''' a unique name of at most 13 characters that starts with a letter, as GRID rasters need '''
+        self._count += 1
+        return "r{0}{1}".format(self.runID[:6], self._count)
+
+    def name(self, baseName, inMemory=None, raster=False):
+        '''
+        Returns a unique path for an intermediate dataset and registers it
+        for deletion
+
+        baseName - readable prefix for the dataset name
+        inMemory - True for the memory workspace, False for the scratch
+        workspace, None for preferMemory. The size of the dataset is not
+        checked; ask for the scratch workspace for rasters and large outputs.
+        raster - True if the dataset is a raster, so that in a folder
+        scratch workspace it gets a short name that is valid for a GRID
+
+        returns full path to the dataset
+        '''
+        if inMemory is None:
+            inMemory = self.preferMemory
+        workspace = self.memoryWorkspace if inMemory else self.workspace
+        inFolder = os.path.splitext(workspace)[1].lower() not in [".gdb", ".mdb", ".sde"]
+        if raster and not inMemory and inFolder:
+            dataset = os.path.join(workspace, self._shortName())
+        else:
+            dataset = os.path.join(workspace, self._uniqueName(baseName))
+        self.datasets.append(dataset)
+        return dataset
+
+    def layer(self, baseName):
+        '''
+        Returns a unique feature or table layer name and registers it
+        for deletion
+        '''
+        layerName = self._uniqueName(baseName)
+        self.datasets.append(layerName)
+        return layerName
+
+    def folder(self, baseName):
+        '''
+        Creates a unique folder in the scratch folder for non-geodatabase
+        files (graphs, text) and registers it for deletion
+
+        returns full path to the folder
+        '''
+        folder = os.path.join(arcpy.env.scratchFolder, self._uniqueName(baseName))
+        os.makedirs(folder)
+        self.folders.append(folder)
+        return folder
+
+    def fieldNames(self, dataset):
+        '''
+        Returns the list of field names for dataset, calling
+        arcpy.ListFields only the first time this run asks for it. Call
+        clearFieldNames after changing the schema of, or recreating,
+        dataset.
+        '''
+        key = str(dataset)
+        if key not in self._fieldNames:
+            self._fieldNames[key] = [f.name for f in arcpy.ListFields(dataset)]
+        return list(self._fieldNames[key])
+
+    def clearFieldNames(self, dataset=None):
+        '''
+        Clears the cached field names for dataset, or all of them if
+        dataset is None
+        '''
+        if dataset is None:
+            self._fieldNames.clear()
+        else:
+            self._fieldNames.pop(str(dataset), None)
+
+    def cleanup(self):
+        '''
+        Deletes all datasets and folders handed out by this instance,
+        newest first
+        '''
+        for dataset in reversed(self.datasets):
+            try:
+                if arcpy.Exists(dataset):
+                    arcpy.Delete_management(dataset)
+            except:
+                arcpy.AddWarning("Could not delete intermediate dataset {0}".format(dataset))
+        for folder in reversed(self.folders):
+            shutil.rmtree(folder, ignore_errors=True)
+        self.datasets = []
+        self.folders = []
+        self._fieldNames.clear()
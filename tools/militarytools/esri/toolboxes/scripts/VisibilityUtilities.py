@@ -38,18 +38,25 @@
 # IMPORTS ==========================================
 import os
 import sys
-import re
 import traceback
+import hashlib
 import arcpy
 from arcpy import env
 import pylab
 import math
+import numpy
+
+try:
+    from . import Utilities
+    from . import SurfaceReader
+    from . import SpatialReferenceUtilities
+except ImportError:
+    import Utilities
+    import SurfaceReader
+    import SpatialReferenceUtilities
 
 # LOCALS ===========================================
-deleteme = [] # intermediate datasets to be deleted
 debug = True # extra messaging during development
-srWGS84 = arcpy.SpatialReference(4326) # GCS_WGS_1984
-srWAZED = arcpy.SpatialReference(54032) # World Azimuthal Equidistant
 llosFields = {"OFFSET":[2.0, "Offset height above surface"]}
 rlosFields = {"OFFSETA":[2.0, "Observer offset above surface"],
               "OFFSETB":[0.0, "Target offset above surface"],
@@ -64,24 +71,30 @@ acceptableDistanceUnits = ['METERS', 'KILOMETERS',
                            'FEET', 'US_SURVEY_FEET']
 joinExcludeFields = ['OBJECTID', 'OID', 'ObjectID',
                      'SHAPE', 'Shape', 'Shape_Length', 'Shape_Area']
-scratch = None
+viewshedCacheFolderName = "viewshedCache" # folder in the scratch folder for cached observer viewsheds
+viewshedSettings = (1.0, "CURVED_EARTH", 0.13) # Viewshed z factor, curvature correction, refractivity coefficient
+viewshedObserverFields = ["SPOT", "OFFSETA", "OFFSETB", "AZIMUTH1", "AZIMUTH2",
+                          "VERT1", "VERT2", "RADIUS1", "RADIUS2"] # observer fields that control Viewshed
+maxCachedViewsheds = 500 # cached observer viewsheds kept before the least recently used are removed
 
 # FUNCTIONS ========================================
-def _getFieldNameList(targetTable, excludeList):
+def _getFieldNameList(targetTable, excludeList, scratch=None):
     '''
     Returns a list of field names from targetTable
+
+    scratch - ScratchWorkspace of the tool run, to use its field name cache
     '''
     nameList = []
     try:
         if not targetTable:
             raise Exception("Source table {0} does not exist or is null.".format(targetTable))
-        fields = arcpy.ListFields(targetTable)
-        for field in fields:
+        fieldNames = Utilities.GetFieldNames(targetTable, scratch)
+        for fieldName in fieldNames:
             if not excludeList or not excludeList == []:
-                if not field.name in excludeList:
-                    nameList.append(field.name.upper())
+                if not fieldName in excludeList:
+                    nameList.append(fieldName.upper())
             else:
-                nameList.append(field.name.upper())
+                nameList.append(fieldName.upper())
         return nameList
     except arcpy.ExecuteError:
         # Get the tool error messages
@@ -106,12 +119,14 @@ def _getFieldNameList(targetTable, excludeList):
         print(pymsg + "\n")
         print(msgs)
 
-def _addDoubleField(targetTable, fieldsToAdd):
+def _addDoubleField(targetTable, fieldsToAdd, scratch=None):
     '''
     Adds a list of fields to a targetTable
+
+    scratch - ScratchWorkspace of the tool run, to use its field name cache
     '''
     try:
-        existingFields = _getFieldNameList(targetTable, joinExcludeFields)
+        existingFields = _getFieldNameList(targetTable, joinExcludeFields, scratch)
         for currentField in list(fieldsToAdd.keys()):
             if currentField in existingFields:
                 arcpy.AddWarning("Field {0} is already in {1}. Skipping this field name.".format(currentField, targetTable))
@@ -127,6 +142,85 @@ def _addDoubleField(targetTable, fieldsToAdd):
                                           '',
                                           '',
                                           fAlias) 
+                if scratch is not None:
+                    scratch.clearFieldNames(targetTable)
+        return targetTable
+    except arcpy.ExecuteError:
+        # Get the tool error messages
+        msgs = arcpy.GetMessages()
+        arcpy.AddError(msgs)
+        print(msgs)
+
+    except:
+        # Get the traceback object
+        tb = sys.exc_info()[2]
+        tbinfo = traceback.format_tb(tb)[0]
+
+        # Concatenate information together concerning the error into a message string
+        pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + \
+                "\nError Info:\n" + str(sys.exc_info()[1])
+        msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages() + "\n"
+
+        # Return python error messages for use in script tool or Python Window
+        arcpy.AddError(pymsg)
+        arcpy.AddError(msgs)
+        # Print Python error messages for use in Python / Python Window
+        print(pymsg + "\n")
+        print(msgs)
+
+def _addFieldsAndCalculateValues(targetTable, fieldsToAdd, fieldValues=None, fieldType="DOUBLE", scratch=None):
+    '''
+    Adds any missing fields to targetTable in one schema operation and
+    writes all field values in a single UpdateCursor pass
+
+    targetTable - table or feature class to update
+    fieldsToAdd - dictionary of {fieldName:[defaultValue, alias]}
+    fieldValues - optional dictionary of {fieldName:value}, overrides the defaults
+    fieldType - field type used for fields that are added, default is DOUBLE.
+    Values are cast to the type each field actually has, so fields that
+    already exist keep their own type.
+    scratch - ScratchWorkspace of the tool run, to use its field name cache
+
+    returns the targetTable
+    '''
+    try:
+        if not fieldValues:
+            fieldValues = {}
+        existingFields = _getFieldNameList(targetTable, joinExcludeFields, scratch)
+        missingFields = [f for f in fieldsToAdd if not f.upper() in existingFields]
+        if missingFields:
+            if debug: arcpy.AddMessage("Adding fields {0} to {1}".format(missingFields, targetTable))
+            if hasattr(arcpy, "AddFields_management"):
+                # ArcGIS Pro 2.2+: one schema change for all of the fields
+                arcpy.AddFields_management(targetTable,
+                                           [[f, fieldType, fieldsToAdd[f][1]] for f in missingFields])
+            else:
+                for f in missingFields:
+                    arcpy.AddField_management(targetTable,
+                                              f,
+                                              fieldType,
+                                              '',
+                                              '',
+                                              '',
+                                              fieldsToAdd[f][1])
+            if scratch is not None:
+                scratch.clearFieldNames(targetTable)
+
+        updateFields = list(fieldsToAdd.keys())
+        fieldTypes = dict((f.name.upper(), f.type) for f in arcpy.ListFields(targetTable))
+        updateValues = []
+        for f in updateFields:
+            value = fieldValues.get(f, fieldsToAdd[f][0])
+            if fieldTypes.get(f.upper()) in ["SmallInteger", "Integer", "BigInteger"]:
+                updateValues.append(int(float(value)))
+            else:
+                updateValues.append(float(value))
+
+        if debug: arcpy.AddMessage("Calculating values for {0}".format(updateFields))
+        with arcpy.da.UpdateCursor(targetTable, updateFields) as cursor:
+            for row in cursor:
+                cursor.updateRow(updateValues)
+
         return targetTable
     except arcpy.ExecuteError:
         # Get the tool error messages
@@ -261,23 +355,43 @@ def _getRasterMinMax(inputRaster):
         print(pymsg + "\n")
         print(msgs) 
 
-def _clipRasterToArea(inputSurface, inputArea, outputClip):
+def _readSurfaceInArea(inputSurface, inputArea):
+    '''
+    Reads the cells of inputSurface whose centers fall inside the polygons of inputArea
+    inputSurface - input elevation raster
+    inputArea - polygon features
+
+    returns [values, row0, col0] where values is a NumPy array with NaN outside
+    inputArea or NoData, and row0, col0 is its position in inputSurface
+    '''
+    surfaceReader = SurfaceReader.getSurfaceReader(inputSurface)
+    polygons = []
+    with arcpy.da.SearchCursor(inputArea, ["SHAPE@"],
+                               spatial_reference=surfaceReader.spatialReference) as cursor:
+        for row in cursor:
+            polygons.append(row[0])
+    if not polygons:
+        raise Exception("Input area {0} has no features.".format(os.path.basename(inputArea)))
+    return surfaceReader.readPolygon(polygons)
+
+def _clipRasterToArea(inputSurface, inputArea, outputClip=None):
     '''
     returns a raster subset that is clipped from inputSurface using inputArea.
+    Cells are read through the shared SurfaceReader, so only the blocks
+    under inputArea are read from inputSurface. Without outputClip the
+    subset is a temporary raster made from the clipped window, for tools
+    that need a raster input; callers that only need the cells use
+    _readSurfaceInArea.
     '''
     try:
-        #Need Spatial Analyst to run this tool
-        if arcpy.CheckExtension("Spatial") == "Available":
-            arcpy.CheckOutExtension("Spatial")
-        else:
-            raise Exception("Spatial Analyst license is not available.")
-        from arcpy import sa
         env.overwriteOutput = True
         arcpy.AddMessage("Clipping {0} to area {1}...".format(os.path.basename(inputSurface),
                                                               os.path.basename(inputArea)))
-        saClipSurface = sa.ExtractByMask(inputSurface, inputArea)
-        saClipSurface.save(outputClip)
-        return outputClip
+        values, row0, col0 = _readSurfaceInArea(inputSurface, inputArea)
+        surfaceReader = SurfaceReader.getSurfaceReader(inputSurface)
+        if outputClip is None:
+            return surfaceReader.windowRaster(values, row0, col0)
+        return surfaceReader.saveWindow(values, row0, col0, outputClip)
     
     except arcpy.ExecuteError:
         # Get the tool error messages
@@ -347,15 +461,15 @@ def _getCentroid(inputFeatures):
     try:
         featureSR = arcpy.Describe(inputFeatures).spatialReference
         #centroidPoint = None
-        observerMBG = os.path.join("in_memory", "observerMBG")
-        result = arcpy.MinimumBoundingGeometry_management(inputFeatures,
-                                                          observerMBG,
-                                                          "RECTANGLE_BY_WIDTH")
-        deleteme.append(observerMBG)
-        with arcpy.da.SearchCursor(observerMBG, ["SHAPE@"]) as cursor:
-            for row in cursor:
-                plyCentroid = row[0].centroid
-                centroidPoint = arcpy.PointGeometry(plyCentroid, featureSR)
+        with Utilities.ScratchWorkspace() as scratch:
+            observerMBG = scratch.name("observerMBG")
+            result = arcpy.MinimumBoundingGeometry_management(inputFeatures,
+                                                              observerMBG,
+                                                              "RECTANGLE_BY_WIDTH")
+            with arcpy.da.SearchCursor(observerMBG, ["SHAPE@"]) as cursor:
+                for row in cursor:
+                    plyCentroid = row[0].centroid
+                    centroidPoint = arcpy.PointGeometry(plyCentroid, featureSR)
         return centroidPoint
     
     except arcpy.ExecuteError:
@@ -387,18 +501,10 @@ def _getLocalWAZED(inputPoint):
     Spatial Reference based on inputPoint as PointGeometry
     '''
     try:
-        newSR = arcpy.SpatialReference()
-        pntGeom = inputPoint.projectAs(srWGS84)
+        pntGeom = inputPoint.projectAs(SpatialReferenceUtilities.GetSpatialReference(4326))
         pnt = pntGeom.firstPoint
-        strAZED = srWAZED.exportToString()
         arcpy.AddMessage("Using Central Meridian: {0}, and Latitude of Origin: {1}.".format(pnt.X, pnt.Y))
-        strAZED = re.sub('PARAMETER\[\'Central_Meridian\'\,.+?]',
-               'PARAMETER[\'Central_Meridian\',{0}]'.format(str(pnt.X)),
-               strAZED)
-        strAZED = re.sub('PARAMETER\[\'Latitude_Of_Origin\'\,.+?]',
-               'PARAMETER[\'Latitude_Of_Origin\',{0}]'.format(str(pnt.Y)),
-               strAZED)
-        newSR.loadFromString(strAZED)
+        newSR = SpatialReferenceUtilities.GetLocalAzimuthalEquidistant(pnt.X, pnt.Y)
 
         return newSR
     except arcpy.ExecuteError:
@@ -431,18 +537,24 @@ def _prepPointFromSurface(inputPoints, inputSurface, outputPoints, offsetFieldNa
     try:
         if debug: arcpy.AddMessage("Adding surface info for {0}".format(os.path.basename(inputPoints)))
         zFieldName = "Z"
-        # get Z from surface for points
-        arcpy.AddSurfaceInformation_3d(inputPoints,
-                                       inputSurface,
-                                       zFieldName,
-                                       "BILINEAR")
         inputPoints = _addDoubleField(inputPoints,
-                                      {spotFieldName:[0.0, spotFieldName]})
-        # calculate SPOT = Z + OFFSET
-        arcpy.CalculateField_management(inputPoints,
-                                        spotFieldName,
-                                        "!{0}! + !{1}!".format(zFieldName, offsetFieldName),
-                                        "PYTHON_9.3")
+                                      {zFieldName:[0.0, zFieldName],
+                                       spotFieldName:[0.0, spotFieldName]})
+        # get Z from surface for points, and write Z and SPOT = Z + OFFSET together
+        surfaceReader = SurfaceReader.getSurfaceReader(inputSurface)
+        with arcpy.da.SearchCursor(inputPoints, ["SHAPE@XY"],
+                                   spatial_reference=surfaceReader.spatialReference) as cursor:
+            pointXY = numpy.array([row[0] for row in cursor], dtype=float).reshape(-1, 2)
+        zValues = surfaceReader.valuesAt(pointXY[:, 0], pointXY[:, 1], bilinear=True)
+        with arcpy.da.UpdateCursor(inputPoints, [offsetFieldName, zFieldName, spotFieldName]) as cursor:
+            for row, z in zip(cursor, zValues):
+                if numpy.isnan(z):
+                    arcpy.AddWarning("Point is on NoData in {0}.".format(os.path.basename(inputSurface)))
+                    row[1] = row[2] = None
+                else:
+                    row[1] = float(z)
+                    row[2] = float(z) + float(row[0] or 0.0)
+                cursor.updateRow(row)
         
         # Make 3D point from SPOT
         arcpy.FeatureTo3DByAttribute_3d(inputPoints,
@@ -494,7 +606,7 @@ def surfaceContainsPoints(pointFeatures, surfaceRaster):
 
     surfaceExtent = surfaceDesc.extent
 
-    srWGS84 = arcpy.SpatialReference(4326) # GCS_WGS_1984
+    srWGS84 = SpatialReferenceUtilities.GetSpatialReference(4326) # GCS_WGS_1984
     projSurfaceExtent = surfaceExtent.projectAs(srWGS84) 
 
     pointRows = arcpy.da.SearchCursor(pointFeatures, ["SHAPE@"])
@@ -520,11 +632,162 @@ def surfaceContainsPoints(pointFeatures, surfaceRaster):
 
     return isWithin
 
+def _getViewshedCacheFolder():
+    '''
+    returns the folder in the scratch folder that holds cached observer viewsheds
+    '''
+    cacheFolder = os.path.join(env.scratchFolder, viewshedCacheFolderName)
+    if not os.path.exists(cacheFolder):
+        os.makedirs(cacheFolder)
+    return cacheFolder
+
+def _viewshedObserverFieldNames(observerFeatures):
+    '''
+    returns the names of the viewshedObserverFields in observerFeatures, in
+    the order of viewshedObserverFields
+    '''
+    fieldNames = dict((name.upper(), name) for name in Utilities.GetFieldNames(observerFeatures))
+    return [fieldNames[name] for name in viewshedObserverFields if name in fieldNames]
+
+def _observerViewshedCacheFile(observerID, x, y, observerValues, surfaceReader):
+    '''
+    Gets the cache file for one observer's viewshed. The name changes when the
+    observer ID, location, any field that controls Viewshed, or the surface change.
+    observerID - OID of the observer in the input features
+    x, y - observer location in the surface spatial reference
+    observerValues - dictionary of {fieldName:value} of the observer's
+    viewshedObserverFields, see _viewshedObserverFieldNames
+    surfaceReader - SurfaceReader of the input surface
+
+    returns path to a .npz file, which may not exist yet
+    '''
+    fieldValues = sorted((name.upper(), None if value is None else float(value))
+                         for name, value in observerValues.items())
+    key = repr((observerID, round(x, 3), round(y, 3), fieldValues,
+                surfaceReader.identity, viewshedSettings))
+    keyHash = hashlib.md5(key.encode("utf-8")).hexdigest()
+    return os.path.join(_getViewshedCacheFolder(), "viewshed_{0}.npz".format(keyHash))
+
+def _pruneViewshedCache(keepFiles):
+    '''
+    Removes the least recently used cached viewsheds past maxCachedViewsheds,
+    never removing keepFiles
+    '''
+    cacheFolder = _getViewshedCacheFolder()
+    cacheFiles = [os.path.join(cacheFolder, f) for f in os.listdir(cacheFolder) if f.endswith(".npz")]
+    if len(cacheFiles) <= maxCachedViewsheds:
+        return
+    cacheFiles.sort(key=os.path.getmtime)
+    for cacheFile in cacheFiles[:len(cacheFiles) - maxCachedViewsheds]:
+        if not cacheFile in keepFiles:
+            os.remove(cacheFile)
+
+def _buildCachedViewshed(inputObserverFeatures,
+                         localObservers,
+                         surfaceObservers,
+                         inputSurface,
+                         srLocalWAZED,
+                         outputViewshed,
+                         scratch):
+    '''
+    Builds the combined viewshed of all observers from per observer viewsheds.
+    Viewsheds of observers that have not changed since an earlier run are
+    read from the cache, only new or moved observers are recomputed.
+    inputObserverFeatures - original observer features, for observer IDs
+    localObservers - observers in srLocalWAZED
+    surfaceObservers - the same observers in the surface spatial reference, with
+    OFFSETA and RADIUS2 and any other of the viewshedObserverFields
+    inputSurface - surface for the viewsheds
+    srLocalWAZED - localized azimuthal equidistant spatial reference of localObservers
+    outputViewshed - raster of the number of observers that can see each cell
+    scratch - Utilities.ScratchWorkspace for intermediate datasets
+
+    returns outputViewshed
+    '''
+    from arcpy import sa
+    surfaceReader = SurfaceReader.getSurfaceReader(inputSurface)
+    srSurface = surfaceReader.spatialReference
+    observerIDs = [row[0] for row in arcpy.da.SearchCursor(inputObserverFeatures, ["OID@"])]
+    localXY = [row[0] for row in arcpy.da.SearchCursor(localObservers, ["SHAPE@XY"])]
+    surfaceOIDField = arcpy.Describe(surfaceObservers).OIDFieldName
+    # every field Viewshed reads is part of the cache key
+    observerFields = _viewshedObserverFieldNames(surfaceObservers)
+    radiusIndex = [name.upper() for name in observerFields].index("RADIUS2")
+    surfaceRows = [row for row in arcpy.da.SearchCursor(surfaceObservers,
+                                                        ["OID@", "SHAPE@XY"] + observerFields)]
+
+    cacheFiles = []
+    reusedCount = 0
+    previousOutputSR = env.outputCoordinateSystem
+    # observer viewsheds are built on the surface grid so they can be combined as arrays
+    env.outputCoordinateSystem = srSurface
+    try:
+        for observerID, (lx, ly), surfaceRow in zip(observerIDs, localXY, surfaceRows):
+            oid, (x, y), values = surfaceRow[0], surfaceRow[1], surfaceRow[2:]
+            cacheFile = _observerViewshedCacheFile(observerID, x, y, dict(zip(observerFields, values)), surfaceReader)
+            cacheFiles.append(cacheFile)
+            if os.path.exists(cacheFile):
+                # mark as recently used
+                os.utime(cacheFile, None)
+                reusedCount += 1
+                continue
+
+            if debug: arcpy.AddMessage("Building viewshed for observer {0}...".format(observerID))
+            # surface window for a square of RADIUS2 around the observer
+            radius = float(values[radiusIndex])
+            square = arcpy.Polygon(arcpy.Array([arcpy.Point(lx - radius, ly - radius),
+                                                arcpy.Point(lx - radius, ly + radius),
+                                                arcpy.Point(lx + radius, ly + radius),
+                                                arcpy.Point(lx + radius, ly - radius)]),
+                                   srLocalWAZED)
+            row0, col0, nrows, ncols = surfaceReader.windowForExtent(square.projectAs(srSurface).extent)
+            observerClip = scratch.name("observerClip", inMemory=False, raster=True)
+            surfaceReader.saveWindow(surfaceReader.readWindow(row0, col0, nrows, ncols),
+                                     row0, col0, observerClip)
+
+            observerLayer = scratch.layer("observerLayer")
+            arcpy.MakeFeatureLayer_management(surfaceObservers,
+                                              observerLayer,
+                                              "{0} = {1}".format(surfaceOIDField, oid))
+            saViewshed = sa.Viewshed(observerClip,
+                                     observerLayer,
+                                     viewshedSettings[0],
+                                     viewshedSettings[1],
+                                     viewshedSettings[2])
+            visible = arcpy.RasterToNumPyArray(saViewshed, nodata_to_value=-1).astype(numpy.int8)
+            viewshedRow0 = int(round((surfaceReader.yMax - saViewshed.extent.YMax) / surfaceReader.cellHeight))
+            viewshedCol0 = int(round((saViewshed.extent.XMin - surfaceReader.xMin) / surfaceReader.cellWidth))
+            numpy.savez(cacheFile, visible=visible, origin=numpy.array([viewshedRow0, viewshedCol0]))
+    finally:
+        env.outputCoordinateSystem = previousOutputSR
+
+    arcpy.AddMessage("Reused cached viewsheds for {0} of {1} observers.".format(reusedCount, len(cacheFiles)))
+    _pruneViewshedCache(cacheFiles)
+
+    # combine observer viewsheds into a count of observers that can see each cell
+    observerViewsheds = []
+    for cacheFile in cacheFiles:
+        with numpy.load(cacheFile) as cached:
+            observerViewsheds.append([cached["visible"], int(cached["origin"][0]), int(cached["origin"][1])])
+    top = min([v[1] for v in observerViewsheds])
+    left = min([v[2] for v in observerViewsheds])
+    bottom = max([v[1] + v[0].shape[0] for v in observerViewsheds])
+    right = max([v[2] + v[0].shape[1] for v in observerViewsheds])
+    visibleCount = numpy.full((bottom - top, right - left), -1, dtype=numpy.int32)
+    for visible, row0, col0 in observerViewsheds:
+        target = visibleCount[row0 - top:row0 - top + visible.shape[0],
+                              col0 - left:col0 - left + visible.shape[1]]
+        covered = visible >= 0
+        target[covered] = numpy.maximum(target[covered], 0) + visible[covered]
+    combined = numpy.where(visibleCount < 0, numpy.nan, visibleCount)
+    return surfaceReader.saveWindow(combined, top, left, outputViewshed, pixelType="S32")
+
 def makeProfileGraph(inputFeatures):
     '''
     '''
     
-    scratchFolder = arcpy.env.scratchFolder
+    scratch = Utilities.ScratchWorkspace()
+    scratchFolder = scratch.folder("profileGraphs")
     srInput = arcpy.Describe(inputFeatures).spatialReference
 
 
@@ -551,6 +814,7 @@ def makeProfileGraph(inputFeatures):
         arcpy.AddMessage("Found {0} unique sight line IDs ...".format(len(sightLineIDs)))
         
         arcpy.AddField_management(inputFeatures,profileGraphName,"TEXT")
+        scratch.clearFieldNames(inputFeatures)
         expression = '"profile" + str(!SourceOID!) + ".png"'
         arcpy.CalculateField_management(inputFeatures,profileGraphName,expression, "PYTHON")
         
@@ -676,28 +940,18 @@ def makeProfileGraph(inputFeatures):
                 pylab.close()  #closing pylab to prevent crashes
                 
                 graphLocationDict[llosID] = graphPath
-                deleteme.append(graphPath)
             
         # TODO: start an update cursor
         arcpy.AddMessage("Enabling attachments ...")
         arcpy.EnableAttachments_management(inputFeatures)
         
-        matchTable = os.path.join(scratch,"matchTable")
-        deleteme.append(matchTable)
+        matchTable = scratch.name("matchTable")
         arcpy.AddMessage("Building match table ...")
         arcpy.GenerateAttachmentMatchTable_management(inputFeatures,scratchFolder,matchTable,profileGraphName,"*.png","ABSOLUTE")
         
         arcpy.AddMessage("Attaching profile graphs to sightlines ...")
         inOIDField = arcpy.Describe(inputFeatures).OIDFieldName
         arcpy.AddAttachments_management(inputFeatures,inOIDField,matchTable,"MatchID","Filename")
-        
-            
-        # cleanup
-        # arcpy.AddMessage("Removing scratch data ...")
-        # for ds in deleteme:
-        #     if arcpy.Exists(ds):
-        #         arcpy.Delete_management(ds)
-        #         if debug == True: arcpy.AddMessage(str(ds))
     
     except arcpy.ExecuteError:
         error = True
@@ -727,6 +981,10 @@ def makeProfileGraph(inputFeatures):
         #print msgs #UPDATE
         print(msgs)
 
+    finally:
+        # cleanup graphs and match table
+        scratch.cleanup()
+
 ''' TOOL METHODS '''
 
 def hi_lowPointByArea(inputAreaFeature,
@@ -743,7 +1001,7 @@ def hi_lowPointByArea(inputAreaFeature,
     
     returns point feature class
     '''
-    global scratch
+    scratch = Utilities.ScratchWorkspace()
     try:
         # Check if a valid input area is supplied
         if not inputAreaFeature:
@@ -753,18 +1011,7 @@ def hi_lowPointByArea(inputAreaFeature,
         if int(arcpy.GetCount_management(inputAreaFeature).getOutput(0)) == 0:
             arcpy.AddError("Please provide at least one input area feature")
             return
-        #Need Spatial Analyst to run this tool
-        if arcpy.CheckExtension("Spatial") == "Available":
-            arcpy.CheckOutExtension("Spatial")
-        else:
-            raise Exception("Spatial Analyst license is not available.")
-        from arcpy import sa
-        
         env.overwriteOutput = True
-        if arcpy.env.scratchWorkspace:
-            scratch = arcpy.env.scratchWorkspace
-        else:
-            scratch = r"%scratchGDB%"
         
         #Get SR of the surface and set as default output
         surfaceDescribe = arcpy.Describe(inputSurfaceRaster)
@@ -776,45 +1023,43 @@ def hi_lowPointByArea(inputAreaFeature,
         #TODO: Warn user if clipping large area of small cells, and processing will take time
             
         #Make a copy of the input Area in the SR of the surface
-        tempAreaFeatures = os.path.join(scratch, "tempAreaFeatures")
+        tempAreaFeatures = scratch.name("tempAreaFeatures")
         arcpy.Project_management(inputAreaFeature,
                                  tempAreaFeatures,
                                  srSurface)
-        deleteme.append(tempAreaFeatures)
         
         #TODO: Compare extents of area and surface, if area not inside, raise Exception
         
-        #Clipping surface to area
-        clipSurface = os.path.join(scratch, "clipSurface")
-        clipSurface = _clipRasterToArea(inputSurfaceRaster, tempAreaFeatures, clipSurface)
-        deleteme.append(clipSurface)
-        
-        #Get stats for clipped surface
-        filterStatValue = None
-        minStatValue, maxStatValue = _getRasterMinMax(clipSurface)
+        #Read surface cells in the area
+        arcpy.AddMessage("Reading {0} in area...".format(os.path.basename(inputSurfaceRaster)))
+        areaValues, row0, col0 = _readSurfaceInArea(inputSurfaceRaster, tempAreaFeatures)
+        if numpy.isnan(areaValues).all():
+            raise Exception("The input area does not overlap any surface values.")
+
+        #Get stats for surface in area
         if hi_low_Switch == "MAXIMUM":
-            filterStatValue = maxStatValue
+            filterStatValue = float(numpy.nanmax(areaValues))
         else:
-            filterStatValue = minStatValue
-        
+            filterStatValue = float(numpy.nanmin(areaValues))
 
-        #Filter the cells from clipped raster
+        #Filter the cells with the stat value and write them as points
         arcpy.AddMessage("Finding cells with {0} value of {1}...".format(hi_low_Switch, filterStatValue))
-        expressionSetNull = r"VALUE <> {0}".format(filterStatValue)
-        setNull = os.path.join(scratch, "setNull")
-        resultSetNull = sa.SetNull(clipSurface, clipSurface, expressionSetNull)
-        resultSetNull.save(setNull)
-        deleteme.append(setNull)
-        
-        #Converting to points
-        arcpy.RasterToPoint_conversion(setNull, outputPointFeature, "VALUE")
-        #Add 'Elevation' field, and remove 'Grid_code'
+        rows, cols = numpy.nonzero(areaValues == filterStatValue)
+        surfaceReader = SurfaceReader.getSurfaceReader(inputSurfaceRaster)
+        xs, ys = surfaceReader.cellCenters(row0, col0, areaValues.shape[0], areaValues.shape[1])
+        arcpy.CreateFeatureclass_management(os.path.dirname(outputPointFeature),
+                                            os.path.basename(outputPointFeature),
+                                            "POINT",
+                                            None,
+                                            "DISABLED",
+                                            "DISABLED",
+                                            srSurface)
         addFieldName = "Elevation"
-        dropFieldName = "grid_code"
-        outputPointFeature = _addDoubleField(outputPointFeature, {addFieldName:[0,addFieldName]})
-        expressionCalcField = r"!{0}!".format(dropFieldName)
-        arcpy.CalculateField_management(outputPointFeature, addFieldName, expressionCalcField, "PYTHON_9.3")
-        arcpy.DeleteField_management(outputPointFeature, [dropFieldName, "pointid"])
+        outputPointFeature = _addDoubleField(outputPointFeature, {addFieldName:[0,addFieldName]}, scratch)
+        with arcpy.da.InsertCursor(outputPointFeature, ["SHAPE@XY", addFieldName]) as cursor:
+            for row, col in zip(rows, cols):
+                cursor.insertRow([(float(xs[col]), float(ys[row])), filterStatValue])
+        scratch.clearFieldNames(outputPointFeature)
 
         return outputPointFeature
     
@@ -842,14 +1087,10 @@ def hi_lowPointByArea(inputAreaFeature,
         print(msgs)
         
     finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if arcpy.Exists(i):
-                    if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                    arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
+        # cleanup intermediate datasets
+        if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
+        scratch.cleanup()
+        if debug == True: arcpy.AddMessage("Done")
 
 def addLLOSFields(inputObserverTable,
                   inputObserverDefault,
@@ -870,21 +1111,15 @@ def addLLOSFields(inputObserverTable,
     try:
         # Add field to Observer table
         env.overwriteOutput = True
-        arcpy.AddMessage("Adding Observer fields...")
-        outputObserverTable = _addDoubleField(inputObserverTable,
-                                      llosFields)
-        arcpy.AddMessage("Calculating Observer values...")                              
-        outputObserverTable = _calculateFieldValue(outputObserverTable,
-                                                   "OFFSET",
-                                                   float(inputObserverDefault))
+        arcpy.AddMessage("Adding Observer fields and values...")
+        outputObserverTable = _addFieldsAndCalculateValues(inputObserverTable,
+                                                           llosFields,
+                                                           {"OFFSET":float(inputObserverDefault)})
         #Add field to Target table
-        arcpy.AddMessage("Adding Target fields...")
-        outputTargetTable = _addDoubleField(inputTargetTable,
-                                            llosFields)
-        arcpy.AddMessage("Calculating Target values...")                                    
-        outputObserverTable = _calculateFieldValue(outputTargetTable,
-                                                   "OFFSET",
-                                                   float(inputTargetDefault))
+        arcpy.AddMessage("Adding Target fields and values...")
+        outputTargetTable = _addFieldsAndCalculateValues(inputTargetTable,
+                                                         llosFields,
+                                                         {"OFFSET":float(inputTargetDefault)})
         
         return [outputObserverTable, outputTargetTable]
     
@@ -910,16 +1145,6 @@ def addLLOSFields(inputObserverTable,
         # Print Python error messages for use in Python / Python Window
         print(pymsg + "\n")
         print(msgs)
-        
-    finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if arcpy.Exists(i):
-                    if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                    arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
 
 def addRLOSObserverFields(inputFeatures,
                           inputOFFSETA,
@@ -955,17 +1180,17 @@ def addRLOSObserverFields(inputFeatures,
         if not inputVERT1: inputVERT1 = 90.0
         if not inputVERT2: inputVERT2 = -90.0
         
-        _addDoubleField(inputFeatures, rlosFields)
-        
-        arcpy.AddMessage("Updating Observer values...")        
-        _calculateFieldValue(inputFeatures, "OFFSETA", inputOFFSETA)
-        _calculateFieldValue(inputFeatures, "OFFSETB", inputOFFSETB)
-        _calculateFieldValue(inputFeatures, "RADIUS1", inputRADIUS1)
-        _calculateFieldValue(inputFeatures, "RADIUS2", inputRADIUS2)
-        _calculateFieldValue(inputFeatures, "AZIMUTH1", inputAZIMUTH1)
-        _calculateFieldValue(inputFeatures, "AZIMUTH2", inputAZIMUTH2)
-        _calculateFieldValue(inputFeatures, "VERT1", inputVERT1)
-        _calculateFieldValue(inputFeatures, "VERT2", inputVERT2)
+        arcpy.AddMessage("Updating Observer fields and values...")
+        _addFieldsAndCalculateValues(inputFeatures,
+                                     rlosFields,
+                                     {"OFFSETA":inputOFFSETA,
+                                      "OFFSETB":inputOFFSETB,
+                                      "RADIUS1":inputRADIUS1,
+                                      "RADIUS2":inputRADIUS2,
+                                      "AZIMUTH1":inputAZIMUTH1,
+                                      "AZIMUTH2":inputAZIMUTH2,
+                                      "VERT1":inputVERT1,
+                                      "VERT2":inputVERT2})
         
         return inputFeatures
     
@@ -991,16 +1216,6 @@ def addRLOSObserverFields(inputFeatures,
         # Print Python error messages for use in Python / Python Window
         print(pymsg + "\n")
         print(msgs)
-        
-    finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if arcpy.Exists(i):
-                    if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                    arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
 
 def findLocalPeaks(inputAreaFeature,
                    inputNumberOfPeaks,
@@ -1015,7 +1230,7 @@ def findLocalPeaks(inputAreaFeature,
     
     returns output point feature class
     '''
-    global scratch
+    scratch = Utilities.ScratchWorkspace()
     try:
         # Check if a valid input area is supplied
         if not inputAreaFeature:
@@ -1033,10 +1248,6 @@ def findLocalPeaks(inputAreaFeature,
         from arcpy import sa
         
         env.overwriteOutput = True
-        if arcpy.env.scratchWorkspace:
-            scratch = arcpy.env.scratchWorkspace
-        else:
-            scratch = r"%scratchGDB%"            
         
         #Get SR of the surface and set as default output
         surfaceDescribe = arcpy.Describe(inputSurfaceRaster)
@@ -1046,29 +1257,30 @@ def findLocalPeaks(inputAreaFeature,
         arcpy.AddMessage("Using {0} for analysis.".format(srSurface.name))
             
         #Make a copy of the input Area in the SR of the surface
-        tempAreaFeatures = os.path.join(scratch, "tempAreaFeatures")
+        tempAreaFeatures = scratch.name("tempAreaFeatures")
         arcpy.Project_management(inputAreaFeature,
                                  tempAreaFeatures,
                                  srSurface)
-        deleteme.append(tempAreaFeatures)
         
         #TODO: Compare extents of area and surface, if area not inside, raise Exception
         
-        #Clipping surface to area
-        clipSurface = os.path.join(scratch, "clipSurface")
-        clipSurface = _clipRasterToArea(inputSurfaceRaster, tempAreaFeatures, clipSurface)
-        deleteme.append(clipSurface)
+        #Read surface cells in the area
+        arcpy.AddMessage("Reading {0} in area...".format(os.path.basename(inputSurfaceRaster)))
+        areaValues, row0, col0 = _readSurfaceInArea(inputSurfaceRaster, tempAreaFeatures)
+        if numpy.isnan(areaValues).all():
+            raise Exception("The input area does not overlap any surface values.")
         arcpy.AddMessage("Inverting clipped surface...")
-        minStatValue, maxStatValue = _getRasterMinMax(clipSurface)
-        invertedMapAlgebra = (((arcpy.Raster(clipSurface) - minStatValue) * -1) + maxStatValue)
+        minStatValue, maxStatValue = float(numpy.nanmin(areaValues)), float(numpy.nanmax(areaValues))
+        surfaceReader = SurfaceReader.getSurfaceReader(inputSurfaceRaster)
+        clipSurface = surfaceReader.windowRaster(areaValues, row0, col0)
+        invertedMapAlgebra = (((clipSurface - minStatValue) * -1) + maxStatValue)
 
         #flow direction & sink
         arcpy.AddMessage("Finding inverted sinks...")
         saFlowDirection = sa.FlowDirection(invertedMapAlgebra, "NORMAL")
         saSink = sa.Sink(saFlowDirection)
-        invertedSinks = os.path.join("in_memory", "invertedSinks")
+        invertedSinks = scratch.name("invertedSinks")
         saSink.save(invertedSinks)
-        deleteme.append(invertedSinks)
              
         #need to make sure there is a VAT for GetCount
         arcpy.BuildRasterAttributeTable_management(invertedSinks, "Overwrite")
@@ -1086,7 +1298,7 @@ def findLocalPeaks(inputAreaFeature,
             #convert the sink values to a polygon feature class,
             #This prevents adjacent cells of the same pixel value being seen as separate sink areas 
             arcpy.AddMessage("Converting sink values to polygon features...")
-            sinkPolys = os.path.join(scratch, "sinkPolys")
+            sinkPolys = scratch.name("sinkPolys")
             rasterValueField = "Value"
             conversionField = "Gridcode"
             simplifyShape = "NO_SIMPLIFY"
@@ -1094,18 +1306,23 @@ def findLocalPeaks(inputAreaFeature,
                                              sinkPolys,
                                              simplifyShape,
                                              rasterValueField)
-            deleteme.append(sinkPolys)
         
             #convert the polygon fc to a point fc to get central point of each feature
-            pointSinks = os.path.join(scratch, "pointSinks")
+            pointSinks = scratch.name("pointSinks")
             arcpy.FeatureToPoint_management(sinkPolys, pointSinks)
-            deleteme.append(pointSinks)
             
             #extract values to points
             arcpy.AddMessage("Extracting elevation values from {0}...".format(inputSurfaceRaster))
-            sinkValues = os.path.join(scratch, "sinkValues")            
-            sa.ExtractValuesToPoints(pointSinks, inputSurfaceRaster, sinkValues, "NONE", "VALUE_ONLY")
-            deleteme.append(sinkValues)
+            sinkValues = pointSinks
+            sinkValues = _addDoubleField(sinkValues, {"RASTERVALU":[0.0, "RASTERVALU"]}, scratch)
+            with arcpy.da.SearchCursor(sinkValues, ["SHAPE@XY"],
+                                       spatial_reference=surfaceReader.spatialReference) as cursor:
+                sinkXY = numpy.array([row[0] for row in cursor], dtype=float).reshape(-1, 2)
+            sinkElevations = surfaceReader.valuesAt(sinkXY[:, 0], sinkXY[:, 1], bilinear=False)
+            with arcpy.da.UpdateCursor(sinkValues, ["RASTERVALU"]) as cursor:
+                for row, elevation in zip(cursor, sinkElevations):
+                    row[0] = None if numpy.isnan(elevation) else float(elevation)
+                    cursor.updateRow(row)
             
             #check the number of sink values is greater the the number of peaks inputted by the users
             if(numberSinkValues <  int(inputNumberOfPeaks)):
@@ -1152,6 +1369,7 @@ def findLocalPeaks(inputAreaFeature,
             arcpy.AddField_management(outputPeakFeatures,
                                       elevField,
                                       "DOUBLE")
+            scratch.clearFieldNames(outputPeakFeatures)
             calculateFieldExpression = r"!{0}!".format(valueField)
             arcpy.CalculateField_management(outputPeakFeatures,
                                             elevField,
@@ -1159,6 +1377,7 @@ def findLocalPeaks(inputAreaFeature,
                                             "PYTHON_9.3")
             # Remove unnecessary fields
             arcpy.DeleteField_management(outputPeakFeatures, [valueField, "grid_code", "pointid"])
+            scratch.clearFieldNames(outputPeakFeatures)
 
             return outputPeakFeatures
     
@@ -1186,14 +1405,10 @@ def findLocalPeaks(inputAreaFeature,
         print(msgs)
         
     finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if arcpy.Exists(i):
-                    if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                    arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
+        # cleanup intermediate datasets
+        if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
+        scratch.cleanup()
+        if debug == True: arcpy.AddMessage("Done")
 
 def linearLineOfSight(inputObserverFeatures,
                       inputObserverHeight,
@@ -1207,7 +1422,7 @@ def linearLineOfSight(inputObserverFeatures,
                       inputObstructionFeatures):
     '''    
     '''
-    global scratch
+    scratch = Utilities.ScratchWorkspace()
     addProfileGraphToSurfaceLine = True
     try:
         # Check if a valid observer is supplied
@@ -1238,10 +1453,6 @@ def linearLineOfSight(inputObserverFeatures,
         else:
             raise Exception("3D Analyst license is not available.")
         
-        if arcpy.env.scratchWorkspace:
-            scratch = arcpy.env.scratchWorkspace
-        else:
-            scratch = r"%scratchGDB%"
         
         # Check that all observer and target points are within the surface extent
         arcpy.AddMessage("Checking that observer points fall within the extent of the input surface.")
@@ -1263,66 +1474,56 @@ def linearLineOfSight(inputObserverFeatures,
         offsetFieldName = "OFFSET"
         #Check if Observers have "OFFSET" field
         hasObsOffset, hasTgtOffset = True, True
-        inputObsFields = _getFieldNameList(inputObserverFeatures, [])
+        inputObsFields = _getFieldNameList(inputObserverFeatures, [], scratch)
         if not offsetFieldName in inputObsFields:
             arcpy.AddMessage("OFFSET field not in Observers. Using Observer Height Above Surface value of {0}".format(inputObserverHeight))
             hasObsOffset = False
         #Check if Targets have "OFFSET" field
-        inputTgtFields = _getFieldNameList(inputTargetFeatures, [])
+        inputTgtFields = _getFieldNameList(inputTargetFeatures, [], scratch)
         if not offsetFieldName in inputTgtFields:
             arcpy.AddMessage("OFFSET field not in Targets. Using Target Height Above Surface value of {0}".format(inputTargetHeight))
             hasTgtOffset = False
         
         #Project Observers and add fields if needed
         arcpy.AddMessage("Projecting Observers and Targets to Input Surface spatial reference {0}".format(srSurface.name))
-        prjObservers = os.path.join(scratch, "prjObservers")
+        prjObservers = scratch.name("prjObservers")
         arcpy.Project_management(inputObserverFeatures,
                                  prjObservers,
                                  srSurface)
-        deleteme.append(prjObservers)
         if not hasObsOffset:
-            prjObservers = _addDoubleField(prjObservers,
-                                           {offsetFieldName:[inputObserverHeight, "Offset above surface"]})
-            prjObservers = _calculateFieldValue(prjObservers,
-                                                offsetFieldName,
-                                                inputObserverHeight)
+            prjObservers = _addFieldsAndCalculateValues(prjObservers,
+                                                        {offsetFieldName:[inputObserverHeight, "Offset above surface"]}, scratch=scratch)
         #Project targets and add fields
-        prjTargets = os.path.join(scratch, "prjTargets")
+        prjTargets = scratch.name("prjTargets")
         arcpy.Project_management(inputTargetFeatures,
                                  prjTargets,
                                  srSurface)
-        deleteme.append(prjTargets)
         if not hasTgtOffset:
-            prjTargets = _addDoubleField(prjTargets,
-                                         {offsetFieldName:[inputTargetHeight, "Offset above surface"]})
-            prjTargets = _calculateFieldValue(prjTargets,
-                                              offsetFieldName,
-                                              inputTargetHeight)
+            prjTargets = _addFieldsAndCalculateValues(prjTargets,
+                                                      {offsetFieldName:[inputTargetHeight, "Offset above surface"]}, scratch=scratch)
 
         #Get elevation of Observers and Targets over surface
         obsSpotFieldName = "ObsSPOT"
-        dddObservers = os.path.join(scratch, "dddObservers")
+        dddObservers = scratch.name("dddObservers", inMemory=False)
         arcpy.AddMessage("Building 3D observer points...")
         dddObservers = _prepPointFromSurface(prjObservers,
                                              inputSurface,
                                              dddObservers,
                                              offsetFieldName,
                                              obsSpotFieldName)
-        deleteme.append(dddObservers)
         tgtSpotFieldName = "TgtSPOT"
-        dddTargets = os.path.join(scratch,"dddTargets")
+        dddTargets = scratch.name("dddTargets", inMemory=False)
         arcpy.AddMessage("Building 3D target points...")
         dddTargets = _prepPointFromSurface(prjTargets,
                                            inputSurface,
                                            dddTargets,
                                            offsetFieldName,
                                            tgtSpotFieldName)
-        deleteme.append(dddTargets)
         
         
         #Construct Sight Lines
         arcpy.AddMessage("Constructing Sight Lines between observers and targets...")
-        dddSightLines = os.path.join(scratch, "dddSightLines")
+        dddSightLines = scratch.name("dddSightLines", inMemory=False)
         arcpy.ConstructSightLines_3d(dddObservers,
                                      dddTargets,
                                      dddSightLines,
@@ -1331,13 +1532,12 @@ def linearLineOfSight(inputObserverFeatures,
                                      None,
                                      None,
                                      "OUTPUT_THE_DIRECTION")
-        deleteme.append(dddSightLines)
 
         #TODO: use Intervisibility_3d to determine obstructions from other data types?
 
         #Build MBR, set as mask
         arcpy.AddMessage("Building minimum bounding rectangle of sight lines for analysis mask...")
-        mbrSightLines = os.path.join(scratch, "mbrSightLines")
+        mbrSightLines = scratch.name("mbrSightLines")
         arcpy.MinimumBoundingGeometry_management(dddSightLines,
                                                  mbrSightLines,
                                                  "RECTANGLE_BY_WIDTH")
@@ -1346,7 +1546,7 @@ def linearLineOfSight(inputObserverFeatures,
         #Line Of Sight
         arcpy.AddMessage("Building Line Of Sight...")
         #arcpy.env.mask = mbrSightLines
-        llosObstructionPoints = os.path.join(scratch, "llosObstructionPoints")
+        llosObstructionPoints = scratch.name("llosObstructionPoints", inMemory=False)
         #llosResults = os.path.join(scratch, "llosResults")
         arcpy.LineOfSight_3d(inputSurface,
                              dddSightLines,
@@ -1357,7 +1557,6 @@ def linearLineOfSight(inputObserverFeatures,
                              None,
                              None,
                              inputObstructionFeatures)
-        deleteme.append(llosObstructionPoints)
         #deleteme.append(llosResults)
 
 
@@ -1394,11 +1593,10 @@ def linearLineOfSight(inputObserverFeatures,
 
         #Get target visibility for each target, add to Observers and Targets and Sight Lines
         arcpy.AddMessage("Attributing output Observer features...")
-        llosStartVertex = os.path.join(scratch, "llosStartVertex")
+        llosStartVertex = scratch.name("llosStartVertex")
         arcpy.FeatureVerticesToPoints_management(dddSightLines,
                                                  llosStartVertex,
                                                  "START")
-        deleteme.append(llosStartVertex)
         arcpy.Identity_analysis(llosStartVertex,
                                 dddObservers,
                                 outputObservers,
@@ -1406,7 +1604,7 @@ def linearLineOfSight(inputObserverFeatures,
 
         #Get target visibility count stats on targets
         arcpy.AddMessage("Calculating frequency on Target features...")
-        llosEndVertex = os.path.join(scratch, "llosEndVertex")
+        llosEndVertex = scratch.name("llosEndVertex")
         arcpy.FeatureVerticesToPoints_management(dddSightLines,
                                                  llosEndVertex,
                                                  "END")
@@ -1414,19 +1612,18 @@ def linearLineOfSight(inputObserverFeatures,
                                 dddTargets,
                                 outputTargets,
                                 "ALL")
-        deleteme.append(llosEndVertex)
-        arcpy.MakeFeatureLayer_management(outputTargets, "targetLayer")
-        arcpy.SelectLayerByAttribute_management("targetLayer",
+        targetLayer = scratch.layer("targetLayer")
+        arcpy.MakeFeatureLayer_management(outputTargets, targetLayer)
+        arcpy.SelectLayerByAttribute_management(targetLayer,
                                                 "NEW_SELECTION",
                                                 '''"TarIsVis" = 1''')
-        targetStats = os.path.join(scratch, "targetStats")
+        targetStats = scratch.name("targetStats")
         statsFields = [["TarIsVis",  "COUNT"]]
         caseField = "OID_TARGET"
-        arcpy.Statistics_analysis("targetLayer",
+        arcpy.Statistics_analysis(targetLayer,
                                 targetStats,
                                 statsFields,
                                 caseField)
-        deleteme.append(targetStats)
         arcpy.JoinField_management(outputTargets,
                         caseField,
                         targetStats,
@@ -1446,18 +1643,21 @@ def linearLineOfSight(inputObserverFeatures,
         #arcpy.DeleteField_management(outputLineOfSight, [])
         arcpy.DeleteField_management(outputSightLines, ["OID_OBSERV_1",
                                                         "OID_TARGET_1"])
+        scratch.clearFieldNames(outputSightLines)
         arcpy.DeleteField_management(outputObservers, ["Height",
                                                        "FID_llosStartVertex",
                                                        "OID_OBSERV_1",
                                                        "OID_TARGET_1",
                                                        "ORIG_FID",
                                                        "FID_dddObservers"])
+        scratch.clearFieldNames(outputObservers)
         arcpy.DeleteField_management(outputTargets, ["Height",
                                                      "ORIG_FID",
                                                      "OID_OBSERV_1",
                                                      "OID_TARGET_1",
                                                      "FID_llosEndVertex",
                                                      "FID_dddTargets"])
+        scratch.clearFieldNames(outputTargets)
 
         return [outputLineOfSight,
                 outputSightLines,
@@ -1489,13 +1689,10 @@ def linearLineOfSight(inputObserverFeatures,
         print(msgs)
         
     finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
+        # cleanup intermediate datasets
+        if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
+        scratch.cleanup()
+        if debug == True: arcpy.AddMessage("Done")
             
 def radialLineOfSight(inputObserverFeatures,
                       inputObserverHeight,
@@ -1506,6 +1703,8 @@ def radialLineOfSight(inputObserverFeatures,
                       inputSpatialReference):
     '''
     Builds a viewshed from one or more observer point features and an input surface.
+    Each observer's viewshed is cached in the scratch folder, so a rerun only
+    recomputes observers that were added, moved, or changed.
     
     inputObserverFeatures - one or more observer features
     inputObserverHeight - If OFFSETA is not present in inputObserverFeatures use this value
@@ -1515,7 +1714,7 @@ def radialLineOfSight(inputObserverFeatures,
     inputForceVisibility - Force visiblity to edge of the surface (use a local, spherical horizon)
     inputSpatial Reference - spatial reference of outputVisibility features
     '''
-    global scratch
+    scratch = Utilities.ScratchWorkspace()
     
     try:
         #Need Spatial Analyst to run this tool
@@ -1525,11 +1724,6 @@ def radialLineOfSight(inputObserverFeatures,
             raise Exception("Spatial Analyst license is not available.")
         from arcpy import sa
         env.overwriteOutput = True
-        #Set scratch as temp workspace
-        if arcpy.env.scratchWorkspace:
-            scratch = arcpy.env.scratchWorkspace
-        else:
-            scratch = r"%scratchGDB%" 
 
         #get original spatial reference of inputs
         srObservers = arcpy.Describe(inputObserverFeatures).spatialReference
@@ -1538,7 +1732,7 @@ def radialLineOfSight(inputObserverFeatures,
         #Check observer fields for RADIUS2 and OFFSETA
         hasRADIUS2 = True
         hasOFFSETA = True
-        observerFieldList = _getFieldNameList(inputObserverFeatures, [])
+        observerFieldList = _getFieldNameList(inputObserverFeatures, [], scratch)
         if not "RADIUS2" in observerFieldList:
             arcpy.AddMessage("RADIUS2 field not in Input Observer Features. Using Radius Of Observer {0}".format(inputRadiusOfObserver))
             hasRADIUS2 = False
@@ -1564,7 +1758,7 @@ def radialLineOfSight(inputObserverFeatures,
         #get centroid of observers in Lat/Lon
         arcpy.AddMessage("Getting centroid of input observer points...")
         centroidPoint = _getCentroid(inputObserverFeatures)
-        ddCentroidPoint = centroidPoint.projectAs(srWGS84)
+        ddCentroidPoint = centroidPoint.projectAs(SpatialReferenceUtilities.GetSpatialReference(4326))
         
         #make localized WAZED
         arcpy.AddMessage("Using localized World Azimuthal Equidistant for analysis...")
@@ -1572,18 +1766,17 @@ def radialLineOfSight(inputObserverFeatures,
         arcpy.env.outputCoordinateSystem = srLocalWAZED
         
         #project Observers to temp dataset in local WAZED
-        tempObservers = os.path.join(scratch, "tempObservers")
+        tempObservers = scratch.name("tempObservers")
         arcpy.Project_management(inputObserverFeatures, tempObservers, srLocalWAZED)
-        deleteme.append(tempObservers)
         
-        #If not hasRADIUS2: add RADIUS2
+        #If not hasRADIUS2 or not hasOFFSETA: add them in one pass
+        observerFieldsToAdd = {}
         if not hasRADIUS2:
-            tempObservers = _addDoubleField(tempObservers, {"RADIUS2":[inputRadiusOfObserver, "RADIUS2"]})
-            tempObservers = _calculateFieldValue(tempObservers, "RADIUS2", inputRadiusOfObserver)
-        #If not hasOFFSETA: add OFFSETA
+            observerFieldsToAdd["RADIUS2"] = [inputRadiusOfObserver, "RADIUS2"]
         if not hasOFFSETA:
-            tempObservers = _addDoubleField(tempObservers, {"OFFSETA":[inputObserverHeight, "OFFSETA"]})
-            tempObservers = _calculateFieldValue(tempObservers, "OFFSETA", inputObserverHeight)
+            observerFieldsToAdd["OFFSETA"] = [inputObserverHeight, "OFFSETA"]
+        if observerFieldsToAdd:
+            tempObservers = _addFieldsAndCalculateValues(tempObservers, observerFieldsToAdd, scratch=scratch)
         
         if inputForceVisibility:
             '''
@@ -1610,7 +1803,7 @@ def radialLineOfSight(inputObserverFeatures,
             # arcpy.DeleteField_management(observers, "RADIUS2")
         
         #Buffer observers
-        bufferObservers = os.path.join(scratch, "bufferObservers")
+        bufferObservers = scratch.name("bufferObservers")
         distanceUnits = "METERS"
         bufferDistance = "{0} {1}".format(inputRadiusOfObserver, distanceUnits)
         arcpy.AddMessage("Buffering observers to {0}".format(bufferDistance))
@@ -1622,49 +1815,36 @@ def radialLineOfSight(inputObserverFeatures,
                               "ALL",
                               None,
                               "GEODESIC")
-        deleteme.append(bufferObservers)
 
         arcpy.AddMessage("Projecting observers to match surface...")
-        observersSurfaceSR = os.path.join(scratch, "observersSurfaceSR")
+        observersSurfaceSR = scratch.name("observersSurfaceSR")
         arcpy.Project_management(tempObservers,
                                  observersSurfaceSR,
                                  srSurface,
                                  None,
                                  srLocalWAZED,
                                  "PRESERVE_SHAPE")
-        deleteme.append(observersSurfaceSR)
         arcpy.AddMessage("Projecting buffer to match surface...")
-        bufferSurfaceSR = os.path.join(scratch, "bufferSurfaceSR")
+        bufferSurfaceSR = scratch.name("bufferSurfaceSR")
         arcpy.Project_management(bufferObservers,
                                  bufferSurfaceSR,
                                  srSurface,
                                  None,
                                  srLocalWAZED,
                                  "PRESERVE_SHAPE")
-        deleteme.append(bufferSurfaceSR)
-        
-        arcpy.AddMessage("Clipping image to observer buffers...")
         
-        clipSurface = os.path.join(scratch, "clipSurface")
-
-        clipSurface = _clipRasterToArea(inputSurface, bufferSurfaceSR, clipSurface)        
-        deleteme.append(clipSurface)
-
         arcpy.AddMessage("Building viewshed of observers to surface...")
-        tempViewshed = os.path.join(scratch, "tempViewshed")
-        tempAGL = os.path.join(scratch, "tempAGL")
-        saViewshed = sa.Viewshed(clipSurface,
-                                 observersSurfaceSR,
-                                 1.0,
-                                 "CURVED_EARTH",
-                                 0.13,
-                                 tempAGL)
-        saViewshed.save(tempViewshed)
-        deleteme.append(tempViewshed)
-        deleteme.append(tempAGL)
+        tempViewshed = scratch.name("tempViewshed", inMemory=False, raster=True)
+        tempViewshed = _buildCachedViewshed(inputObserverFeatures,
+                                            tempObservers,
+                                            observersSurfaceSR,
+                                            inputSurface,
+                                            srLocalWAZED,
+                                            tempViewshed,
+                                            scratch)
 
         arcpy.AddMessage("Converting viewshed to polygon features...")
-        viewshedPolys = os.path.join(scratch, "viewshedPolys")
+        viewshedPolys = scratch.name("viewshedPolys")
         rasterValueField = "Value"
         conversionField = "Gridcode"
         simplifyShape = "SIMPLIFY"
@@ -1672,24 +1852,24 @@ def radialLineOfSight(inputObserverFeatures,
                                          viewshedPolys,
                                          simplifyShape,
                                          rasterValueField)
-        deleteme.append(viewshedPolys)
 
         arcpy.AddMessage("Clipping polygons to max buffer...")
-        clippedPolys = os.path.join(scratch, "clippedPolys")
+        clippedPolys = scratch.name("clippedPolys")
         arcpy.Intersect_analysis([viewshedPolys, bufferSurfaceSR], clippedPolys, "NO_FID")
-        deleteme.append(clippedPolys)
 
         arcpy.AddMessage("Projecting to output spatial reference...")
         arcpy.Project_management(clippedPolys, outputVisibility, inputSpatialReference)
         arcpy.AddField_management(outputVisibility,
                                   "VISIBILITY",
                                   "LONG")
+        scratch.clearFieldNames(outputVisibility)
         arcpy.CalculateField_management(outputVisibility,
                                         "VISIBILITY",
                                         '!{0}!'.format(conversionField),
                                         "PYTHON_9.3")
         dropFields = [conversionField, 'Id']
         arcpy.DeleteField_management(outputVisibility, dropFields)
+        scratch.clearFieldNames(outputVisibility)
 
         return outputVisibility
     
@@ -1717,10 +1897,7 @@ def radialLineOfSight(inputObserverFeatures,
         print(msgs)
         
     finally:
-        if len(deleteme) > 0:
-            # cleanup intermediate datasets
-            if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
-            for i in deleteme:
-                if debug == True: arcpy.AddMessage("Removing: " + str(i))
-                arcpy.Delete_management(i)
-            if debug == True: arcpy.AddMessage("Done")
\ No newline at end of file
+        # cleanup intermediate datasets
+        if debug == True: arcpy.AddMessage("Removing intermediate datasets...")
+        scratch.cleanup()
+        if debug == True: arcpy.AddMessage("Done")
\ No newline at end of file
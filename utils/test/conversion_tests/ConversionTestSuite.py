@@ -33,6 +33,9 @@ import unittest
 import logging
 
 try:
+    from . import CoordinateNotationTestCase
+    from . import GeodesicTestCase
+    from . import ConversionUtilitiesTestCase
     from . import ConvertCoordinatesTestCase
     from . import TableToTwoPointLineTestCase    
     from . import TableToEllipseTestCase
@@ -41,6 +44,9 @@ try:
     from . import TableToPolygonTestCase
     from . import TableToPolylineTestCase
 except:
+    import CoordinateNotationTestCase
+    import GeodesicTestCase
+    import ConversionUtilitiesTestCase
     import ConvertCoordinatesTestCase
     import TableToTwoPointLineTestCase    
     import TableToEllipseTestCase
@@ -57,6 +63,9 @@ def getTestSuite():
  
     loader = unittest.TestLoader()
 
+    testSuite.addTest(loader.loadTestsFromTestCase(CoordinateNotationTestCase.CoordinateNotationTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(GeodesicTestCase.GeodesicTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(ConversionUtilitiesTestCase.ConversionUtilitiesTestCase))
     testSuite.addTest(loader.loadTestsFromTestCase(ConvertCoordinatesTestCase.ConvertCoordinatesTestCase))
     testSuite.addTest(loader.loadTestsFromTestCase(TableToTwoPointLineTestCase.TableToTwoPointLineTestCase))
     testSuite.addTest(loader.loadTestsFromTestCase(TableToEllipseTestCase.TableToEllipseTestCase))
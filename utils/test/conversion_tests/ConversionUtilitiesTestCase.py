@@ -32,37 +32,161 @@ history:
 ==================================================
 '''
 
+import os
+import shutil
+import tempfile
 import unittest
+
 import arcpy
-import os
-import UnitTestUtilities
-import ConversionUtilites
+import numpy
+
+# Add parent folder to python path if running test case standalone
+import sys
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+
 import Configuration
 
+# Add scripts to path so can call methods directly
+Configuration.addScriptsPath()
+import ConversionUtilities
+import CoordinateNotation
+
 class ConversionUtilitiesTestCase(unittest.TestCase):
     ''' Test all tools and methods related to the Conversion Utilites module
     in the Military Tools toolbox'''
-    
+
     def setUp(self):
-        if Configuration.DEBUG == True: print(".....ConversionUtilitiesTestCase.setUp")
-        #TODO: inputPolylines
-        if not arcpy.Exists(Configuration.militaryScratchGDB):
-            Configuration.militaryScratchGDB = UnitTestUtilities.createScratch(Configuration.currentPath)
-        
-        
+        ''' setup for tests'''
+
+        ''' Initialization needed if running Test Case standalone '''
+        Configuration.GetLogger()
+        Configuration.GetPlatform()
+        ''' End standalone initialization '''
+
+        Configuration.Logger.debug(".....ConversionUtilitiesTestCase.setUp")
+        self.checkpointFolder = tempfile.mkdtemp()
+
     def tearDown(self):
-        if Configuration.DEBUG == True: print(".....ConversionUtilitiesTestCase.tearDown")
-        UnitTestUtilities.deleteScratch(Configuration.militaryScratchGDB)
-        
+        Configuration.Logger.debug(".....ConversionUtilitiesTestCase.tearDown")
+        shutil.rmtree(self.checkpointFolder, ignore_errors=True)
+
     def test_polylineToPolygon(self):
         '''
         '''
-        
+
+    def test_parseCoordinates(self):
+        ''' Test notations are returned in a projected spatial reference '''
+        Configuration.Logger.info(".....ConversionUtilitiesTestCase.test_parseCoordinates")
+
+        srWebMercator = arcpy.SpatialReference(3857)
+        lons, lats = [-117.25, 45.0], [34.5, -12.0]
+        expected = [arcpy.PointGeometry(arcpy.Point(lon, lat), ConversionUtilities.srWGS84)
+                    .projectAs(srWebMercator).firstPoint for lon, lat in zip(lons, lats)]
+        for notationFormat, notations in [["DD_1", ["34.5 -117.25", "-12.0 45.0"]],
+                                          ["MGRS", CoordinateNotation.FormatNotation(lons, lats, "MGRS")[0]]]:
+            xs, ys, valid = ConversionUtilities._parseCoordinates(notations, None, notationFormat, srWebMercator)
+            self.assertTrue(valid.all())
+            numpy.testing.assert_allclose([point.X for point in expected], xs, atol=1.0)
+            numpy.testing.assert_allclose([point.Y for point in expected], ys, atol=1.0)
+
+        # projected DD_2 values are used as they are
+        xs, ys, valid = ConversionUtilities._parseCoordinates([1000.0, None], [2000.0, 3000.0], "DD_2", srWebMercator)
+        numpy.testing.assert_array_equal([1000.0, 2000.0, True, False], [xs[0], ys[0], valid[0], valid[1]])
+
+    def test_sortCodes(self):
+        ''' Test codes sort like their values, None first '''
+        Configuration.Logger.info(".....ConversionUtilitiesTestCase.test_sortCodes")
+
+        numpy.testing.assert_array_equal([2, 0, 1, 2], ConversionUtilities._sortCodes(["b", None, "a", "b"]))
+        numpy.testing.assert_array_equal([1, 2, 0], ConversionUtilities._sortCodes([2.5, 10, -1]))
+
+    def test_splitRings(self):
+        ''' Test rings end where they return to their first vertex '''
+        Configuration.Logger.info(".....ConversionUtilitiesTestCase.test_splitRings")
+
+        outer = [(0, 0), (0, 10), (10, 10), (10, 0), (0, 0)]
+        inner = [(2, 2), (8, 2), (8, 8), (2, 8), (2, 2)]
+        self.assertEqual([outer, inner], ConversionUtilities._splitRings(outer + inner))
+        # an open ring is kept, to be closed by the polygon
+        self.assertEqual([outer, inner[:-1]], ConversionUtilities._splitRings(outer + inner[:-1]))
+        # returning to the first vertex too early does not end a ring
+        self.assertEqual([[(0, 0), (1, 1), (0, 0), (1, 0), (0, 0)]],
+                         ConversionUtilities._splitRings([(0, 0), (1, 1), (0, 0), (1, 0), (0, 0)]))
+
+    def test_assembleVertices(self):
+        ''' Test vertices are grouped by line, sorted stably, split into rings, and degenerate parts dropped '''
+        Configuration.Logger.info(".....ConversionUtilitiesTestCase.test_assembleVertices")
+
+        xs = numpy.array([0.0, 10.0, 1.0, 11.0, 2.0, 12.0])
+        ys = numpy.array([0.0, 10.0, 1.0, 11.0, 2.0, 12.0])
+        # grouped by line value, each keeping table order
+        features = ConversionUtilities._assembleVertices(xs, ys, ["b", "a", "b", "a", "b", "a"], None, "POLYLINE")
+        self.assertEqual([["a", [[(10.0, 10.0), (11.0, 11.0), (12.0, 12.0)]]],
+                          ["b", [[(0.0, 0.0), (1.0, 1.0), (2.0, 2.0)]]]], features)
+
+        # sorted by sort value within a line, ties keep table order
+        features = ConversionUtilities._assembleVertices(xs, ys, ["b", "a", "b", "a", "b", "a"],
+                                                         [3, 1, 1, 1, 2, 0], "POLYLINE")
+        self.assertEqual([["a", [[(12.0, 12.0), (10.0, 10.0), (11.0, 11.0)]]],
+                          ["b", [[(1.0, 1.0), (2.0, 2.0), (0.0, 0.0)]]]], features)
+
+        # without a line field all vertices are one feature, None line values are a line of their own
+        features = ConversionUtilities._assembleVertices(xs, ys, None, None, "POLYLINE")
+        self.assertEqual([[None, [list(zip(xs.tolist(), ys.tolist()))]]], features)
+        features = ConversionUtilities._assembleVertices(xs, ys, [1, None, 1, None, 1, None], None, "POLYLINE")
+        self.assertEqual([None, 1], [lineValue for lineValue, parts in features])
+
+        # polygons get a part per ring, parts with too few distinct vertices are dropped
+        polygonXs = numpy.array([0.0, 0.0, 10.0, 0.0, 20.0, 20.0, 30.0, 20.0, 40.0, 40.0])
+        polygonYs = numpy.array([0.0, 10.0, 0.0, 0.0, 0.0, 10.0, 0.0, 0.0, 0.0, 10.0])
+        features = ConversionUtilities._assembleVertices(polygonXs, polygonYs, None, None, "POLYGON")
+        self.assertEqual([[(0.0, 0.0), (0.0, 10.0), (10.0, 0.0), (0.0, 0.0)],
+                          [(20.0, 0.0), (20.0, 10.0), (30.0, 0.0), (20.0, 0.0)]], features[0][1])
+        features = ConversionUtilities._assembleVertices(numpy.array([1.0, 1.0, 2.0]), numpy.array([1.0, 1.0, 2.0]),
+                                                         ["a", "a", "b"], None, "POLYLINE")
+        self.assertEqual([["a", []], ["b", []]], features)
+        self.assertEqual([], ConversionUtilities._assembleVertices(numpy.array([]), numpy.array([]),
+                                                                   None, None, "POLYGON"))
+
+    def test_checkpoint(self):
+        ''' Test a checkpoint is read back only for the same run '''
+        Configuration.Logger.info(".....ConversionUtilitiesTestCase.test_checkpoint")
+
+        checkpointFile = os.path.join(self.checkpointFolder, "output" + ConversionUtilities.checkpointExtension)
+        run = {"input":"table", "fields":["x", "y", None], "output":"output", "chunkSize":1000,
+               "spatialReference":"GEOGCS", "settings":{"format":"DD_2", "lineType":"GEODESIC"}}
+        self.assertIsNone(ConversionUtilities._readCheckpoint(checkpointFile, run))
+
+        state = {"run":run, "sourceOID":2000, "outputOID":1998, "outputRows":1998, "rows":2000}
+        ConversionUtilities._writeCheckpoint(checkpointFile, state)
+        self.assertEqual(state, ConversionUtilities._readCheckpoint(checkpointFile, run))
+        self.assertFalse(os.path.exists(checkpointFile + ".tmp"))
+
+        # a later checkpoint replaces the earlier one
+        state["sourceOID"] = 3000
+        ConversionUtilities._writeCheckpoint(checkpointFile, state)
+        self.assertEqual(3000, ConversionUtilities._readCheckpoint(checkpointFile, run)["sourceOID"])
+
+        # any other setting is a different run
+        for key, value in [["chunkSize", 500], ["fields", ["x", "y", "z"]], ["spatialReference", "PROJCS"],
+                           ["settings", {"format":"MGRS", "lineType":"GEODESIC"}]]:
+            otherRun = dict(run)
+            otherRun[key] = value
+            self.assertIsNone(ConversionUtilities._readCheckpoint(checkpointFile, otherRun),
+                              "Checkpoint should not be used after {0} changed".format(key))
+
+        # a damaged checkpoint is ignored
+        with open(checkpointFile, "w") as checkpoint:
+            checkpoint.write('{"run":')
+        self.assertIsNone(ConversionUtilities._readCheckpoint(checkpointFile, run))
+
     '''
     Test the tool methods
     '''
-        
+
     def test_tableToPolygon(self):
         '''
         '''
-        
\ No newline at end of file
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+# coding: utf-8
+'''
+-----------------------------------------------------------------------------
+Copyright 2018 Esri
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+-----------------------------------------------------------------------------
+
+==================================================
+CoordinateNotationTestCase.py
+--------------------------------------------------
+requirements: Python 2.7 or Python 3.4, NumPy
+author: ArcGIS Solutions
+company: Esri
+==================================================
+description: unittest test case for the coordinate notation parser,
+does not need arcpy
+==================================================
+'''
+
+import os
+import csv
+import unittest
+
+import numpy
+
+# Add parent folder to python path if running test case standalone
+import sys
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+
+import Configuration
+
+# Add scripts to path so can call methods directly
+Configuration.addScriptsPath()
+import CoordinateNotation
+
+class CoordinateNotationTestCase(unittest.TestCase):
+    ''' Test methods in CoordinateNotation.py '''
+
+    @classmethod
+    def setUpClass(cls):
+        ''' Read the Table To Point notation table and its decimal degree twin once '''
+        csvPath = os.path.join(Configuration.militaryDataPath, "CSV")
+        with open(os.path.join(csvPath, "TableToPoint_single.csv")) as notationFile:
+            cls.notationRows = list(csv.DictReader(notationFile))
+        with open(os.path.join(csvPath, "TabletoPoint.csv")) as ddFile:
+            ddRows = list(csv.DictReader(ddFile))
+        cls.lons = numpy.array([float(row["x"]) for row in ddRows])
+        cls.lats = numpy.array([float(row["y"]) for row in ddRows])
+
+    def setUp(self):
+        ''' setup for tests'''
+
+        ''' Initialization needed if running Test Case standalone '''
+        Configuration.GetLogger()
+        Configuration.GetPlatform()
+        ''' End standalone initialization '''
+
+        Configuration.Logger.debug(".....CoordinateNotationTestCase.setUp")
+
+    def tearDown(self):
+        Configuration.Logger.debug(".....CoordinateNotationTestCase.tearDown")
+
+    def _assertColumn(self, field, notationFormat, tolerance):
+        ''' Parses one notation column and compares it with the decimal degree table '''
+        lons, lats, errors = CoordinateNotation.ParseNotation([row[field] for row in self.notationRows],
+                                                              None, notationFormat)
+        self.assertFalse(errors.any(), "{0} rows failed to parse".format(int(errors.sum())))
+        self.assertLess(numpy.abs(lons - self.lons).max(), tolerance)
+        self.assertLess(numpy.abs(lats - self.lats).max(), tolerance)
+
+    def test_ParseNotation_MGRS(self):
+        ''' Test MGRS against the decimal degree table, 1 meter precision '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_ParseNotation_MGRS")
+        self._assertColumn("MGRS", "MGRS", 0.0001)
+
+    def test_ParseNotation_USNG(self):
+        ''' Test USNG with spaces against the decimal degree table '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_ParseNotation_USNG")
+        self._assertColumn("USNG", "USNG", 0.0001)
+
+    def test_ParseNotation_UTM_BANDS(self):
+        ''' Test UTM with latitude bands against the decimal degree table '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_ParseNotation_UTM_BANDS")
+        self._assertColumn("UTM", "UTM_BANDS", 0.0001)
+
+    def test_ParseNotation_GEOREF(self):
+        ''' Test GEOREF against the decimal degree table, 0.001 minute precision '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_ParseNotation_GEOREF")
+        self._assertColumn("GEOREF", "GEOREF", 0.0001)
+
+    def test_ParseNotation_GARS(self):
+        ''' Test GARS cell centers are within half a 5 minute cell '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_ParseNotation_GARS")
+        self._assertColumn("GARS", "GARS", 2.5 / 60.0 + 1e-9)
+
+    def test_ParseNotation_Angles(self):
+        ''' Test DD, DDM and DMS with hemisphere letters, signs and separators '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_ParseNotation_Angles")
+
+        lons, lats, errors = CoordinateNotation.ParseNotation(["34.5N 117.25W", "117.25W,34.5N", "34.5 -117.25"], None, "DD_1")
+        self.assertFalse(errors.any())
+        numpy.testing.assert_allclose(lons, [-117.25] * 3)
+        numpy.testing.assert_allclose(lats, [34.5] * 3)
+
+        lons, lats, errors = CoordinateNotation.ParseNotation(["34 30N/117 15W"], None, "DDM_1")
+        numpy.testing.assert_allclose([lons[0], lats[0]], [-117.25, 34.5])
+
+        lons, lats, errors = CoordinateNotation.ParseNotation([u"117°15'36\"E"], [u"S 33°54'0\""], "DMS_2")
+        numpy.testing.assert_allclose([lons[0], lats[0]], [117.26, -33.9])
+
+        lons, lats, errors = CoordinateNotation.ParseNotation([-117.25, 200.0], [34.5, 0.0], "DD_2")
+        self.assertEqual([False, True], errors.tolist())
+        self.assertEqual(-117.25, lons[0])
+
+    def test_ParseNotation_Errors(self):
+        ''' Test bad strings are flagged without failing the column '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_ParseNotation_Errors")
+
+        lons, lats, errors = CoordinateNotation.ParseNotation(["10SFF0352849921", "10SFF035284992", "", None, "61SFF00"],
+                                                              None, "MGRS")
+        self.assertEqual([False, True, True, True, True], errors.tolist())
+        self.assertTrue(numpy.isnan(lons[1:]).all())
+
+        lons, lats, errors = CoordinateNotation.ParseNotation(["34 30 61N 117 15 00W"], None, "DMS_1")
+        self.assertTrue(errors[0])
+
+    def test_ParseNotation_SouthernMGRS(self):
+        ''' Test southern hemisphere MGRS and UTM resolve to the same point '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_ParseNotation_SouthernMGRS")
+
+        mgrsLons, mgrsLats, errors = CoordinateNotation.ParseNotation(["56HLH3356847473"], None, "MGRS")
+        utmLons, utmLats, errors = CoordinateNotation.ParseNotation(["56S 333568 6247473"], None, "UTM_ZONES")
+        numpy.testing.assert_allclose([mgrsLons[0], mgrsLats[0]], [utmLons[0], utmLats[0]])
+        numpy.testing.assert_allclose([mgrsLons[0], mgrsLats[0]], [151.2, -33.9], atol=0.0001)
+
+    def test_LatLonToUTM_RoundTrip(self):
+        ''' Test the vectorized UTM series round trips '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_LatLonToUTM_RoundTrip")
+
+        lats = numpy.array([36.589, -33.9, 0.5, 70.0])
+        lons = numpy.array([-121.843, 151.2, 2.9, 25.0])
+        zones = numpy.floor((lons + 180) / 6) + 1
+        eastings, northings = CoordinateNotation.LatLonToUTM(lats, lons, zones)
+        southern = northings < 0
+        northings = numpy.where(southern, northings + 10000000.0, northings)
+        roundLons, roundLats = CoordinateNotation.UTMToLatLon(zones, eastings, northings, southern)
+        numpy.testing.assert_allclose(roundLons, lons, atol=1e-6)
+        numpy.testing.assert_allclose(roundLats, lats, atol=1e-6)
+
+    def test_FormatNotation_Grids(self):
+        ''' Test UTM_BANDS, MGRS, USNG, GARS and GEOREF output matches the notation table '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_FormatNotation_Grids")
+
+        for field, notationFormat in [["UTM", "UTM_BANDS"], ["MGRS", "MGRS"], ["USNG", "USNG"],
+                                      ["GARS", "GARS"], ["GEOREF", "GEOREF"]]:
+            strings = CoordinateNotation.FormatNotation(self.lons, self.lats, notationFormat)[0]
+            self.assertEqual([row[field] for row in self.notationRows], strings,
+                             "Unexpected {0} strings".format(notationFormat))
+
+    def test_FormatNotation_Angles(self):
+        ''' Test DD, DDM and DMS output parses back to the same point '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_FormatNotation_Angles")
+
+        self.assertEqual([["36 35 20.96N"], ["121 50 33.62W"]],
+                         CoordinateNotation.FormatNotation(self.lons[:1], self.lats[:1], "DMS"))
+        for notationFormat, tolerance in [["DD", 1e-8], ["DDM", 1e-6], ["DMS", 2e-6]]:
+            latStrings, lonStrings = CoordinateNotation.FormatNotation(self.lons, self.lats, notationFormat)
+            lons, lats, errors = CoordinateNotation.ParseNotation(lonStrings, latStrings, notationFormat + "_2")
+            self.assertFalse(errors.any())
+            self.assertLess(numpy.abs(lons - self.lons).max(), tolerance)
+            self.assertLess(numpy.abs(lats - self.lats).max(), tolerance)
+
+    def test_FormatGrids_Precision(self):
+        ''' Test MGRS, USNG, GARS and GEOREF at each precision '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_FormatGrids_Precision")
+
+        lons = [self.lons[0], 151.2]
+        lats = [self.lats[0], -33.9]
+        self.assertEqual(["10SFF", "56HLH"], CoordinateNotation.FormatMGRS(lons, lats, 0))
+        self.assertEqual(["10SFF035499", "56HLH335474"], CoordinateNotation.FormatMGRS(lons, lats, 3))
+        self.assertEqual(["10S FF 0352 4992", "56H LH 3356 4747"], CoordinateNotation.FormatUSNG(lons, lats, 4))
+        self.assertEqual(["117LP", "663ES"], CoordinateNotation.FormatGARS(lons, lats, 1))
+        self.assertEqual(["117LP3", "663ES3"], CoordinateNotation.FormatGARS(lons, lats, 2))
+        self.assertEqual(["DJPG", "YDBM"], CoordinateNotation.FormatGEOREF(lons, lats, 0))
+        self.assertEqual(["DJPG0935", "YDBM1206"], CoordinateNotation.FormatGEOREF(lons, lats, 2))
+        self.assertRaises(ValueError, CoordinateNotation.FormatMGRS, lons, lats, 6)
+
+        # each precision parses back inside its square
+        for precision in range(6):
+            parsedLons, parsedLats, errors = CoordinateNotation.ParseNotation(
+                CoordinateNotation.FormatMGRS(self.lons, self.lats, precision), None, "MGRS")
+            self.assertFalse(errors.any())
+            self.assertLess(numpy.abs(parsedLats - self.lats).max(), 10.0 ** (5 - precision) * 1.5 / 111000.0 + 1e-5)
+
+    def test_FormatNotation_Empty(self):
+        ''' Test NaN input and points outside of UTM give None '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_FormatNotation_Empty")
+
+        self.assertEqual([["56HLH3356947473", None, None]],
+                         CoordinateNotation.FormatNotation([151.2, numpy.nan, 0.0], [-33.9, 0.0, 89.0], "MGRS"))
+        self.assertEqual([[None]], CoordinateNotation.FormatNotation([numpy.nan], [0.0], "GARS"))
+
+    def test_NotationCache(self):
+        ''' Test repeated strings and points are served from the bounded cache '''
+        Configuration.Logger.info(".....CoordinateNotationTestCase.test_NotationCache")
+
+        CoordinateNotation.clearCache()
+        strings = ["10SFF0352849921", "10SFF0264151590", "10SFF0352849921"]
+        lons, lats, errors = CoordinateNotation.ParseNotation(strings, None, "MGRS")
+        self.assertEqual({"hits":1, "misses":2, "size":2}, CoordinateNotation.GetCacheStatistics())
+        cachedLons, cachedLats, errors = CoordinateNotation.ParseNotation(strings, None, "MGRS")
+        self.assertEqual(4, CoordinateNotation.GetCacheStatistics()["hits"])
+        numpy.testing.assert_array_equal(lons, cachedLons)
+
+        # a different spatial reference is a different entry
+        CoordinateNotation.ParseNotation(strings[:1], None, "MGRS", spatialReference=4269)
+        self.assertEqual(3, CoordinateNotation.GetCacheStatistics()["misses"])
+
+        self.assertEqual(CoordinateNotation.FormatNotation(lons, lats, "GEOREF"),
+                         CoordinateNotation.FormatNotation(lons, lats, "GEOREF", useCache=False))
+
+        maxCached = CoordinateNotation.maxCachedNotations
+        try:
+            CoordinateNotation.maxCachedNotations = 2
+            CoordinateNotation.ParseNotation(["117LP35", "117LP34", "117LP33"], None, "GARS")
+            self.assertEqual(2, CoordinateNotation.GetCacheStatistics()["size"])
+        finally:
+            CoordinateNotation.maxCachedNotations = maxCached
+            CoordinateNotation.clearCache()
+
+if __name__ == '__main__':
+    unittest.main()
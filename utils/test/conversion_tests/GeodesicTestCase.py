@@ -0,0 +1,178 @@
+# coding: utf-8
+'''
+-----------------------------------------------------------------------------
+Copyright 2018 Esri
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+-----------------------------------------------------------------------------
+
+==================================================
+GeodesicTestCase.py
+--------------------------------------------------
+requirements: Python 2.7 or Python 3.4, NumPy
+author: ArcGIS Solutions
+company: Esri
+==================================================
+description: unittest test case for the geodesic direct and inverse problems,
+does not need arcpy
+==================================================
+'''
+
+import os
+import unittest
+
+import numpy
+
+# Add parent folder to python path if running test case standalone
+import sys
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+
+import Configuration
+
+# Add scripts to path so can call methods directly
+Configuration.addScriptsPath()
+import Geodesic
+
+def _dms(degrees, minutes, seconds):
+    return degrees + minutes / 60.0 + seconds / 3600.0
+
+class GeodesicTestCase(unittest.TestCase):
+    ''' Test methods in Geodesic.py '''
+
+    def setUp(self):
+        ''' setup for tests'''
+
+        ''' Initialization needed if running Test Case standalone '''
+        Configuration.GetLogger()
+        Configuration.GetPlatform()
+        ''' End standalone initialization '''
+
+        Configuration.Logger.debug(".....GeodesicTestCase.setUp")
+
+    def tearDown(self):
+        Configuration.Logger.debug(".....GeodesicTestCase.tearDown")
+
+    def test_Direct_Geodesic(self):
+        ''' Test Vincenty's Flinders Peak to Buninyong example '''
+        Configuration.Logger.info(".....GeodesicTestCase.test_Direct_Geodesic")
+
+        lons, lats = Geodesic.Direct([_dms(144, 25, 29.52440)], [-_dms(37, 57, 3.72030)],
+                                     [_dms(306, 52, 5.37)], [54972.271])
+        self.assertAlmostEqual(_dms(143, 55, 35.38390), lons[0], places=7)
+        self.assertAlmostEqual(-_dms(37, 39, 10.15610), lats[0], places=7)
+
+    def test_Direct_LineTypes(self):
+        ''' Test every line type along the equator and a meridian, and how they differ elsewhere '''
+        Configuration.Logger.info(".....GeodesicTestCase.test_Direct_LineTypes")
+
+        degreesPerMeter = 180.0 / (numpy.pi * Geodesic.semiMajorAxis)
+        for lineType in Geodesic.lineTypes:
+            lons, lats = Geodesic.Direct([0.0, 0.0], [0.0, 0.0], [90.0, 0.0], [1000000.0, 1000000.0], lineType)
+            self.assertAlmostEqual(1000000.0 * degreesPerMeter, lons[0], places=6)
+            self.assertAlmostEqual(0.0, lons[1], places=9)
+            self.assertAlmostEqual(9.0429444, lats[1], places=6)
+
+        geodesic = numpy.array(Geodesic.Direct(10.0, 45.0, 60.0, 1000000.0, "GEODESIC"))
+        normalSection = numpy.array(Geodesic.Direct(10.0, 45.0, 60.0, 1000000.0, "NORMAL_SECTION"))
+        rhumbLine = numpy.array(Geodesic.Direct(10.0, 45.0, 60.0, 1000000.0, "RHUMB_LINE"))
+        # normal sections stay within meters of the geodesic, rhumb lines do not
+        self.assertLess(numpy.abs(normalSection - geodesic).max(), 0.001)
+        self.assertGreater(numpy.abs(rhumbLine - geodesic).max(), 0.1)
+
+        # a rhumb line keeps its bearing, so due east stays on the parallel
+        lons, lats = Geodesic.Direct(10.0, 45.0, 90.0, 1000000.0, "RHUMB_LINE")
+        self.assertAlmostEqual(45.0, float(lats), places=9)
+
+    def test_Inverse(self):
+        ''' Test Vincenty's inverse example, and that every line type's inverse leads back through Direct '''
+        Configuration.Logger.info(".....GeodesicTestCase.test_Inverse")
+
+        bearings, distances = Geodesic.Inverse(_dms(144, 25, 29.52440), -_dms(37, 57, 3.72030),
+                                               _dms(143, 55, 35.38390), -_dms(37, 39, 10.15610))
+        self.assertAlmostEqual(_dms(306, 52, 5.37), bearings[0], places=5)
+        self.assertAlmostEqual(54972.271, distances[0], places=3)
+
+        startLons, startLats = [-117.0, 10.0, 179.5, 0.0], [34.0, 45.0, -20.0, 60.0]
+        endLons, endLats = [-116.0, 25.0, -170.0, 0.0], [35.0, 30.0, -25.0, 62.0]
+        for lineType in Geodesic.lineTypes:
+            bearings, distances = Geodesic.Inverse(startLons, startLats, endLons, endLats, lineType)
+            lons, lats = Geodesic.Direct(startLons, startLats, bearings, distances, lineType)
+            numpy.testing.assert_allclose(endLons, (lons + 180.0) % 360.0 - 180.0, atol=1e-6)
+            numpy.testing.assert_allclose(endLats, lats, atol=1e-6)
+            # due north along a meridian is the same for every line type
+            self.assertAlmostEqual(0.0, bearings[3], places=6)
+
+        bearings, distances = Geodesic.Inverse(10.0, 10.0, 10.0, 10.0, "NORMAL_SECTION")
+        self.assertEqual(0.0, distances[0])
+
+    def test_LineVerticesBetween(self):
+        ''' Test lines between points end exactly at the end point and match the densified direct lines '''
+        Configuration.Logger.info(".....GeodesicTestCase.test_LineVerticesBetween")
+
+        for lineType in Geodesic.lineTypes:
+            lines = Geodesic.LineVerticesBetween([-117.0, 179.9], [34.0, 0.0], [-116.0, -179.9], [35.0, 0.0], lineType)
+            numpy.testing.assert_array_equal([-117.0, 34.0], lines[0][0])
+            numpy.testing.assert_array_equal([-116.0, 35.0], lines[0][-1])
+            # crossing 180 keeps longitudes continuous
+            numpy.testing.assert_allclose([180.1, 0.0], lines[1][-1], atol=1e-9)
+            bearings, distances = Geodesic.Inverse(-117.0, 34.0, -116.0, 35.0, lineType)
+            direct = Geodesic.LineVertices(-117.0, 34.0, bearings, distances, lineType)[0]
+            numpy.testing.assert_allclose(direct[1:-1], lines[0][1:-1])
+
+    def test_BearingUnits(self):
+        ''' Test bearings in mils, radians and grads match degrees '''
+        Configuration.Logger.info(".....GeodesicTestCase.test_BearingUnits")
+
+        degrees = Geodesic.Direct(-117.0, 34.0, 45.0, 50000.0)
+        for bearing, bearingUnits in [[800.0, "MILS"], [numpy.pi / 4.0, "RADS"], [50.0, "GRAD"]]:
+            numpy.testing.assert_allclose(degrees, Geodesic.Direct(-117.0, 34.0, bearing, 50000.0,
+                                                                   bearingUnits=bearingUnits), atol=1e-9)
+        with self.assertRaises(ValueError):
+            Geodesic.BearingsToDegrees([1.0], "FURLONGS")
+
+    def test_LineVertices(self):
+        ''' Test densified lines start at the origin, end at the end point, and cross 180 continuously '''
+        Configuration.Logger.info(".....GeodesicTestCase.test_LineVertices")
+
+        for lineType in Geodesic.lineTypes:
+            lines = Geodesic.LineVertices([-117.0, 179.9], [34.0, 0.0], [45.0, 90.0], [25000.0, 100000.0], lineType)
+            self.assertEqual([4, 11], [len(vertices) for vertices in lines])
+            numpy.testing.assert_allclose([-117.0, 34.0], lines[0][0])
+            endLons, endLats = Geodesic.Direct(-117.0, 34.0, 45.0, 25000.0, lineType)
+            numpy.testing.assert_allclose([endLons, endLats], lines[0][-1], atol=1e-9)
+            self.assertTrue((numpy.diff(lines[1][:, 0]) > 0).all())
+            self.assertGreater(lines[1][-1, 0], 180.0)
+
+        self.assertEqual([], Geodesic.LineVertices([], [], [], []))
+        with self.assertRaises(ValueError):
+            Geodesic.LineVertices([0.0], [0.0], [0.0], [1.0], "STRAIGHT")
+
+    def test_EllipseVertices(self):
+        ''' Test ellipse outlines close, follow the axes, and get more vertices when larger '''
+        Configuration.Logger.info(".....GeodesicTestCase.test_EllipseVertices")
+
+        ellipses = Geodesic.EllipseVertices([-117.0, -117.0], [34.0, 34.0], [20000.0, 2000000.0],
+                                            [10000.0, 1000000.0], [800.0, 0.0], "MILS")
+        small, large = ellipses
+        numpy.testing.assert_array_equal(small[0], small[-1])
+        self.assertLess(len(small), len(large))
+        self.assertEqual(Geodesic.maxEllipseVertices + 1, len(large))
+        # first vertex is half the major axis along the azimuth
+        numpy.testing.assert_allclose(Geodesic.Direct(-117.0, 34.0, 45.0, 10000.0), small[0], atol=1e-9)
+        numpy.testing.assert_allclose(Geodesic.Direct(-117.0, 34.0, 90.0, 500000.0),
+                                      large[len(large) // 4], atol=1e-9)
+        # clockwise, as polygon exterior rings
+        lons, lats = small[:, 0], small[:, 1]
+        self.assertLess(numpy.sum(lons[:-1] * lats[1:] - lons[1:] * lats[:-1]), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
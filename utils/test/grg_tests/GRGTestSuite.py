@@ -20,10 +20,12 @@ try:
     from . import GRGCreateGRGFromPointTestCase
     from . import GRGCreateGRGFromAreaTestCase
     from . import GRGCreateReferenceSystemGRGFromAreaTestCase
+    from . import GRGUtilitiesTestCase
 except:
     import GRGCreateGRGFromPointTestCase
     import GRGCreateGRGFromAreaTestCase
     import GRGCreateReferenceSystemGRGFromAreaTestCase
+    import GRGUtilitiesTestCase
 
 ''' Test suite for all tools in the GRG Toolset '''
 
@@ -39,6 +41,7 @@ def getTestSuite():
     testSuite.addTest(loader.loadTestsFromTestCase(GRGCreateGRGFromAreaTestCase.GRGCreateGRGFromAreaTestCase))
     testSuite.addTest(loader.loadTestsFromTestCase(GRGCreateGRGFromPointTestCase.GRGCreateGRGFromPointTestCase))
     testSuite.addTest(loader.loadTestsFromTestCase(GRGCreateReferenceSystemGRGFromAreaTestCase.GRGCreateReferenceSystemGRGFromAreaTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(GRGUtilitiesTestCase.GRGUtilitiesTestCase))
 
     return testSuite
 
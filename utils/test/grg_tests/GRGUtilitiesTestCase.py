@@ -0,0 +1,209 @@
+# coding: utf-8
+'''
+-----------------------------------------------------------------------------
+Copyright 2018 Esri
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+-----------------------------------------------------------------------------
+
+==================================================
+GRGUtilitiesTestCase.py
+--------------------------------------------------
+requirements: ArcGIS X.X, Python 2.7 or Python 3.4
+author: ArcGIS Solutions
+company: Esri
+==================================================
+description: unittest test case for GRG utility methods
+==================================================
+'''
+
+import os
+import unittest
+
+import arcpy
+
+# Add parent folder to python path if running test case standalone
+import sys
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+
+import UnitTestUtilities
+import Configuration
+
+# Add scripts to path so can call methods directly
+Configuration.addScriptsPath()
+import GRGUtilities
+
+class GRGUtilitiesTestCase(unittest.TestCase):
+    ''' Test methods in GRGUtilities.py '''
+
+    def setUp(self):
+        ''' setup for tests'''
+
+        ''' Initialization needed if running Test Case standalone '''
+        Configuration.GetLogger()
+        Configuration.GetPlatform()
+        ''' End standalone initialization '''
+
+        Configuration.Logger.debug(".....GRGUtilitiesTestCase.setUp")
+
+        UnitTestUtilities.checkArcPy()
+
+    def tearDown(self):
+        Configuration.Logger.debug(".....GRGUtilitiesTestCase.tearDown")
+
+    def test_GRGCellLabels_AlphaNumeric(self):
+        ''' Test Alpha-Numeric labels from each start position on a 3 x 2 grid '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_GRGCellLabels_AlphaNumeric")
+
+        # cells in row order from the lower left
+        rows = [0, 0, 0, 1, 1, 1]
+        cols = [0, 1, 2, 0, 1, 2]
+        expected = {"Lower-Left":["A1", "A2", "A3", "B1", "B2", "B3"],
+                    "Upper-Left":["B1", "B2", "B3", "A1", "A2", "A3"],
+                    "Upper-Right":["B3", "B2", "B1", "A3", "A2", "A1"],
+                    "Lower-Right":["A3", "A2", "A1", "B3", "B2", "B1"]}
+        for startPos in expected:
+            labels = GRGUtilities.GRGCellLabels(rows, cols, 2, 3, startPos, "Alpha-Numeric", "-")
+            self.assertEqual(expected[startPos], labels, "Unexpected labels from {0}".format(startPos))
+
+    def test_GRGCellLabels_AlphaAlpha(self):
+        ''' Test Alpha-Alpha labels past Z '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_GRGCellLabels_AlphaAlpha")
+
+        labels = GRGUtilities.GRGCellLabels([0, 0, 27], [0, 26, 1], 28, 30, "Lower-Left", "Alpha-Alpha", "-")
+        self.assertEqual(["A-A", "A-AA", "AB-B"], labels)
+
+    def test_GRGCellLabels_Numeric(self):
+        ''' Test Numeric labels do not depend on the order of the cells '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_GRGCellLabels_Numeric")
+
+        labels = GRGUtilities.GRGCellLabels([1, 0, 1, 0], [1, 0, 0, 1], 2, 2, "Upper-Left", "Numeric", "-")
+        self.assertEqual(["2", "3", "1", "4"], labels)
+
+    def test_GRGCellOrder(self):
+        ''' Test cells are ordered row by row from the start position '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_GRGCellOrder")
+
+        order = GRGUtilities.GRGCellOrder([0, 0, 1, 1], [0, 1, 0, 1], 2, 2, "Upper-Right")
+        self.assertEqual([3, 2, 1, 0], list(order))
+
+    def test_cellSizeInMeters(self):
+        ''' Test cell sizes are converted to meters through the shared unit table '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_cellSizeInMeters")
+
+        self.assertEqual([100, 50], GRGUtilities._cellSizeInMeters(100, 50, "Meters"))
+        for cellUnits, meters in [["Feet", 30.48], ["Kilometers", 100000.0], ["Miles", 160934.4],
+                                  ["Yards", 91.44], ["Nautical Miles", 185200.0]]:
+            width, height = GRGUtilities._cellSizeInMeters(100, 100, cellUnits)
+            self.assertAlmostEqual(meters, width, msg=cellUnits)
+            self.assertAlmostEqual(meters, height, msg=cellUnits)
+
+    def test_GRGFishnetCells(self):
+        ''' Test rotated fishnet cells have the expected size, count and corners '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_GRGFishnetCells")
+
+        rows, cols, rings = GRGUtilities.GRGFishnetCells(100.0, 200.0, 90.0, 10.0, 5.0, 3, 4)
+        self.assertEqual((12, 5, 2), rings.shape)
+        self.assertEqual([0, 0, 0, 0, 1], list(rows[:5]))
+        self.assertEqual([0, 1, 2, 3, 0], list(cols[:5]))
+        # rows run north when rotated 90 degrees, so the first cell's upper left is to the west
+        self.assertAlmostEqual(95.0, rings[0][1][0])
+        self.assertAlmostEqual(200.0, rings[0][1][1])
+        # each ring is closed and clockwise, with the cell area
+        for ring in rings:
+            self.assertEqual(list(ring[0]), list(ring[-1]))
+            area = 0.5 * sum([ring[i][0] * ring[i + 1][1] - ring[i + 1][0] * ring[i][1] for i in range(4)])
+            self.assertAlmostEqual(-50.0, area)
+
+    def test_batchGRGCells(self):
+        ''' Test a batch of grids keeps each grid's labels and the ID of its input feature '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_batchGRGCells")
+
+        frames = [GRGUtilities._pointGridFrame(0.0, 0.0, 0, 10.0, 10.0, 2, 2) + [2, 2],
+                  GRGUtilities._pointGridFrame(1000.0, 0.0, 0, 10.0, 10.0, 1, 3) + [1, 3]]
+        rings, labels, parentIDs, levels = GRGUtilities._batchGRGCells(frames, [7, 9], 10.0, 10.0,
+                                                                       "Upper-Left", "Numeric", "-")
+        self.assertEqual((7, 5, 2), rings.shape)
+        self.assertEqual(["1", "2", "3", "4", "1", "2", "3"], labels)
+        self.assertEqual([7, 7, 7, 7, 9, 9, 9], parentIDs)
+        # first grid is centered on its point
+        self.assertAlmostEqual(-10.0, rings[:4, :, 0].min())
+        self.assertAlmostEqual(10.0, rings[:4, :, 1].max())
+
+    def test_ReadingOrder(self):
+        ''' Test jittered rows of points read left to right, top to bottom within the row tolerance '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_ReadingOrder")
+
+        xs = [0.0, 1.0, 2.0, 0.0, 1.0, 2.0]
+        ys = [10.0, 10.2, 9.9, 5.0, 5.1, 4.8]
+        self.assertEqual([0, 1, 2, 3, 4, 5], list(GRGUtilities.ReadingOrder(xs, ys, 0.5)))
+        # with no tolerance every distinct y is its own row
+        self.assertEqual([1, 0, 2, 4, 3, 5], list(GRGUtilities.ReadingOrder(xs, ys)))
+
+    def test_SpatialOrder_curves(self):
+        ''' Test curve orders number every point once, starting in the upper left '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_SpatialOrder_curves")
+
+        xs = [float(i % 8) for i in range(64)]
+        ys = [float(i // 8) for i in range(64)]
+        for numberingOrder in ["Hilbert Curve", "Z-Order Curve", "Nearest Neighbor"]:
+            order = GRGUtilities.SpatialOrder(xs, ys, numberingOrder)
+            self.assertEqual(list(range(64)), sorted(order), numberingOrder)
+            self.assertEqual(56, order[0], numberingOrder)
+            if numberingOrder != "Z-Order Curve":
+                # Hilbert and nearest neighbor only step to adjacent points on a grid
+                steps = [abs(xs[a] - xs[b]) + abs(ys[a] - ys[b]) for a, b in zip(order[:-1], order[1:])]
+                self.assertEqual(1.0, max(steps), numberingOrder)
+
+    def test_SelectPointsInArea(self):
+        ''' Test points inside overlapping areas are selected once and points in holes are not '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_SelectPointsInArea")
+
+        srWebMerc = arcpy.SpatialReference(3857)
+        pointFC = os.path.join("in_memory", "selectPoints")
+        areaFC = os.path.join("in_memory", "selectArea")
+        arcpy.CreateFeatureclass_management("in_memory", "selectPoints", "POINT", None, "DISABLED", "DISABLED", srWebMerc)
+        arcpy.CreateFeatureclass_management("in_memory", "selectArea", "POLYGON", None, "DISABLED", "DISABLED", srWebMerc)
+        with arcpy.da.InsertCursor(pointFC, ["SHAPE@XY"]) as cursor:
+            for xy in [(1.0, 1.0), (5.0, 5.0), (12.0, 5.0), (30.0, 30.0)]:
+                cursor.insertRow([xy])
+        square = [arcpy.Point(0, 0), arcpy.Point(0, 10), arcpy.Point(10, 10), arcpy.Point(10, 0)]
+        hole = [arcpy.Point(4, 4), arcpy.Point(6, 4), arcpy.Point(6, 6), arcpy.Point(4, 6)]
+        overlap = [arcpy.Point(0, 0), arcpy.Point(0, 10), arcpy.Point(15, 10), arcpy.Point(15, 0)]
+        with arcpy.da.InsertCursor(areaFC, ["SHAPE@"]) as cursor:
+            cursor.insertRow([arcpy.Polygon(arcpy.Array([arcpy.Array(square), arcpy.Array(hole)]), srWebMerc)])
+            cursor.insertRow([arcpy.Polygon(arcpy.Array(overlap), srWebMerc)])
+
+        oids, xs, ys = GRGUtilities.SelectPointsInArea(pointFC, areaFC)
+        # the point in the hole is inside the overlapping area, the far point is in neither
+        self.assertEqual([1.0, 5.0, 12.0], sorted(xs))
+
+        for fc in [pointFC, areaFC]:
+            arcpy.Delete_management(fc)
+
+    def test_buildGRGCells_keypad(self):
+        ''' Test keypad sub-cells are labeled from the upper left and share corners with their grid cell '''
+        Configuration.Logger.info(".....GRGUtilitiesTestCase.test_buildGRGCells_keypad")
+
+        rings, labels, levels = GRGUtilities._buildGRGCells(0.0, 0.0, 0.0, 90.0, 90.0, 1, 2,
+                                                            "Lower-Left", "Alpha-Numeric", "-", 2)
+        self.assertEqual(2 + 18 + 162, len(labels))
+        self.assertEqual(["A1", "A2", "A1-1", "A1-2"], labels[:4])
+        self.assertEqual("A2-9-9", labels[-1])
+        self.assertEqual([0, 1, 2], sorted(set(levels)))
+        # keypad 1 is the upper left sub-cell, keypad 9 the lower right
+        self.assertEqual([0.0, 90.0], list(rings[labels.index("A1-1")][1]))
+        self.assertEqual([180.0, 0.0], list(rings[labels.index("A2-9-9")][3]))
+        self.assertEqual([60.0, 60.0], list(rings[labels.index("A1-5")][2]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -33,6 +33,7 @@ import os
 import unittest
 
 import arcpy
+import numpy
 
 # Add parent folder to python path if running test case standalone
 import sys
@@ -44,6 +45,8 @@ import arcpyAssert
 
 # Add scripts to path so can call methods directly
 Configuration.addScriptsPath()
+import Utilities
+import SurfaceReader
 import VisibilityUtilities
 
 # LOCALS ===========================================
@@ -172,6 +175,61 @@ class VisibilityUtilitiesTestCase(unittest.TestCase, arcpyAssert.FeatureClassAss
         resultFieldValueSet = set([row[0] for row in arcpy.da.SearchCursor(junkTable, [expectedNames[1]])])
         self.assertEqual(len(resultFieldValueSet),1,"_calculateFieldValue returned bad field values: {0}".format(str(resultFieldValueSet)))
 
+    def test_addFieldsAndCalculateValues(self):
+        '''
+        Testing internal method _addFieldsAndCalculateValues()
+        '''
+        Configuration.Logger.info(".....VisibilityUtilityTestCase.test_addFieldsAndCalculateValues")
+
+        junkTable = os.path.join("in_memory","junkTable")
+        arcpy.CreateTable_management(os.path.dirname(junkTable),
+                                     os.path.basename(junkTable))
+        arcpy.AddField_management(junkTable, "A1", "DOUBLE")
+        deleteIntermediateData.append(junkTable)
+        with arcpy.da.InsertCursor(junkTable, ["A1"]) as iCursor:
+            for i in range(0,4):
+                iCursor.insertRow([float(i)])
+        del iCursor
+
+        newFields = {"A1":[0.0, "A1 field"],
+                     "A2":[1.1, "A2 field"]}
+        VisibilityUtilities._addFieldsAndCalculateValues(junkTable, newFields, {"A1":5.5})
+
+        resultFields = [f.name for f in arcpy.ListFields(junkTable)]
+        self.assertIn("A2", resultFields, "Expected field A2 was not added. Got {0} instead.".format(resultFields))
+        resultValueSet = set([tuple(row) for row in arcpy.da.SearchCursor(junkTable, ["A1", "A2"])])
+        self.assertEqual(resultValueSet, set([(5.5, 1.1)]), "_addFieldsAndCalculateValues returned bad field values: {0}".format(str(resultValueSet)))
+
+        # integer fields added for fieldType LONG get integers, the existing DOUBLE field keeps its fraction
+        VisibilityUtilities._addFieldsAndCalculateValues(junkTable, {"A1":[1.5, "A1 field"], "A3":[2.7, "A3 field"]},
+                                                         fieldType="LONG")
+        resultValueSet = set([tuple(row) for row in arcpy.da.SearchCursor(junkTable, ["A1", "A3"])])
+        self.assertEqual(resultValueSet, set([(1.5, 2)]), "_addFieldsAndCalculateValues cast values to the wrong field type: {0}".format(str(resultValueSet)))
+
+    def test_getFieldNameList_cached(self):
+        '''
+        Testing that _getFieldNameList() sees fields added through the library,
+        and that the field name cache belongs to one run
+        '''
+        Configuration.Logger.info(".....VisibilityUtilityTestCase.test_getFieldNameList_cached")
+
+        junkTable = os.path.join("in_memory","junkTable")
+        arcpy.CreateTable_management(os.path.dirname(junkTable),
+                                     os.path.basename(junkTable))
+        deleteIntermediateData.append(junkTable)
+        scratch = Utilities.ScratchWorkspace()
+        firstNames = VisibilityUtilities._getFieldNameList(junkTable, [], scratch)
+        self.assertEqual(firstNames, VisibilityUtilities._getFieldNameList(junkTable, [], scratch), "Repeated lookups returned different field names.")
+
+        VisibilityUtilities._addDoubleField(junkTable, {"A1":[0.0, "A1 field"]}, scratch)
+        resultNames = VisibilityUtilities._getFieldNameList(junkTable, [], scratch)
+        self.assertEqual(firstNames + ["A1"], resultNames, "Schema cache was not refreshed after adding a field. Got {0} instead.".format(resultNames))
+
+        # another run does not see this run's cache
+        arcpy.AddField_management(junkTable, "A2", "DOUBLE")
+        otherNames = VisibilityUtilities._getFieldNameList(junkTable, [], Utilities.ScratchWorkspace())
+        self.assertEqual(resultNames + ["A2"], otherNames, "Another run was served this run's field names. Got {0} instead.".format(otherNames))
+
     def test_getRasterMinMax(self):
         '''
         test internal method _getRasterMinMax
@@ -197,6 +255,76 @@ class VisibilityUtilitiesTestCase(unittest.TestCase, arcpyAssert.FeatureClassAss
         result = arcpy.RasterCompare_management(expectedOutput, resultClippedRaster,"RASTER_DATASET","Columns And Rows;NoData;Pixel Value;Raster Attribute Table","","","All 1 Fraction","","").getOutput(1)
         self.assertEqual(result, "true", "Raster Compare failed: \n %s" % arcpy.GetMessages())
 
+    def test_readSurfaceInArea(self):
+        '''
+        Compare statistics of _readSurfaceInArea cells to the known, good clipped surface
+        '''
+        Configuration.Logger.info(".....VisibilityUtilityTestCase.test_readSurfaceInArea")
+
+        expectedOutput = os.path.join(Configuration.militaryResultsGDB, "ExpectedOutputclipRasterToArea")
+        expectedMin, expectedMax = VisibilityUtilities._getRasterMinMax(expectedOutput)
+        resultValues, row0, col0 = VisibilityUtilities._readSurfaceInArea(self.inputSurface, self.inputArea)
+        self.assertEqual(expectedMin, float(numpy.nanmin(resultValues)), "Unexpected minimum value in area")
+        self.assertEqual(expectedMax, float(numpy.nanmax(resultValues)), "Unexpected maximum value in area")
+
+        # a second read of the same area comes from the block cache
+        cachedValues = VisibilityUtilities._readSurfaceInArea(self.inputSurface, self.inputArea)[0]
+        noData = numpy.isnan(resultValues)
+        self.assertTrue(numpy.array_equal(noData, numpy.isnan(cachedValues)), "Cached read returned different NoData cells")
+        self.assertTrue(numpy.array_equal(resultValues[~noData], cachedValues[~noData]), "Cached read returned different values")
+
+    def test_readPolygon_overlapping(self):
+        '''
+        Test cells under two overlapping polygons are read as inside, as for their union
+        '''
+        Configuration.Logger.info(".....VisibilityUtilityTestCase.test_readPolygon_overlapping")
+
+        surfaceReader = SurfaceReader.getSurfaceReader(self.inputSurface)
+        extent = surfaceReader.extent
+        width, height = extent.XMax - extent.XMin, extent.YMax - extent.YMin
+        def square(left, bottom):
+            x0, y0 = extent.XMin + left * width, extent.YMin + bottom * height
+            x1, y1 = x0 + 0.2 * width, y0 + 0.2 * height
+            return arcpy.Polygon(arcpy.Array([arcpy.Point(x0, y0), arcpy.Point(x0, y1),
+                                              arcpy.Point(x1, y1), arcpy.Point(x1, y0)]),
+                                 surfaceReader.spatialReference)
+        first, second = square(0.3, 0.3), square(0.4, 0.4)
+        resultValues, row0, col0 = surfaceReader.readPolygon([first, second])
+        unionValues, unionRow0, unionCol0 = surfaceReader.readPolygon([first.union(second)])
+        self.assertEqual([unionRow0, unionCol0], [row0, col0], "Unexpected window position")
+        self.assertTrue(numpy.array_equal(numpy.isnan(unionValues), numpy.isnan(resultValues)),
+                        "Overlapping polygons should read the same cells as their union")
+
+    def test_clipRasterToArea_window(self):
+        '''
+        Test that without an output _clipRasterToArea returns a raster of the cells in the area
+        '''
+        Configuration.Logger.info(".....VisibilityUtilityTestCase.test_clipRasterToArea_window")
+
+        resultValues = VisibilityUtilities._readSurfaceInArea(self.inputSurface, self.inputArea)[0]
+        clipRaster = VisibilityUtilities._clipRasterToArea(self.inputSurface, self.inputArea)
+        self.assertEqual(list(resultValues.shape), [clipRaster.height, clipRaster.width], "Unexpected clipped raster size")
+        self.assertEqual(float(numpy.nanmin(resultValues)), float(clipRaster.minimum), "Unexpected minimum value in clipped raster")
+        self.assertEqual(float(numpy.nanmax(resultValues)), float(clipRaster.maximum), "Unexpected maximum value in clipped raster")
+
+    def test_gridInRings(self):
+        '''
+        Test the scanline test of a grid selects the same cells as testing every cell center
+        '''
+        Configuration.Logger.info(".....VisibilityUtilityTestCase.test_gridInRings")
+
+        outer = numpy.array([[0.0, 0.0], [3.0, 40.0], [40.0, 35.0], [30.0, 2.0], [0.0, 0.0]])
+        hole = numpy.array([[10.0, 10.0], [20.0, 10.0], [15.0, 25.0], [10.0, 10.0]])
+        xs = numpy.arange(-5.0, 45.0, 0.7)
+        ys = numpy.arange(45.0, -5.0, -0.9)
+        gridXs, gridYs = numpy.meshgrid(xs, ys)
+        expected = Utilities.pointsInRings(gridXs.ravel(), gridYs.ravel(), [outer, hole]).reshape(gridXs.shape)
+        for chunkSize in [10, 1000000]:
+            result = Utilities.gridInRings(xs, ys, [outer, hole], chunkSize)
+            self.assertTrue(numpy.array_equal(expected, result), "gridInRings and pointsInRings disagree")
+        self.assertFalse(result[int(numpy.argmin(numpy.abs(ys - 15.0))), int(numpy.argmin(numpy.abs(xs - 15.0)))],
+                         "Cell in the hole is inside")
+
     def test_getUniqueValuesFromField001(self):
         '''
         Test _getUniqueValuesFromField with SigActs table's AttackScal field.
@@ -269,6 +397,88 @@ class VisibilityUtilitiesTestCase(unittest.TestCase, arcpyAssert.FeatureClassAss
         self.assertAlmostEqual(comparePoint.X, resultPoint.X, places=6, msg="Unexpected centroid X. Expected {0}, but got {1}".format(comparePoint.X, resultPoint.X))
         self.assertAlmostEqual(comparePoint.Y, resultPoint.Y, places=6, msg="Unexpected centroid Y. Expected {0}, but got {1}".format(comparePoint.Y, resultPoint.Y))
         
+    def test_observerViewshedCacheFile(self):
+        '''
+        Test that cached observer viewsheds are only reused for unchanged observers
+        '''
+        Configuration.Logger.info(".....VisibilityUtilityTestCase.test_observerViewshedCacheFile")
+
+        surfaceReader = SurfaceReader.getSurfaceReader(self.inputSurface)
+        observerValues = {"OFFSETA":2.0, "RADIUS2":1000.0, "AZIMUTH1":0.0, "AZIMUTH2":360.0}
+        firstFile = VisibilityUtilities._observerViewshedCacheFile(1, 500000.0, 4000000.0, observerValues, surfaceReader)
+        sameFile = VisibilityUtilities._observerViewshedCacheFile(1, 500000.0, 4000000.0, dict(observerValues), surfaceReader)
+        self.assertEqual(firstFile, sameFile, "Unchanged observer should use the same cached viewshed")
+        movedFile = VisibilityUtilities._observerViewshedCacheFile(1, 500010.0, 4000000.0, observerValues, surfaceReader)
+        self.assertNotEqual(firstFile, movedFile, "Moved observer should not reuse the cached viewshed")
+        for fieldName, value in [["OFFSETA", 5.0], ["AZIMUTH2", 180.0], ["VERT1", 45.0], ["RADIUS1", 100.0], ["OFFSETB", 1.0]]:
+            changedValues = dict(observerValues)
+            changedValues[fieldName] = value
+            changedFile = VisibilityUtilities._observerViewshedCacheFile(1, 500000.0, 4000000.0, changedValues, surfaceReader)
+            self.assertNotEqual(firstFile, changedFile, "Observer with new {0} should not reuse the cached viewshed".format(fieldName))
+
+    def test_buildCachedViewshed(self):
+        '''
+        Test a second build for the same observers reads their cached viewsheds
+        '''
+        Configuration.Logger.info(".....VisibilityUtilityTestCase.test_buildCachedViewshed")
+
+        inputObservers = os.path.join(Configuration.militaryInputDataGDB, "RLOS_Observers")
+        scratch = Utilities.ScratchWorkspace()
+        cacheFiles = []
+        try:
+            firstObserver = [row[0] for row in arcpy.da.SearchCursor(inputObservers, ["SHAPE@"])][0]
+            srLocalWAZED = VisibilityUtilities._getLocalWAZED(firstObserver.projectAs(self.srWGS84))
+            localObservers = scratch.name("localObservers")
+            arcpy.Project_management(inputObservers, localObservers, srLocalWAZED)
+            VisibilityUtilities._addFieldsAndCalculateValues(localObservers,
+                                                             {"OFFSETA":[2.0, "OFFSETA"],
+                                                              "RADIUS2":[1000.0, "RADIUS2"]})
+            surfaceObservers = scratch.name("surfaceObservers")
+            arcpy.Project_management(localObservers, surfaceObservers,
+                                     arcpy.Describe(self.inputSurface).spatialReference)
+
+            firstViewshed = VisibilityUtilities._buildCachedViewshed(inputObservers,
+                                                                     localObservers,
+                                                                     surfaceObservers,
+                                                                     self.inputSurface,
+                                                                     srLocalWAZED,
+                                                                     scratch.name("firstViewshed", inMemory=False),
+                                                                     scratch)
+            self.assertGreater(float(arcpy.GetRasterProperties_management(firstViewshed, "MAXIMUM").getOutput(0)), 0.0,
+                               "Observers should see some cells")
+
+            surfaceReader = SurfaceReader.getSurfaceReader(self.inputSurface)
+            observerIDs = [row[0] for row in arcpy.da.SearchCursor(inputObservers, ["OID@"])]
+            observerFields = VisibilityUtilities._viewshedObserverFieldNames(surfaceObservers)
+            surfaceRows = [row for row in arcpy.da.SearchCursor(surfaceObservers, ["SHAPE@XY"] + observerFields)]
+            for observerID, surfaceRow in zip(observerIDs, surfaceRows):
+                x, y = surfaceRow[0]
+                cacheFile = VisibilityUtilities._observerViewshedCacheFile(observerID, x, y,
+                                                                           dict(zip(observerFields, surfaceRow[1:])),
+                                                                           surfaceReader)
+                self.assertTrue(os.path.exists(cacheFile), "Viewshed of observer {0} was not cached".format(observerID))
+                cacheFiles.append(cacheFile)
+                # mark every cell not visible, so only a cached read gives an all zero viewshed
+                with numpy.load(cacheFile) as cached:
+                    visible, origin = cached["visible"], cached["origin"]
+                numpy.savez(cacheFile, visible=numpy.minimum(visible, 0), origin=origin)
+
+            secondViewshed = VisibilityUtilities._buildCachedViewshed(inputObservers,
+                                                                      localObservers,
+                                                                      surfaceObservers,
+                                                                      self.inputSurface,
+                                                                      srLocalWAZED,
+                                                                      scratch.name("secondViewshed", inMemory=False),
+                                                                      scratch)
+            self.assertEqual(0.0, float(arcpy.GetRasterProperties_management(secondViewshed, "MAXIMUM").getOutput(0)),
+                             "Second build should read the cached viewsheds")
+        finally:
+            # remove the altered viewsheds so later runs recompute them
+            for cacheFile in cacheFiles:
+                if os.path.exists(cacheFile):
+                    os.remove(cacheFile)
+            scratch.cleanup()
+
     def test_getLocalWAZED(self):
         '''
         '''
@@ -289,6 +499,18 @@ class VisibilityUtilitiesTestCase(unittest.TestCase, arcpyAssert.FeatureClassAss
         # factoryCode not set by _getLocalWAZED
         # self.assertEqual(resultSR.factoryCode, self.srWAZED.factoryCode, \
         #    "Compare expected Spatial Reference Code: {0} with result {1} failed.".format(self.srWAZED.factoryCode, resultSR.factoryCode))
+
+    def test_getLocalWAZED_cached(self):
+        '''
+        Test the localized WAZED is built once for the same center
+        '''
+        Configuration.Logger.info(".....VisibilityUtilityTestCase.test_getLocalWAZED_cached")
+
+        testInputPoint = arcpy.PointGeometry(arcpy.Point(-11.13, 14.87), self.srWGS84)
+        firstSR = VisibilityUtilities._getLocalWAZED(testInputPoint)
+        secondSR = VisibilityUtilities._getLocalWAZED(testInputPoint)
+        self.assertIs(firstSR, secondSR, "Localized WAZED for the same center should come from the cache")
+        self.assertAlmostEqual(-11.13, firstSR.centralMeridian, places=6)
                 
     def test_prepPointFromSurface(self):
         '''